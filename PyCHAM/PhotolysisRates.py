@@ -10,8 +10,34 @@ import requests, zipfile, io # for downloading
 import shutil
 from lamp_photo import lamp_photo
 
+# MCM parameters for photolysis rates under natural light (J = l*cosx**m*exp(-n*secx),
+# where cosx and secx are the cosine and secant of the solar zenith angle): MCM
+# photolysis reaction numbers (J_i) and their l (J_l), m (J_m) and n (J_n)
+J_i = np.array([1, 2, 3, 4, 5, 6, 7, 8, 11, 12, 13, 14, 15, 16, 17, 18, 19, 21,
+			22, 23, 24, 31, 32, 33, 34, 35, 41, 51, 52, 53, 54, 55, 56, 57,
+			61], dtype=int)
+J_l = np.array([6.073E-05, 4.775E-04, 1.041E-05, 1.165E-02, 2.485E-02,
+			1.747E-01, 2.644E-03, 9.312E-07, 4.642E-05, 6.853E-05,
+			7.344E-06, 2.879E-05, 2.792E-05, 1.675E-05, 7.914E-05,
+			1.140E-05, 1.140E-05, 7.992E-07, 5.804E-06, 1.836E-05,
+			1.836E-05, 6.845E-05, 1.032E-05, 3.802E-05, 1.537E-04,
+			3.326E-04, 7.649E-06, 1.588E-06, 1.907E-06, 2.485E-06,
+			4.095E-06, 1.135E-05, 7.549E-06, 3.363E-06, 7.537E-04])
+J_m = np.array([1.743, 0.298, 0.723, 0.244, 0.168, 0.155, 0.261, 1.230, 0.762,
+			0.477, 1.202, 1.067, 0.805, 0.805, 0.764, 0.396, 0.396, 1.578,
+			1.092, 0.395, 0.395, 0.130, 0.130, 0.644, 0.170, 0.148, 0.682,
+			1.154, 1.244, 1.196, 1.111, 0.974, 1.015, 1.296, 0.499])
+J_n = np.array([0.474, 0.080, 0.279, 0.267, 0.108, 0.125, 0.288, 0.307, 0.353,
+			0.323, 0.417, 0.358, 0.338, 0.338, 0.364, 0.298, 0.298, 0.271,
+			0.377, 0.296, 0.296, 0.201, 0.201, 0.312, 0.208, 0.215, 0.279,
+			0.318, 0.335, 0.328, 0.316, 0.309, 0.324, 0.322, 0.266])
+
+# lookup tables of photolysis rates against time of day, keyed by latitude, longitude, 
+# day of year and time interval of table
+J_tab = {}
+
 def PhotolysisCalculation(time, lat, lon, TEMP, act_flux_path, DayOfYear, photo_par_file,
-							Jlen):
+							Jlen, photo_tab_step=0.0, J_use=None):
 
 	# inputs:-----------------------------------------------------------------------------	
 	# act_flux_path - name of path to file containing known actinic flux (only used if 
@@ -20,52 +46,30 @@ def PhotolysisCalculation(time, lat, lon, TEMP, act_flux_path, DayOfYear, photo_
 	# photo_par_file - name of file containing estimates for wavelength-dependent
 	# 					absorption cross-sections and quantum yields
 	# Jlen - number of photolysis reactions
+	# photo_tab_step - time interval (s) of lookup table of natural light photolysis 
+	#					rates against time of day, 0 to calculate directly
+	# J_use - indices of photolysis rates used by the chemical scheme, the others are 
+	#			left at zero, None to calculate all
 	# ------------------------------------------------------------------------------------
 	
-	(secx, cosx) = zenith(time, lat, lon, DayOfYear)
-	
 	J = [0.0 for i in range(Jlen)] # don't have to check None type
+	if J_use is None: # calculate all photolysis rates
+		J_use = np.arange(Jlen)
+	J_use = np.array(J_use).astype(int)
     
     # if using MCM and natural light
 	cwd = os.getcwd() # address of current working directory
 
 	if photo_par_file == str(cwd + '/PyCHAM/photofiles/MCMv3.2') and act_flux_path == 'no':
-		#J          L           M          N
-		J[1]=6.073E-05*cosx**(1.743)*numpy.exp(-1.0*0.474*secx)
-		J[2]=4.775E-04*cosx**(0.298)*numpy.exp(-1.0*0.080*secx)
-		J[3]=1.041E-05*cosx**(0.723)*numpy.exp(-1.0*0.279*secx)
-		J[4]=1.165E-02*cosx**(0.244)*numpy.exp(-1.0*0.267*secx)
-		J[5]=2.485E-02*cosx**(0.168)*numpy.exp(-1.0*0.108*secx)
-		J[6]=1.747E-01*cosx**(0.155)*numpy.exp(-1.0*0.125*secx)
-		J[7]=2.644E-03*cosx**(0.261)*numpy.exp(-1.0*0.288*secx)
-		J[8]=9.312E-07*cosx**(1.230)*numpy.exp(-1.0*0.307*secx)
-		J[11]=4.642E-05*cosx**(0.762)*numpy.exp(-1.0*0.353*secx)
-		J[12]=6.853E-05*cosx**(0.477)*numpy.exp(-1.0*0.323*secx)
-		J[13]=7.344E-06*cosx**(1.202)*numpy.exp(-1.0*0.417*secx)
-		J[14]=2.879E-05*cosx**(1.067)*numpy.exp(-1.0*0.358*secx)
-		J[15]=2.792E-05*cosx**(0.805)*numpy.exp(-1.0*0.338*secx)
-		J[16]=1.675E-05*cosx**(0.805)*numpy.exp(-1.0*0.338*secx)
-		J[17]=7.914E-05*cosx**(0.764)*numpy.exp(-1.0*0.364*secx)
-		J[18]=1.140E-05*cosx**(0.396)*numpy.exp(-1.0*0.298*secx)
-		J[19]=1.140E-05*cosx**(0.396)*numpy.exp(-1.0*0.298*secx)
-		J[21]=7.992E-07*cosx**(1.578)*numpy.exp(-1.0*0.271*secx)
-		J[22]=5.804E-06*cosx**(1.092)*numpy.exp(-1.0*0.377*secx)
-		J[23]=1.836E-05*cosx**(0.395)*numpy.exp(-1.0*0.296*secx)
-		J[24]=1.836E-05*cosx**(0.395)*numpy.exp(-1.0*0.296*secx)
-		J[31]=6.845E-05*cosx**(0.130)*numpy.exp(-1.0*0.201*secx)
-		J[32]=1.032E-05*cosx**(0.130)*numpy.exp(-1.0*0.201*secx)
-		J[33]=3.802E-05*cosx**(0.644)*numpy.exp(-1.0*0.312*secx)
-		J[34]=1.537E-04*cosx**(0.170)*numpy.exp(-1.0*0.208*secx)
-		J[35]=3.326E-04*cosx**(0.148)*numpy.exp(-1.0*0.215*secx)
-		J[41]=7.649E-06*cosx**(0.682)*numpy.exp(-1.0*0.279*secx)
-		J[51]=1.588E-06*cosx**(1.154)*numpy.exp(-1.0*0.318*secx)
-		J[52]=1.907E-06*cosx**(1.244)*numpy.exp(-1.0*0.335*secx)
-		J[53]=2.485E-06*cosx**(1.196)*numpy.exp(-1.0*0.328*secx)
-		J[54]=4.095E-06*cosx**(1.111)*numpy.exp(-1.0*0.316*secx)
-		J[55]=1.135E-05*cosx**(0.974)*numpy.exp(-1.0*0.309*secx)
-		J[56]=7.549E-06*cosx**(1.015)*numpy.exp(-1.0*0.324*secx)
-		J[57]=3.363E-06*cosx**(1.296)*numpy.exp(-1.0*0.322*secx)
-		J[61]=7.537E-04*cosx**(0.499)*numpy.exp(-1.0*0.266*secx)
+		if photo_tab_step > 0.0: # interpolate from lookup table against time of day
+			J = J_tab_interp(time, lat, lon, DayOfYear, photo_tab_step, Jlen, J_use)
+		else:
+			(secx, cosx) = zenith(time, lat, lon, DayOfYear)
+			J = np.array(J)
+			# MCM photolysis reactions used
+			Ji_use = np.isin(J_i, J_use)
+			J[J_i[Ji_use]] = (J_l[Ji_use]*cosx**(J_m[Ji_use])*
+							numpy.exp(-1.0*J_n[Ji_use]*secx))
 
 	# from MAC spectral analysis and Mainz database (xsproc.py)
 # 	J[1] = 2.3706768705670786e-05
@@ -101,7 +105,7 @@ def PhotolysisCalculation(time, lat, lon, TEMP, act_flux_path, DayOfYear, photo_
 # 		z.extractall('PyCHAM/MCMphotofiles') # creates folder and stores files there
 		
 		# call on MCM_photo module to process photolysis files and estimate J values
-		J = lamp_photo(photo_par_file, J, TEMP, act_flux_path)
+		J = lamp_photo(photo_par_file, J, TEMP, act_flux_path, time, J_use)
 	
 		# remove photolysis information folder
 # 		cwd = os.getcwd() # address of current working directory
@@ -122,7 +126,7 @@ def PhotolysisCalculation(time, lat, lon, TEMP, act_flux_path, DayOfYear, photo_
 def zenith(time, lat, lon, DayOfYear):
     
     # inputs ------------------------------------------------------
-    # time is a float in s, represents time of day
+    # time is a float (or array of floats) in s, represents time of day
     # lat is latitude and lon is longitude in degrees
     # DayOfYear is the day number of the year (between 1-365)
     # -------------------------------------------------------------
@@ -160,10 +164,51 @@ def zenith(time, lat, lon, DayOfYear):
    
     cosx = (numpy.cos(lha)*cosld)+sinld
     secx = 1.0E+0/(cosx+1.0E-30)
-    # as in solarFunctions.f90 of AtChem2, set negative cosx to 0
-    if cosx<0.0:
-    	cosx = 0.0
-    	secx = 100.0
+    # as in solarFunctions.f90 of AtChem2, set negative cosx to 0, note that time can be
+    # an array
+    secx = np.where(cosx<0.0, 100.0, secx)
+    cosx = np.where(cosx<0.0, 0.0, cosx)
 
     
-    return (secx, cosx)
\ No newline at end of file
+    return (secx, cosx)
+
+# function to interpolate natural light photolysis rates from a lookup table against
+# time of day, with the table made on the first call for the given location, day and
+# time interval
+def J_tab_interp(time, lat, lon, DayOfYear, photo_tab_step, Jlen, J_use):
+
+	# inputs: ----------------------------------------------------------------------------
+	# time - time of day (s), can be an array
+	# lat - latitude (degrees)
+	# lon - longitude (degrees)
+	# DayOfYear - day number of the year (1-365)
+	# photo_tab_step - time interval (s) of lookup table
+	# Jlen - number of photolysis reactions
+	# J_use - indices of photolysis rates to interpolate, the others are left at zero
+	# ------------------------------------------------------------------------------------
+	
+	key = str(str(lat) + ', ' + str(lon) + ', ' + str(DayOfYear) + ', ' + 
+				str(photo_tab_step) + ', ' + str(Jlen))
+	if key not in J_tab: # make lookup table spanning one day
+		t_tab = np.arange(int(np.ceil(24.0*3600.0/photo_tab_step))+1)*photo_tab_step
+		(secx, cosx) = zenith(t_tab, lat, lon, DayOfYear)
+		J_tab_now = np.zeros((len(t_tab), Jlen))
+		J_tab_now[:, J_i] = (J_l*(cosx.reshape(-1, 1))**(J_m)*
+							numpy.exp(-1.0*J_n*(secx.reshape(-1, 1))))
+		J_tab[key] = J_tab_now
+	J_tab_now = J_tab[key]
+	
+	# linear interpolation between the table times either side of the time of day, 
+	# consistent with zenith repeating every 24 hours
+	tod = np.remainder(np.asarray(time, dtype=float), 24.0*3600.0)
+	ti = np.minimum((tod/photo_tab_step).astype(int), J_tab_now.shape[0]-2)
+	w = np.expand_dims((tod-ti*photo_tab_step)/photo_tab_step, -1)
+	J = np.zeros((np.shape(w)[0:-1]+(Jlen, )))
+	J[..., J_use] = (J_tab_now[ti][..., J_use]*(1.0-w)+
+					J_tab_now[ti+1][..., J_use]*w)
+	
+	# outputs: ---------------------------------------------------------------------------
+	# J - photolysis rates (/s), with times in rows if time is an array
+	# ------------------------------------------------------------------------------------
+	
+	return(J)
@@ -34,7 +34,7 @@ in_list = inputs.readlines()
 inputs.close()
 
 # check on whether correct number of inputs supplied
-input_len = 64
+input_len = 70
 if len(in_list) != input_len:
 	print(('Error: The number of variables in the model variables file is incorrect, should be ' + str(input_len) + ', but is ' + str(len(in_list)) + ', please see the README file for guidance'))
 	sys.exit()
@@ -520,7 +520,37 @@ for i in range(len(in_list)):
 			dil_fac = float(0.0)
 		else:
 			dil_fac = float(value)
+	if key == 'linear_solver': # linear solver of the ode solver
+		if (value.strip()).split(',')==['']:
+			linear_solver = 'DENSE'
+		else:
+			linear_solver = str(value.strip()).upper()
 			
+	if key == 'mech_cache': # whether to store the processed chemical scheme
+		if (value.strip()).split(',')==['']:
+			mech_cache = 0
+		else:
+			mech_cache = int(value)
+	if key == 'rate_tol': # relative tolerance for updating rate coefficients
+		if (value.strip()).split(',')==['']:
+			rate_tol = 0.0
+		else:
+			rate_tol = float(value)
+	if key == 'photo_tab_step': # interval of photolysis rate lookup table
+		if (value.strip()).split(',')==['']:
+			photo_tab_step = 0.0
+		else:
+			photo_tab_step = float(value)
+	if key == 'rate_interp': # segments of rate coefficient interpolation
+		if (value.strip()).split(',')==['']:
+			rate_interp = 0
+		else:
+			rate_interp = int(value)
+	if key == 'prop_proc': # processes for estimating component properties
+		if (value.strip()).split(',')==['']:
+			prop_proc = 0
+		else:
+			prop_proc = int(value)
 	
 # --------------------------------------------------------------------------------
 # checks on inputs
@@ -584,6 +614,9 @@ if len(accom_coeff_ind)!=len(accom_coeff_user):
 if len(TEMP)!=len(tempt):
 	print('Error: the variables temperature and tempt, both set in the model variables input file, have different lengths, but they must be the same length, please check README for guidance')
 	sys.exit()
+if linear_solver not in ['DENSE', 'SPARSE', 'SPGMR']:
+	print('Error: the variable linear_solver in the model variables input file must be one of DENSE, SPARSE or SPGMR, please check README for guidance')
+	sys.exit()
 		
 
 # ----------------------------------------------------------------------------------------
@@ -615,7 +648,8 @@ vol_Comp, volP, pconc, std, mean_rad, core_diss, light_stat, light_time,
 kgwt, dydt_trak, space_mode, Ct, Compt, injectt, seed_name, const_comp,
 const_infl, Cinfl, act_comp, act_user, seed_mw, umansysprop_update, seed_dens, 
 p_char, e_field, const_infl_t, chem_scheme_markers, int_tol, photo_par_file, 
-dil_fac, pconct, accom_coeff_ind, accom_coeff_user, update_step, tempt, coag_on]
+dil_fac, pconct, accom_coeff_ind, accom_coeff_user, update_step, tempt, coag_on, 
+linear_solver, mech_cache, rate_tol, photo_tab_step, rate_interp, prop_proc]
 	
 if os.path.isfile(dirpath+'/testf.txt'):
 	print('Model input buttons work successfully')
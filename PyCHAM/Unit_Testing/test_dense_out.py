@@ -0,0 +1,56 @@
+'''module to test dense_out.py against the exact solution of first-order decay'''
+# concentrations interpolated through an adaptive time step are compared with the exact
+# solution for slow decay (where the cubic Hermite interpolant should be accurate) and
+# for fast decay over a long time step, as taken by the BDF method of the ode solver
+# (where the interpolant must stay between the concentrations at the ends of the step),
+# please call in the Unit_Testing folder
+print('function to test dense_out.py')
+import os
+import sys
+dirpath = os.getcwd() # get current path
+sys.path.append(os.path.split(dirpath)[0]) # add path to system path
+
+import numpy as np
+from dense_out import dense_out
+
+print('imports okay')
+
+# two components decaying with first-order rate coefficients (/s), the first slowly and
+# the second quickly compared with the adaptive time step
+k = np.array((1.0e-3, 20.0))
+y0 = np.array((1.0e10, 1.0e10)) # initial concentrations (molecules/cc (air))
+
+def dydt(t, y):
+	return(-k*y)
+
+# adaptive time steps (s), with a step of 1 s followed by one of 4 s
+t_array = [0.0, 1.0, 5.0]
+res = np.array([y0*np.exp(-k*t) for t in t_array])
+
+issue = 0
+for trec in [1.0/3.0, 0.5, 0.9, 2.0, 4.5]:
+
+	ythen = dense_out(t_array, res, trec, dydt)
+	ti = int(np.searchsorted(t_array, trec))
+
+	# slow decay
+	y_exact = y0[0]*np.exp(-k[0]*trec)
+	if abs(ythen[0]-y_exact) > 1.0e-9*y_exact:
+		print(str('issue with dense_out, slow decay at ' + str(trec) + ' s is ' + str(ythen[0]) + ' but should be ' + str(y_exact)))
+		issue = 1
+
+	# fast decay
+	if (ythen[1] > max(res[ti-1, 1], res[ti, 1]) or
+		ythen[1] < min(res[ti-1, 1], res[ti, 1])):
+		print(str('issue with dense_out, fast decay at ' + str(trec) + ' s is ' + str(ythen[1]) + ', outside the concentrations at the ends of the time step (' + str(res[ti-1, 1]) + ' and ' + str(res[ti, 1]) + ')'))
+		issue = 1
+
+# times of adaptive time steps and beyond them give the solver results
+for [trec, ti] in [[0.0, 0], [1.0, 1], [5.0, 2], [6.0, 2]]:
+	if not np.array_equal(dense_out(t_array, res, trec, dydt), res[ti, :]):
+		print(str('issue with dense_out, result at ' + str(trec) + ' s differs from the ode solver result'))
+		issue = 1
+
+if issue == 1:
+	sys.exit(1)
+print('if no issues stated above, dense_out is working fine, test complete')
@@ -0,0 +1,184 @@
+'''module to test eqn_token.py against the line by line parsing it replaced'''
+# the chemical scheme files in the inputs folder are tokenized by eqn_token and by a
+# reference (the regular expression parsing that was done in eqn_parser and eqn_interr
+# before eqn_token, with markers escaped as whole strings and the marker for the end of
+# generic rate coefficient lines required at the end of the line) for schemes with the
+# reaction rate coefficient before the equation (as in the inputs folder) and after it
+# (as in the Kinetic PreProcessor (KPP) format), please call in the Unit_Testing folder
+print('function to test eqn_token.py')
+import os
+import sys
+import re
+dirpath = os.getcwd() # get current path
+sys.path.append(os.path.split(dirpath)[0]) # add path to system path
+
+import formatting
+from eqn_token import eqn_token
+
+print('imports okay')
+
+# reference tokenizer
+def ref_token(total_list_eqn, mark):
+
+	rrc = []
+	rrc_name = []
+	RO2_names = []
+	eqn_lines = [[], []] # gas- and aqueous-phase equation lines
+	pr_flag = 0
+
+	for line in total_list_eqn:
+
+		line1 = line.strip()
+
+		# generic reaction rate coefficients
+		if len(line1.split('='))==2:
+			rrc_flag = 1
+			if (len((line1.split('=')[0]).strip()) == 0):
+				rrc_flag = 0
+			if len((line1.split('=')[1]).strip()) >= 6:
+				if (line1.split('=')[1]).strip()[0:6]=='IGNORE':
+					rrc_flag = 0
+			if len(mark[7])>0:
+				if re.match(str('.*' + re.escape(mark[7]) + '$'), line1) == None:
+					rrc_flag = 0
+			if rrc_flag == 1:
+				if ((line1.split('=')[0]).strip() != mark[1] and
+					((line1.split('=')[0]).strip())[0] != mark[0] and
+					((line1.split('=')[0]).strip())[0] != mark[8]):
+					line2 = line1.replace(str(mark[7]), '')
+					line2 = line2.replace(' ', '')
+					line2 = formatting.SN_conversion(line2)
+					line2 = formatting.convert_rate_mcm(line2)
+					rrc.append(line2.strip())
+					rrc_name.append((line2.split('=')[0]).strip())
+
+		# peroxy radicals
+		if (re.match(str('.*' + re.escape(mark[1])), line1) != None):
+			if (len(mark[5].strip()) > 0):
+				if (re.match(str('.*' + re.escape(mark[5])), line1) != None):
+					pr_flag = 1
+			if (re.match(str('.*' + re.escape(mark[6])), line1) != None):
+				pr_flag = 1
+		if (pr_flag == 1):
+			for line3 in line1.split(mark[2]):
+				if len(line3.split('='))>1:
+					line3 = (line3.split('='))[1]
+				if len(line3.split(';'))>1:
+					line3 = (line3.split(';'))[0]
+				if len(line3.split('&'))>1:
+					line3 = (line3.split('&'))[0]
+				line3 = line3.strip()
+				if (line3 == '' or line3 == '&'):
+					continue
+				if line3[0:len(mark[3])] == mark[3]:
+					line3 = line3[len(mark[3])::]
+				if line3[-len(mark[4])::] == mark[4]:
+					line3 = line3[0:-len(mark[4])]
+				RO2_names.append(line3)
+			if (len(mark[5].strip()) > 0):
+				if (re.match(str('.*' + re.escape(mark[5])), line1) != None):
+					pr_flag = 0
+			elif (re.match(str('.*' + re.escape(mark[6])), line1) == None):
+				pr_flag = 0
+
+		# gas- and aqueous-phase equations
+		eqn_markers = [str('.*' + re.escape(mark[9])), str('.*' + re.escape(mark[11]))]
+		for phase in range(2):
+			if phase == 1 and mark[8] == '':
+				continue
+			if (re.match(str('^' + re.escape(mark[[0, 8][phase]])), line1) != None and
+				re.match(eqn_markers[0], line1) != None and
+				re.match(eqn_markers[1], line1) != None):
+				eqn_lines[phase].append(line1)
+
+	# split equation lines into reaction rate coefficient, reactants and products
+	eqn_list = [[], []]
+	stoich_regex = r"^\d*\.\d*|^\d*"
+	for phase in range(2):
+		for line in eqn_lines[phase]:
+			eqn_start_indx = (re.match(str('.*' + re.escape(mark[10])), line)).span()[1]
+			rrc_start_indx = (re.match(str('.*' + re.escape(mark[9])), line)).span()[1]
+			if eqn_start_indx>rrc_start_indx: # equation second
+				eqn = re.findall(str(re.escape(mark[10]) + '.*' + re.escape(mark[11])),
+						line)[0][len(mark[10]):-len(mark[11])].strip()
+				rate_ex = re.findall(str(re.escape(mark[9]) + '.*' + re.escape(mark[10])),
+						line)[0][len(mark[9]):-len(mark[10])].strip()
+			else: # equation first
+				eqn = re.findall(str(re.escape(mark[10]) + '.*' + re.escape(mark[9])),
+						line)[0][len(mark[10]):-len(mark[9])].strip()
+				rate_ex = re.findall(str(re.escape(mark[9]) + '.*' + re.escape(mark[11])),
+						line)[0][len(mark[9]):-len(mark[11])].strip()
+			eqn_split = eqn.split()
+			eqmark_pos = eqn_split.index('=')
+			comps = [[i for i in eqn_split[:eqmark_pos] if i != '+' and i != 'hv'],
+					[t for t in eqn_split[eqmark_pos+1:] if t != '+']]
+			tokens = [rate_ex]
+			for comp in comps:
+				stoi = []
+				name = []
+				for c in comp:
+					if (re.findall(stoich_regex, c)[0] != ''):
+						stoi.append(float(re.findall(stoich_regex, c)[0]))
+						name.append(re.sub(stoich_regex, '', c))
+					else:
+						stoi.append(1.0)
+						name.append(c)
+				tokens += [stoi, name]
+			eqn_list[phase].append(tuple(tokens))
+
+	return(rrc, rrc_name, RO2_names, eqn_list[0], eqn_list[1])
+
+# function to rewrite equation lines of a scheme from the rate coefficient first format
+# (% rate : equation ;) to the KPP format ({n.} equation : rate ;)
+def kpp_form(total_list_eqn):
+
+	lines = []
+	n = 0
+	for line in total_list_eqn:
+		sec = re.match(r'^\s*%(.*):(.*);\s*$', line)
+		if sec is None:
+			lines.append(line)
+		else:
+			n += 1
+			lines.append(str('{' + str(n) + '.} ' + sec.group(2).strip() + ' : ' +
+					sec.group(1).strip() + ' ;\n'))
+	return(lines)
+
+inpath = os.path.join(os.path.split(dirpath)[0], 'inputs')
+limonene = open(os.path.join(inpath, 'limonene_MCM.txt'), mode='r').readlines()
+MAC = open(os.path.join(inpath, 'MAC_Chem.txt'), mode='r').readlines()
+
+# schemes, markers and minimum number of gas-phase equations expected
+tests = [['limonene_MCM.txt', limonene,
+			['%', 'RO2', '+', '', '', ';', '+', ';', '', '%', ':', ';'], 2000],
+		['MAC_Chem.txt', MAC,
+			['%', '#RO2_BEGIN', ';', '', '', '#RO2_END', '', ';', '', '%', ':', ';'], 900],
+		['MAC_Chem.txt in KPP format', kpp_form(MAC),
+			['{', '#RO2_BEGIN', ';', '', '', '#RO2_END', '', ';', '', ':', '}', ';'], 900]]
+
+out_name = ['generic rate coefficients', 'generic rate coefficient names',
+			'RO2 names', 'gas-phase equations', 'aqueous-phase equations']
+issue = 0
+for [scheme, lines, mark, num_eqn] in tests:
+
+	print(str('tokenizing ' + scheme))
+	tok = eqn_token(lines, mark)
+	ref = ref_token(lines, mark)
+
+	if len(tok[3]) < num_eqn:
+		print(str('issue with eqn_token, only ' + str(len(tok[3])) + ' gas-phase equations found in ' + scheme))
+		issue = 1
+	for k in range(len(out_name)):
+		if [tuple(v) if k > 2 else v for v in tok[k]] != ref[k]:
+			print(str('issue with eqn_token, ' + out_name[k] + ' differ from reference for ' + scheme))
+			issue = 1
+
+# rate coefficients and equations must not depend on the format
+if [eqn for eqn in eqn_token(MAC, tests[1][2])[3]] != [eqn for eqn in
+	eqn_token(tests[2][1], tests[2][2])[3]]:
+	print('issue with eqn_token, equations differ between rate coefficient first and KPP formats')
+	issue = 1
+
+if issue == 1:
+	sys.exit(1)
+print('if no issues stated above, eqn_token is working fine, test complete')
@@ -0,0 +1,137 @@
+'''module to test jac_calc.py against a finite difference Jacobian of dydt_calc.py'''
+# the analytical Jacobian is compared element by element with central differences of the
+# ode right-hand side for a small mechanism with gas- and particle-phase reactions, 
+# reactions with rate coefficients proportional to RO2, gas-particle partitioning (to 
+# particles dominated by organic components) and gas-wall partitioning, please call in 
+# the Unit_Testing folder
+print('function to test jac_calc.py')
+import os
+import sys
+dirpath = os.getcwd() # get current path
+sys.path.append(os.path.split(dirpath)[0]) # add path to system path
+
+import numpy as np
+from scipy import sparse
+from stoich_mat import stoich_mat
+from dydt_calc import dydt_calc
+from jac_calc import jac_prep, jac_calc
+
+print('imports okay')
+
+# components: 0 A, 1 B, 2 C (RO2), 3 D, 4 core
+num_speci = 5
+num_sb = 3 # two particle size bins and wall
+corei = 4
+core_diss = 1.5
+
+# gas-phase equations: A + B = C, 2 C = D, C = 0.6 A + 0.4 B, A = 0.5 B + 0.5 D and
+# B = D with rate coefficient proportional to RO2
+rindx = np.array(((0, 1), (2, 0), (2, 0), (0, 0), (1, 0)))
+rstoi = np.array(((1.0, 1.0), (2.0, 0.0), (1.0, 0.0), (1.0, 0.0), (1.0, 0.0)))
+pindx = np.array(((2, 0), (3, 0), (0, 1), (1, 3), (3, 0)))
+pstoi = np.array(((1.0, 0.0), (1.0, 0.0), (0.6, 0.4), (0.5, 0.5), (1.0, 0.0)))
+nreac = np.array((2, 1, 1, 1, 1))
+nprod = np.array((1, 1, 2, 2, 1))
+reac_coef = np.array((2.0e-11, 5.0e-12, 3.0e-3, 1.0e-4, 0.0))
+# particle-phase equations: C = D and A + C = D
+rindx_aq = np.array(((2, 0), (0, 2)))
+rstoi_aq = np.array(((1.0, 0.0), (1.0, 1.0)))
+pindx_aq = np.array(((3, ), (3, )))
+pstoi_aq = np.array(((1.0, ), (1.0, )))
+nreac_aq = np.array((1, 2))
+nprod_aq = np.array((1, 1))
+reac_coef_aq = np.array((2.0e-3, 1.0e-13))
+num_eqn = np.array((len(nreac), len(nreac_aq)))
+
+# reactions with rate coefficients proportional to RO2, and the RO2 pool
+ro2_i = np.array((4, ))
+ro2_k = np.array((2.0e-12, ))
+RO2_y = np.array((2, ))
+
+# partitioning
+Psat = np.array(((1.0e9, ), (1.0e7, ), (1.0e5, ), (1.0e3, ), (1.0e2, )))
+kelv_fac = np.array((1.2, 1.05))
+act_coeff = np.ones((num_speci, 1))
+kimt = np.array(((1.0e-3, 2.0e-3), (2.0e-3, 3.0e-3), (4.0e-3, 5.0e-3), (6.0e-3, 7.0e-3),
+		(8.0e-3, 9.0e-3)))
+kgwt = 1.0e-4
+Cw = 1.0e12
+const_infli = np.zeros((0)).astype(int)
+Cinfl_now = np.zeros((0, 1))
+const_compi = np.zeros((0)).astype(int)
+
+# concentrations (molecules/cc (air)) of gas phase, size bins and wall, with particles
+# dominated by organic components, so that mole fractions are far from unity
+y = np.array((1.0e9, 2.0e9, 5.0e8, 3.0e8, 0.0,
+		1.0e10, 2.0e11, 4.0e11, 3.0e10, 1.0e8,
+		4.0e11, 1.0e11, 2.0e10, 3.0e11, 1.0e8,
+		1.0e6, 2.0e6, 3.0e6, 4.0e6, 0.0))
+
+[rord_ptr, rord_ind, rord_val, nstoi_ptr, nstoi_ind,
+	nstoi_val] = stoich_mat(rindx, rstoi, pindx, pstoi, nreac, nprod, num_speci)
+[rord_ptr_aq, rord_ind_aq, rord_val_aq, nstoi_ptr_aq, nstoi_ind_aq,
+	nstoi_val_aq] = stoich_mat(rindx_aq, rstoi_aq, pindx_aq, pstoi_aq, nreac_aq,
+	nprod_aq, num_speci)
+[jac_ptr, jac_ind, jmap, jac_cpos, jac_blk, blk_ptr, nsc_ptr, nsc_ind,
+	nsc_val, nsc_ptr_aq, nsc_ind_aq, nsc_val_aq] = jac_prep(num_speci, num_sb,
+	rord_ptr, rord_ind, nstoi_ptr, nstoi_ind, nstoi_val, num_eqn[0], const_compi,
+	rord_ptr_aq, rord_ind_aq, nstoi_ptr_aq, nstoi_ind_aq, nstoi_val_aq)
+
+def dydt(y):
+	return(dydt_calc(0.0, y, num_eqn, rord_ptr, rord_ind, rord_val, nstoi_ptr,
+			nstoi_ind, nstoi_val, reac_coef, const_infli, Cinfl_now, num_sb, num_speci,
+			corei, core_diss, Psat, kelv_fac, act_coeff, kimt, rord_ptr_aq, rord_ind_aq,
+			rord_val_aq, nstoi_ptr_aq, nstoi_ind_aq, nstoi_val_aq, reac_coef_aq, kgwt,
+			Cw, const_compi, ro2_i, ro2_k, RO2_y))
+
+print('calling jac_calc')
+jac_val = jac_calc(0.0, y, num_eqn[0], rord_ptr, rord_ind, rord_val, nsc_ptr,
+		nsc_ind, nsc_val, reac_coef, num_sb, num_speci, corei, core_diss, Psat,
+		kelv_fac, act_coeff, kimt, kgwt, Cw, jmap, jac_cpos, len(jac_ind), num_eqn[1],
+		rord_ptr_aq, rord_ind_aq, rord_val_aq, nsc_ptr_aq, nsc_ind_aq, nsc_val_aq,
+		reac_coef_aq, ro2_i, ro2_k, RO2_y)
+jac = sparse.csc_matrix((jac_val, jac_ind, jac_ptr), shape=(len(y), len(y))).toarray()
+
+print('now comparing with finite difference Jacobian')
+jac_fd = np.zeros((len(y), len(y)))
+for j in range(len(y)):
+	dy = np.zeros((len(y)))
+	dy[j] = max(abs(y[j])*1.0e-4, 1.0)
+	jac_fd[:, j] = (dydt(y+dy)-dydt(y-dy))/(2.0*dy[j])
+
+# the Jacobian omits the dependence of the particle surface concentration of a component
+# on the concentrations of the other components in its size bin, so remove this from the
+# finite difference Jacobian
+jac_fd_all = jac_fd.copy()
+for ibin in range(num_sb-1):
+	yi = num_speci*(ibin+1) # index of first component in this size bin
+	y_p = y[yi:yi+num_speci]
+	c_fac = np.ones((num_speci)) # contribution of each component to the bin total
+	c_fac[corei] = core_diss
+	conc_sum = np.sum(y_p*c_fac)
+	for j in range(num_speci):
+		for k in range(num_speci):
+			if k != j:
+				dflux = (kimt[j, ibin]*Psat[j, 0]*kelv_fac[ibin]*act_coeff[j, 0]*y_p[j]*
+						c_fac[k]/conc_sum**2.0)
+				jac_fd[j, yi+k] += dflux
+				jac_fd[yi+j, yi+k] -= dflux
+
+# the Jacobian omits the dependence of rate coefficients on RO2, so don't compare
+# columns for RO2 pool components
+col = np.ones((len(y))).astype(bool)
+col[RO2_y] = False
+# difference relative to each element (before and after removing the omitted terms), 
+# with an absolute allowance for the round-off of finite differences, which scales with 
+# the rate of change of the row's component
+atol = np.maximum(1.0e-13*np.abs(dydt(y)).reshape(-1, 1)/np.maximum(np.abs(y)*1.0e-4, 
+		1.0), 1.0e-300)
+err = (np.abs(jac-jac_fd)/(np.maximum(np.abs(jac_fd), np.abs(jac_fd_all))*1.0e-5+
+		atol))[:, col]
+if not np.all(err <= 1.0):
+	[row, coln] = np.unravel_index(np.nanargmax(err), err.shape)
+	coln = np.arange(len(y))[col][coln]
+	print(str('issue with jac_calc, element at row ' + str(row) + ' and column ' + str(coln) + ' is ' + str(jac[row, coln]) + ' but finite difference gives ' + str(jac_fd[row, coln])))
+	sys.exit(1)
+
+print('if no issues stated above, jac_calc is working fine, test complete')
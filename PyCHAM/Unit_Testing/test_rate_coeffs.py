@@ -0,0 +1,91 @@
+'''module to test the rate coefficient module generated by eqn_parser.write_rate_file'''
+# reaction rate coefficients from the generated module, where reactions are grouped by
+# the form of their expression (rate_templ) and the remaining expressions share
+# common subexpressions (rate_cse), are compared with evaluating each expression of the
+# chemical scheme directly, for the schemes in the inputs folder under natural light,
+# please call in the Unit_Testing folder
+print('function to test the rate coefficient module generated by eqn_parser')
+import os
+import sys
+dirpath = os.getcwd() # get current path
+sys.path.append(os.path.split(dirpath)[0]) # add path to system path
+
+import numpy as np
+import formatting
+import PhotolysisRates
+import eqn_parser
+from eqn_token import eqn_token
+from rate_templ import rate_templ, J_chan
+
+print('imports okay')
+
+inpath = os.path.join(os.path.split(dirpath)[0], 'inputs')
+# natural light photolysis rates from the MCM parameters are only given when called 
+# from the PyCHAM home directory
+os.chdir(os.path.split(os.path.split(dirpath)[0])[0])
+photo_par_file = str(os.getcwd() + '/PyCHAM/photofiles/MCMv3.2')
+Jlen = 62
+
+# schemes and their markers
+tests = [['limonene_MCM.txt', ['%', 'RO2', '+', '', '', ';', '+', ';', '', '%', ':', ';']],
+		['MAC_Chem.txt',
+			['%', '#RO2_BEGIN', ';', '', '', '#RO2_END', '', ';', '', '%', ':', ';']],
+		['Example_Run.txt', ['%', 'RO2', '+', '', '', ';', '+', ';', '', '%', ':', ';']]]
+
+# conditions: temperature (K), pressure (Pa), H2O and RO2 concentrations
+# (molecules/cc (air)) and time of day (s), latitude, longitude and day of year for
+# natural light
+TEMP = 288.15
+PInit = 101325.0
+H2O = 3.0e17
+RO2 = 4.0e8
+[time, lat, lon, DayOfYear] = [43200.0, 51.5, -0.1, 180]
+M = (PInit/(8.3144621*TEMP)*6.02214129e+23)*1.0e-6
+N2 = M*0.7809
+O2 = M*0.2095
+J = PhotolysisRates.PhotolysisCalculation(time, lat, lon, TEMP, 'no', DayOfYear,
+		photo_par_file, Jlen, 0.0)
+if max(J) == 0.0:
+	print('issue with test, no photolysis rates for natural light')
+	sys.exit(1)
+
+issue = 0
+fall_num = 0 # number of reactions evaluated by their original expressions
+for [scheme, mark] in tests:
+
+	print(str('generating rate coefficient module for ' + scheme))
+	total_list_eqn = open(os.path.join(inpath, scheme), mode='r').readlines()
+	[rrc, rrc_name, RO2_names, eqn_list, eqn_list_aq] = eqn_token(total_list_eqn, mark)
+	# python readable reaction rate coefficient expressions, as in eqn_interr
+	reac_coef = [formatting.convert_rate_mcm(formatting.SN_conversion(eqn[0])) for eqn
+			in eqn_list]
+	rate_mod = eqn_parser.write_rate_file(reac_coef, rrc, rrc_name, 0, '')
+	fall_num += len(rate_templ(reac_coef, rrc_name, J_chan(reac_coef+rrc))[1])
+
+	rate_values = rate_mod.evaluate_rates(RO2, H2O, TEMP, 1, time, lat, lon, 'no',
+			DayOfYear, M, N2, O2, photo_par_file, Jlen)
+
+	# direct evaluation of the generic rate coefficients then the reaction rate
+	# coefficients
+	names = {'numpy': np, 'TEMP': TEMP, 'H2O': H2O, 'RO2': RO2, 'M': M, 'N2': N2,
+			'O2': O2, 'J': J}
+	for i in range(len(rrc)):
+		names[rrc_name[i]] = eval(rrc[i][rrc[i].index('=')+1::], names)
+	rate_ref = np.array([eval(expr, names) for expr in reac_coef])
+
+	if len(rate_values) != len(rate_ref):
+		print(str('issue with rate coefficient module, number of rate coefficients differs from chemical scheme for ' + scheme))
+		issue = 1
+		continue
+	err = np.abs(rate_values-rate_ref)/np.maximum(np.abs(rate_ref), 1.0e-300)
+	if not np.all(err <= 1.0e-10): # including any not a number
+		print(str('issue with rate coefficient module, largest relative difference from direct evaluation is ' + str(np.nanmax(err)) + ' for reaction ' + str(np.argmax(~(err <= 1.0e-10))) + ' (' + reac_coef[np.argmax(~(err <= 1.0e-10))] + ') of ' + scheme))
+		issue = 1
+
+if fall_num == 0:
+	print('issue with test, no reactions evaluated by their original expressions')
+	issue = 1
+
+if issue == 1:
+	sys.exit(1)
+print('if no issues stated above, the generated rate coefficient module is working fine, test complete')
@@ -0,0 +1,56 @@
+'''module to estimate concentrations at any time through an integration interval'''
+# called by ode_gen when recording results, this module interpolates between the
+# results of the adaptive time steps of the ode solver using cubic Hermite interpolation,
+# with the derivatives at the ends of each adaptive time step given by the ode right-hand
+# side; this allows recording at the exact save_step times without limiting the step size
+# of the solver, where the cubic leaves the range between the concentrations at the ends 
+# of an adaptive time step (as for fast decay over a long step) linear interpolation is 
+# used instead, so that recorded concentrations do not go negative or overshoot
+
+import numpy as np
+
+def dense_out(t_array, res, trec, dydt):
+
+	# inputs: ----------------------------------------------------------------------------
+	# t_array - times (s) through integration interval of the adaptive time steps of the
+	#			ode solver
+	# res - concentrations (molecules/cc (air)) of all components in all phases
+	#		(columns) at the adaptive time steps (rows)
+	# trec - time (s) through integration interval to estimate concentrations at
+	# dydt - right-hand side function of the ode system
+	# ------------------------------------------------------------------------------------
+
+	t_array = np.array(t_array)
+
+	# index of the first adaptive time step at or beyond the requested time
+	ti = int(np.searchsorted(t_array, trec))
+	if ti == 0: # at or before start of interval
+		return(res[0, :])
+	if ti == len(t_array): # beyond end of interval
+		return(res[-1, :])
+	if t_array[ti] == trec: # requested time coincides with an adaptive time step
+		return(res[ti, :])
+
+	# width of adaptive time step (s) and fraction through it of requested time
+	h = t_array[ti]-t_array[ti-1]
+	s = (trec-t_array[ti-1])/h
+
+	# cubic Hermite basis functions
+	h00 = 2.0*s**3-3.0*s**2+1.0
+	h10 = s**3-2.0*s**2+s
+	h01 = -2.0*s**3+3.0*s**2
+	h11 = s**3-s**2
+
+	ythen = (h00*res[ti-1, :]+h10*h*dydt(t_array[ti-1], res[ti-1, :])+
+			h01*res[ti, :]+h11*h*dydt(t_array[ti], res[ti, :]))
+
+	# linear interpolation where the cubic is outside the range of the end values
+	out_i = ((ythen < np.minimum(res[ti-1, :], res[ti, :])) | 
+			(ythen > np.maximum(res[ti-1, :], res[ti, :])))
+	ythen[out_i] = (1.0-s)*res[ti-1, out_i]+s*res[ti, out_i]
+
+	# outputs: ---------------------------------------------------------------------------
+	# ythen - concentrations (molecules/cc (air)) at the requested time
+	# ------------------------------------------------------------------------------------
+
+	return(ythen)
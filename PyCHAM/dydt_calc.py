@@ -0,0 +1,154 @@
+'''module to calculate the rate of change of component concentrations for the ode solver'''
+# the right-hand side of the ode system solved in ode_gen, compiled by numba once and
+# cached on disk, so that repeat calls (and repeat simulations) avoid recompilation;
+# all inputs that vary between integration intervals are passed as arguments, rather
+# than being frozen into a closure
+
+import numpy as np
+from numba import jit
+
+# numba compiler to convert to machine code, cache=True stores the compiled version in
+# __pycache__ for use by later simulations
+@jit(nopython=True, cache=True)
+def dydt_calc(t, y, num_eqn, rord_ptr, rord_ind, rord_val, nstoi_ptr, nstoi_ind, 
+			nstoi_val, reac_coef, const_infli, Cinfl_now, num_sb, num_speci, corei, 
+			core_diss, Psat, kelv_fac, act_coeff, kimt, rord_ptr_aq, rord_ind_aq, 
+			rord_val_aq, nstoi_ptr_aq, nstoi_ind_aq, nstoi_val_aq, reac_coef_aq, kgwt, Cw, 
+			const_compi, ro2_i, ro2_k, RO2_y):
+
+	# inputs: ----------------------------------------------------------------------------
+	# t - time through integration interval (s)
+	# y - concentrations of components in all phases (molecules/cc (air))
+	# num_eqn - number of gas-phase [0] and particle-phase [1] equations
+	# rord_ptr, rord_ind, rord_val - CSR row pointers, component indices and reaction 
+	#	orders of the gas-phase reactant order matrix (equations in rows), from stoich_mat
+	# nstoi_ptr, nstoi_ind, nstoi_val - CSR row pointers, equation indices and net 
+	#	stoichiometries of the gas-phase net stoichiometry matrix (components in rows), 
+	#	from stoich_mat
+	# reac_coef - gas-phase reaction rate coefficients (/s)
+	# const_infli - indices of components with constant influx (integer)
+	# Cinfl_now - influx rate of components with constant influx (molecules/cc.s)
+	# num_sb - number of size bins (including wall)
+	# num_speci - number of components
+	# corei - index of core component
+	# core_diss - dissociation constant of core component
+	# Psat - saturation vapour pressures of components (molecules/cc (air))
+	# kelv_fac - Kelvin factor per size bin
+	# act_coeff - activity coefficients of components
+	# kimt - partitioning coefficients of components (rows) to size bins (columns) (/s)
+	# rord_ptr_aq, rord_ind_aq, rord_val_aq - CSR format of the particle-phase reactant
+	#	order matrix, from stoich_mat
+	# nstoi_ptr_aq, nstoi_ind_aq, nstoi_val_aq - CSR format of the particle-phase net 
+	#	stoichiometry matrix, from stoich_mat
+	# reac_coef_aq - particle-phase reaction rate coefficients (/s)
+	# kgwt - mass transfer coefficient for vapour-wall partitioning (/s)
+	# Cw - effective absorptive concentration of wall (molecules/cc (air))
+	# const_compi - indices of components with constant gas-phase concentration (integer)
+	# ro2_i - indices of gas-phase reactions with rate coefficients proportional to the 
+	#	total RO2 concentration (integer)
+	# ro2_k - rate coefficients of these reactions per unit RO2 concentration
+	#	(/s/(molecules/cc (air)))
+	# RO2_y - indices of components in the RO2 pool (integer)
+	# ------------------------------------------------------------------------------------
+
+	# empty array to hold rate of change (molecules/cc(air).s)
+	dydt = np.zeros((len(y)))
+	
+	# rate coefficients proportional to the total RO2 concentration, from the current
+	# RO2 pool (molecules/cc (air))
+	if len(ro2_i)>0:
+		RO2 = 0.0
+		for i in range(len(RO2_y)):
+			RO2 += y[RO2_y[i]]
+		reac_coef = reac_coef.copy()
+		for i in range(len(ro2_i)):
+			reac_coef[ro2_i[i]] = ro2_k[i]*RO2
+	
+	# gas-phase rate of change ------------------------------------
+	# reaction rates (molecules/cc (air).s) from the sparse reactant order matrix, note 
+	# that rates of reactions with any reactant not present are zero
+	rate_gp = np.zeros((num_eqn[0]))
+	for i in range(num_eqn[0]): # equation loop
+		rate_gp[i] = reac_coef[i]
+		for k in range(rord_ptr[i], rord_ptr[i+1]):
+			rate_gp[i] *= y[rord_ind[k]]**rord_val[k]
+	
+	# gas-phase rate of change (molecules/cc (air).s) as the product of the net 
+	# stoichiometry matrix and the reaction rates
+	for j in range(len(nstoi_ptr)-1): # component loop
+		for k in range(nstoi_ptr[j], nstoi_ptr[j+1]):
+			dydt[j] += nstoi_val[k]*rate_gp[nstoi_ind[k]]
+
+	# the constant gas-phase influx of components with this property
+	for i in range(len(const_infli)):
+		dydt[const_infli[i]] = dydt[const_infli[i]]+Cinfl_now[i, 0]
+
+	if num_sb>1: # as num_sb includes 1 for wall
+		# gas-particle partitioning, based on eqs. 3 and 4 of Zaveri et al.
+		# (2008): doi:10.1029/2007JD008782
+		# and eq. 3 of Riipinen et al.
+		# (2010): doi:10.1016/j.atmosenv.2009.11.022
+		# -----------------------------------------------------------
+		# particle-phase concentrations and their rates of change as 2-D views (size bins 
+		# in rows, components in columns) of y and dydt
+		y_p = y[num_speci:num_speci*num_sb].reshape(num_sb-1, num_speci)
+		dydt_p = dydt[num_speci:num_speci*num_sb].reshape(num_sb-1, num_speci)
+		
+		for ibin in range(num_sb-1): # size bin loop
+
+			# sum of molecular concentrations per bin (molecules/cc (air))
+			conc_sum = 0.0
+			for j in range(num_speci):
+				conc_sum += y_p[ibin, j]
+			conc_sum += y_p[ibin, corei % num_speci]*(core_diss-1.0)
+			
+			# prevent numerical error due to division by zero
+			if conc_sum == 0.0:
+				conc_sum = 1.0e-40
+
+			for j in range(num_speci): # component loop
+				# partitioning rate (molecules/cc.s) from the difference between the 
+				# gas-phase concentration and the particle surface gas-phase 
+				# concentration (molecules/cc (air))
+				dydt_all = kimt[j, ibin]*(y[j]-(y_p[ibin, j]/conc_sum)*Psat[j, 0]*
+							kelv_fac[ibin]*act_coeff[j, 0])
+				# gas-phase change
+				dydt[j] -= dydt_all
+				# particle-phase change
+				dydt_p[ibin, j] += dydt_all
+
+		# rate of change to particulate components due to reactions in particulates 
+		# (molecules/cc (air).s), evaluated for all size bins together, with the 
+		# reactant concentrations of each size bin
+		rate_aq = np.zeros((num_eqn[1], num_sb-1))
+		for i in range(num_eqn[1]): # particulate equation loop
+			for ibin in range(num_sb-1):
+				rate_aq[i, ibin] = reac_coef_aq[i]
+			for k in range(rord_ptr_aq[i], rord_ptr_aq[i+1]): # reactant loop
+				for ibin in range(num_sb-1):
+					rate_aq[i, ibin] *= y_p[ibin, rord_ind_aq[k]]**rord_val_aq[k]
+		
+		for j in range(len(nstoi_ptr_aq)-1): # component loop
+			for k in range(nstoi_ptr_aq[j], nstoi_ptr_aq[j+1]):
+				for ibin in range(num_sb-1):
+					dydt_p[ibin, j] += nstoi_val_aq[k]*rate_aq[nstoi_ind_aq[k], ibin]
+
+	if (kgwt*Cw)>1.0e-10:
+		# -----------------------------------------------------------
+		# gas-wall partitioning (dydt is in molecules/cc.s (air))
+
+		for j in range(num_speci): # component loop
+			# partitioning rate (molecules/cc.s) from the difference between the 
+			# gas-phase concentration and the concentration at wall with Raoult term
+			# (molecules/cc (air))
+			dydt_all = kgwt*(y[j]-Psat[j, 0]*(y[num_speci*num_sb+j]/Cw)*act_coeff[j, 0])
+			# gas-phase change
+			dydt[j] -= dydt_all
+			# wall concentration change
+			dydt[num_speci*num_sb+j] += dydt_all
+
+	# constant gas-phase concentration of components with this property
+	for i in range(len(const_compi)):
+		dydt[const_compi[i]] = 0.0
+
+	return(dydt)
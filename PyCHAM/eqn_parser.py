@@ -7,18 +7,30 @@ import re
 import collections
 import sys
 import datetime
+import hashlib
+import io
+import types
+import pickle
 import numpy as np
 import pybel
 import formatting
 import xmltodict # for opening and converting xml files to python dictionaries
 import ipdb
 from eqn_interr import eqn_interr
+from eqn_token import eqn_token # tokenizer for chemical scheme files
+from rate_templ import rate_templ, rate_part, J_chan, var_name, part_name # grouping of rate coefficient expressions
+from rate_cse import rate_cse # common subexpression elimination
+
+# PyCHAM modules that determine the parsed mechanism, included in the content hash of the
+# mechanism cache so that a change to them invalidates stored mechanisms
+mech_src = ['eqn_parser.py', 'eqn_token.py', 'eqn_interr.py', 'formatting.py', 
+			'rate_templ.py', 'rate_cse.py']
 
 # ----------Extraction of eqn info----------
 # Extract the mechanism information
 def extract_mechanism(filename, xmlname, PInit, testf, RH, 
 						start_sim_time, lat, lon, act_flux_path, DayOfYear, 
-						chem_scheme_markers, photo_par_file):
+						chem_scheme_markers, photo_par_file, mech_cache):
 
 	
 	# inputs: ----------------------------------------------------------------------------
@@ -27,11 +39,40 @@ def extract_mechanism(filename, xmlname, PInit, testf, RH,
 	#						default input is for the kinetic pre-processor (KPP) format
 	# photo_par_file - path (from PyCHAM home directory) to file containing photolysis
 	#					information (absorption cross sections and quantum yields)
+	# mech_cache - flag for storing the parsed mechanism and generated rate coefficient 
+	#				modules on disk and reusing them in later simulations (1) or holding 
+	#				them in memory only (0)
 	# ------------------------------------------------------------------------------------
 	
 	if testf == 1: # for just testing mode
-		return(0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0)
-    
+		return(0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0)
+	
+	# number of photolysis reactions
+	Jlen = Jlen_calc(photo_par_file)
+	
+	# folder to store the parsed mechanism and generated rate coefficient modules in, 
+	# unique to the contents of the chemical scheme and xml files, the markers and the 
+	# PyCHAM modules that parse them, so that simultaneous simulations with different 
+	# schemes do not overwrite each other's files and a stored mechanism is only reused
+	# when it would be parsed identically
+	if mech_cache == 1:
+		# PyCHAM package folder, so that the cache is found wherever simulations are 
+		# started from
+		pkg_dir = os.path.dirname(os.path.abspath(__file__))
+		mech_hash = hashlib.sha256()
+		for fn in [filename, xmlname]+[os.path.join(pkg_dir, src_name) for src_name in 
+			mech_src]:
+			with open(fn, mode='rb') as fh:
+				mech_hash.update(fh.read())
+		mech_hash.update(str(chem_scheme_markers).encode())
+		cache_dir = os.path.join(pkg_dir, 'mech_cache', str(
+					os.path.splitext(os.path.basename(filename))[0] + '_' + 
+					mech_hash.hexdigest()[0:16]))
+		if os.path.isfile(os.path.join(cache_dir, 'mech.pkl')): # stored mechanism
+			return(mech_load(cache_dir, Jlen))
+	else:
+		cache_dir = ''
+	
 	print('Now parsing the equation information ... \n')
     
 	# open the chemical scheme file
@@ -46,169 +87,12 @@ def extract_mechanism(filename, xmlname, PInit, testf, RH,
 		print('Eqn file not closed')
 		sys.exit()
 	
-	naked_list_eqn = [] # empty list for gas-phase equation reactions
-	naked_list_peqn = [] # empty list for other equation reactions
-	RO2_names = [] # empty list for peroxy radicals
-	rrc = [] # empty list for reaction rate coefficients
-	rrc_name = [] # empty list for reaction rate coefficient labels
-
-	eqn_flag = 0 # don't collate reaction equations until seen
-	pr_flag = 0 # don't collate peroxy radicals until seen
-	RO2_count = 0 # count on number of lines considered in peroxy radical list
-	
 	# obtain lists for reaction rate coefficients, peroxy radicals and equation reactions
-	# using markers for separating chemical scheme elements
-	for line in total_list_eqn:
-		
-		line1 = line.strip() # remove bounding white space
-		
-		# --------------------------------------------------------------------------------
-		# generic reaction rate coefficients part
-		# marker at end of generic reaction rate coefficient lines
-		end_mark = str('$\\' + chem_scheme_markers[7])
-		# look out for start of generic reaction rate coefficients
-		# could be generic reaction coefficient if just one = in line
-		
-		if len(line1.split('='))==2:
-			rrc_flag = 1
-			# don't record if nothing preceding '=' (can occur in KPP files, e.g.
-			# =IGNORE)
-			if (len((line1.split('=')[0]).strip()) == 0):
-				rrc_flag = 0
-				# don't record if this just an IGNORE command
-			if len((line1.split('=')[1]).strip()) >= 6:
-				if (line1.split('=')[1]).strip()[0:6]=='IGNORE':
-					rrc_flag = 0
-			# don't record if marker (if one present) for end of generic reaction rate
-			# coefficient lines not present
-			if len(chem_scheme_markers[7])>0:
-				if re.match(end_mark, line1) == None:
-					rrc_flag = 0
-			
-			if rrc_flag == 1: 
-			
-				# dont consider if start of peroxy radical list
-				if (line1.split('=')[0]).strip() != chem_scheme_markers[1]:
-					# don't consider if a gas-phase chemical scheme reaction
-					if ((line1.split('=')[0]).strip())[0] != chem_scheme_markers[0]:
-						# don't consider if an aqueous-phase chemical scheme reaction
-						if ((line1.split('=')[0]).strip())[0] != chem_scheme_markers[8]:
-							# remove end characters
-							line2 = line1.replace(str(chem_scheme_markers[7]), '')
-							# remove all white space
-							line2 = line2.replace(' ', '')
-							# convert fortran-type scientific notation to python type
-							line2 = formatting.SN_conversion(line2)
-							# ensure rate coefficient is python readable
-							line2 = formatting.convert_rate_mcm(line2)
-							rrc.append(line2.strip())
-							# get just name of generic reaction rate coefficient
-							rrc_name.append((line2.split('=')[0]).strip())
-			
-		# --------------------------------------------------------------------------------
-		# peroxy radical part
-		# now start logging peroxy radicals
-		
-		RO2_start_mark = str('.*' + chem_scheme_markers[1])
-		
-		# if starting marker for peroxy radical list seen, flag that recording needed
-		if (re.match(RO2_start_mark, line1) != None):
-			# to double check that recording needed for peroxy radicals (in case 
-			# chem_scheme_markers[1] is not unique
-			
-			# first check whether the RO2 list comprises just one line, as this will
-			# mean its end marker is present
-			if (len(chem_scheme_markers[5].strip()) > 0):
-				# .* allows search across all elements of line, \\ ensures marker is
-				# recognised as string
-				mark = str('.*\\' + chem_scheme_markers[5])
-				if (re.match(mark, line1) != None):
-					pr_flag = 1
-			
-			# look for presence of marker for RO2 list continuing onto next line, which
-			# confirms this is the RO2 list when it covers more than one line
-			# .* allows search across all elements of line, \\ ensures marker is
-			# recognised as string
-			mark = str('.*\\' + chem_scheme_markers[6])
-			if (re.match(mark, line1) != None):
-				pr_flag = 1
-		
-		if (pr_flag == 1):
-			# get the elements in line separated by peroxy radical separator
-			line2 = line1.split(chem_scheme_markers[2])
-			
-			RO2_count += 1 # count on number of lines considered in peroxy radical list
-			
-			for line3 in line2: # loop through elements in line
-				if len(line3.split('='))>1: # in case of RO2 = ...
-					line3 = (line3.split('='))[1]
-				if len(line3.split(';'))>1: # in case of RO2 list finishing with ...;
-					line3 = (line3.split(';'))[0]
-				if len(line3.split('&'))>1: # in case of RO2 list finishing with &
-					line3 = (line3.split('&'))[0]
-				
-				# remove any white space
-				line3 = line3.strip()
-				# don't include white space or ampersands
-				if (line3 == '' or line3 == '&'):
-					continue
-				
-				else: # if not these, then first strip surrounding marks
-					if line3[0:len(chem_scheme_markers[3])] == chem_scheme_markers[3]:
-						line3 = line3[len(chem_scheme_markers[3])::]
-					if line3[-len(chem_scheme_markers[4])::] == chem_scheme_markers[4]:
-						line3 = line3[0:-len(chem_scheme_markers[4])]
-					
-					RO2_names.append(line3)
-			# check for end of RO2 list - given either by marker for end or absence of
-			# marker for continuation onto next line of RO2
-			# check for marker for end of RO2 list
-			if (len(chem_scheme_markers[5].strip()) > 0):
-				# .* allows search across all elements of line, \\ ensures marker is
-				# recognised as string
-				mark = str('.*\\' + chem_scheme_markers[5])
-				if (re.match(mark, line1) != None):
-					pr_flag = 0
-			
-			else: # look for absence of marker for RO2 list continuing onto next line
-				# .* allows search across all elements of line, \\ ensures marker is
-				# recognised as string
-				mark = str('.*\\' + chem_scheme_markers[6])
-				if (re.match(mark, line1) == None):
-					pr_flag = 0
-		# --------------------------------------------------------------------------------
-		# gas-phase reaction equation part
-		# ^ means occurs at start of line and, first \ means second \ can be interpreted 
-		# and second \ ensures recognition of marker
-		marker = str('^\\' +  chem_scheme_markers[0])
-		# first check is whether equation start marker is present
-		if (re.match(marker, line1) != None):
-			# second check is whether markers for starting reaction rate coefficients
-			# part, and markers for end of equation lines, are present
-			eqn_markers = [str('.*\\' +  chem_scheme_markers[9]), str('.*\\' +  chem_scheme_markers[11])]
-			if (re.match(eqn_markers[0], line1) != None and 
-				re.match(eqn_markers[1], line1) != None):
-				naked_list_eqn.append(line1) # store reaction equations
-		# aqueous-phase reaction equation part
-		# ^ means occurs at start of line and, first \ means second \ can be interpreted 
-		# and second \ ensures recognition of marker
-		# first, check if a marker given, if not bypass
-		if chem_scheme_markers[8] == '':
-			continue
-		else:
-			
-			marker = str('^\\' +  chem_scheme_markers[8])
-			if (re.match(marker, line1) != None):
-				
-				# second check is whether markers for starting reaction rate coefficients
-				# part, and markers for end of equation lines, are present
-				eqn_markers = [str('.*\\' +  chem_scheme_markers[9]), str('.*\\' +  chem_scheme_markers[11])]
-				if (re.match(eqn_markers[0], line1) != None and 
-					re.match(eqn_markers[1], line1) != None):
-					naked_list_peqn.append(line1) # store reaction equations
-		
-			
-		# --------------------------------------------------------------------------------
+	# using markers for separating chemical scheme elements, with equations split into
+	# their reaction rate coefficients, reactants and products
+	[rrc, rrc_name, RO2_names, naked_list_eqn, 
+		naked_list_peqn] = eqn_token(total_list_eqn, chem_scheme_markers)
+	
 	# format the equation list
 	
 	# get number of equations for phases
@@ -234,6 +118,14 @@ def extract_mechanism(filename, xmlname, PInit, testf, RH,
 		else:
 			 spec_smil[i] = spec_name[i] 
 	
+	# registry of components, shared by the modules preparing the simulation: names to
+	# SMILES for components in the xml file (taking the first entry of any name repeated)
+	# and names to indices for components in the chemical scheme, which is filled by 
+	# eqn_interr
+	spec_reg = {'smil': {}, 'indx': {}}
+	for i in range(len(spec_name)):
+		spec_reg['smil'].setdefault(spec_name[i], spec_smil[i])
+	
 	# initialising variables for equation interrogator (eqn_interr)
 	
 	comp_num = 0 # count the number of unique components
@@ -268,13 +160,13 @@ def extract_mechanism(filename, xmlname, PInit, testf, RH,
 	[rindx, rstoi, pindx, pstoi, reac_coef, spec_namelist, spec_list, 
 			Pybel_objects, nreac, nprod, comp_num] = eqn_interr(num_eqn[0], naked_list_eqn, 
 				rindx, rstoi, pindx, pstoi, 
-				chem_scheme_markers, reac_coef, spec_namelist, spec_name, spec_smil,
+				reac_coef, spec_namelist, spec_reg,
 				spec_list, Pybel_objects, nreac, nprod, comp_num, 0)
 	# get equation information for aqueous-phase reactions
 	[rindx_aq, rstoi_aq, pindx_aq, pstoi_aq, reac_coef_aq, spec_namelist, spec_list, 
 			Pybel_objects, nreac_aq, nprod_aq, comp_num] = eqn_interr(num_eqn[1], naked_list_peqn, 
 				rindx_p, rstoi_p, pindx_p, pstoi_p, 
-				chem_scheme_markers, reac_coef_p, spec_namelist, spec_name, spec_smil,
+				reac_coef_p, spec_namelist, spec_reg,
 				spec_list, Pybel_objects, nreac_p, nprod_p, comp_num, 1)
 	
 	if len(spec_list)!=len(spec_namelist):
@@ -289,27 +181,32 @@ def extract_mechanism(filename, xmlname, PInit, testf, RH,
 	# create a 2 column array, the first column with the RO2 list index of any RO2 species
 	# that appears in the species list, the second column for its index in the species 
 	# list
-	RO2_indices = write_RO2_indices(spec_namelist, RO2_names)
+	RO2_indices = write_RO2_indices(spec_reg, RO2_names)
 	
 	# automatically generate the Rate_coeffs module that will allow rate coefficients to
-	# be calculated inside ode_gen module (/s) for gas phase
+	# be calculated inside ode_gen module (/s) for gas phase, this is compiled in memory
+	# rather than imported from the PyCHAM folder
+	rate_mod = write_rate_file(reac_coef, rrc, rrc_name, testf, cache_dir)
+	# repeat for aqueous phase - creates a different module to gas phase one
+	rate_mod_aq = write_rate_file(reac_coef_aq, rrc, rrc_name, 3, cache_dir)
 	
-	write_rate_file(reac_coef, rrc, rrc_name, testf)
-	# repeat for aqueous phase - creates a different file to gas phase one
-	write_rate_file(reac_coef_aq, rrc, rrc_name, 3)
-
-	# number of photolysis reactions, if this relevant
-	cwd = os.getcwd() # address of current working directory
-	if photo_par_file == str(cwd + '/PyCHAM/photofiles/MCMv3.2'):
-		Jlen = 62 # for MCM (default name of photolysis parameters)
-	else: # need to find out number of photolysis reactions
-		# use Fortran indexing to be consistent with MCM photochemical reaction numbers
-		Jlen = 1 
-		# open file to read
-		f = open(str(photo_par_file), 'r')
-		for line in f: # loop through line
-			if line.strip() == str('J_'+str(Jlen) + '_axs'):
-				Jlen += 1
+	if cache_dir != '': # store the parsed mechanism for later simulations
+		mech = {'rindx': rindx, 'pindx': pindx, 'rstoi': rstoi, 'pstoi': pstoi, 
+				'reac_coef': reac_coef, 'spec_list': spec_list, 'num_eqn': num_eqn, 
+				'comp_num': comp_num, 'RO2_indices': RO2_indices, 'nreac': nreac, 
+				'nprod': nprod, 'prodn': prodn, 'reacn': reacn, 
+				'spec_namelist': spec_namelist, 'rindx_aq': rindx_aq, 
+				'pindx_aq': pindx_aq, 'rstoi_aq': rstoi_aq, 'pstoi_aq': pstoi_aq, 
+				'reac_coef_aq': reac_coef_aq, 'nreac_aq': nreac_aq, 
+				'nprod_aq': nprod_aq, 'prodn_aq': prodn_aq, 'reacn_aq': reacn_aq, 
+				'spec_reg': spec_reg}
+		# write to a temporary file then rename, as for the rate coefficient modules, 
+		# with the mechanism written last so that its presence means that all files are
+		# complete
+		mech_path = os.path.join(cache_dir, 'mech.pkl')
+		with open(str(mech_path + '.tmp' + str(os.getpid())), mode='wb') as pk:
+			pickle.dump(mech, pk, protocol=pickle.HIGHEST_PROTOCOL)
+		os.replace(str(mech_path + '.tmp' + str(os.getpid())), mech_path)
 
 	# print the brief info for the simulation to the screen
 	print('Briefing:')
@@ -334,26 +231,37 @@ def extract_mechanism(filename, xmlname, PInit, testf, RH,
 	# prodn - number of columns in pindx
 	# reacn - rindx number of columns
 	# spec_namelist - list of component names used in the chemical reaction file
+	# rate_mod - module for calculating gas-phase reaction rate coefficients
+	# rate_mod_aq - module for calculating aqueous-phase reaction rate coefficients
+	# spec_reg - registry of components, with names to SMILES (smil) for components in
+	#			the xml file and names to indices (indx) for components in the chemical
+	#			scheme
 	# ------------------------------------------------------------------------------------
 	return (rindx, pindx, rstoi, pstoi, reac_coef, spec_list, Pybel_objects, num_eqn, 
 			comp_num, RO2_indices, nreac,
 			nprod, prodn, reacn, spec_namelist, Jlen, rindx_aq, pindx_aq, rstoi_aq, 
-			pstoi_aq, reac_coef_aq, nreac_aq, nprod_aq, prodn_aq, reacn_aq)
+			pstoi_aq, reac_coef_aq, nreac_aq, nprod_aq, prodn_aq, reacn_aq, rate_mod, 
+			rate_mod_aq, spec_reg)
 
 
 
-# This function generates a python script that will calculate rate coefficients (/s)
-def write_rate_file(reac_coef, rrc, rrc_name, testf):
+# This function generates and compiles a python module that will calculate rate 
+# coefficients (/s)
+def write_rate_file(reac_coef, rrc, rrc_name, testf, cache_dir=''):
 
 	# inputs: ----------------------------------------------------------------------------
 	# testf - flag for testing: 0 in gas-phase equation mode, 2 for test mode, 3 for
 	#			aqueous-phase equation mode
-	if (testf == 0):
-		f = open('PyCHAM/Rate_coeffs.py', mode='w')
+	# cache_dir - folder to store the module source in, empty for no storage
+	# ------------------------------------------------------------------------------------
+	
 	if (testf == 3):
-		f = open('PyCHAM/Rate_coeffs_aq.py', mode='w')
-	if (testf == 2):
-		f = open('Rate_coeffs.py', mode='w')
+		mod_name = 'Rate_coeffs_aq'
+	else:
+		mod_name = 'Rate_coeffs'
+	
+	# module source is written to memory
+	f = io.StringIO()
 		
 	f.write('\'\'\'module for calculating reaction rate coefficients, automatically generated by eqn_parser\'\'\'\n')
 	f.write('\n')
@@ -371,12 +279,60 @@ def write_rate_file(reac_coef, rrc, rrc_name, testf):
 	f.write('import numpy\n')
 	f.write('import PhotolysisRates\n')
 	f.write('\n')
+	
+	# photolysis rates used by reactions and generic rate coefficients
+	J_use = J_chan(reac_coef+rrc)
+	# group reactions by the form of their rate coefficient expression
+	[rate_grp, fall_i, J0] = rate_templ(reac_coef, rrc_name, J_use)
+	# part of each reaction by dependence on photolysis rates and RO2
+	[rate_p, rrc_dep] = rate_part(reac_coef, rrc, rrc_name)
+	fall_p = rate_p[np.array(fall_i).astype(int)] # parts of reactions not grouped
+	
+	# parameters of each group in each part: reaction indices (_i), constant factors 
+	# (_A), activation temperatures (_B) and indices of named factors (_v)
+	f.write('# parameters of reactions grouped by the form of their rate coefficient expression\n')
+	for parti in range(len(part_name)):
+		for grp in ['cnst', 'arr', 'scl']:
+			sel = rate_p[rate_grp[grp]['i']] == parti
+			if sum(sel) == 0: # no reactions of this group in this part
+				continue
+			for par in rate_grp[grp]:
+				vals = rate_grp[grp][par][sel]
+				if par == 'v':
+					f.write('%s_%s_%s = numpy.array([%s], dtype=int).reshape(%i, %i)\n' %(
+						part_name[parti], grp, par, 
+						', '.join([str(val) for val in vals.flatten()]), vals.shape[0], 
+						vals.shape[1]))
+				elif par == 'i':
+					f.write('%s_%s_%s = numpy.array([%s], dtype=int)\n' %(part_name[parti], 
+						grp, par, ', '.join([str(val) for val in vals])))
+				else:
+					f.write('%s_%s_%s = numpy.array([%s])\n' %(part_name[parti], grp, par, 
+						', '.join([repr(float(val)) for val in vals])))
 
-	# following part is the function (there should be an indent at the start of each line)
-	# suggest using one tab
+	# reactions with rate coefficients proportional to the total RO2 concentration, i.e.
+	# those in the scaled group with RO2 as a factor once and no generic rate
+	# coefficients depending on RO2 or photolysis rates, so that ode_gen can recalculate
+	# them from the current RO2 pool inside the ode right-hand side
+	RO2_vi = len(rrc_name)+1+var_name.index('RO2') # index of RO2 in named values
+	dep_vi = [i+1 for i in range(len(rrc)) if rrc_dep[i] == 1]
+	ro2_lin_i = [rate_grp['scl']['i'][k] for k in range(len(rate_grp['scl']['i'])) if
+		sum(rate_grp['scl']['v'][k, :] == RO2_vi) == 1 and
+		len(set(rate_grp['scl']['v'][k, :]).intersection(dep_vi)) == 0]
+	f.write('ro2_lin_i = numpy.array([%s], dtype=int)\n' %(', '.join([str(i) for i in
+		ro2_lin_i])))
+	
+	# photolysis rates used, so that only these are calculated, with the rates of
+	# reactions in the scaled group indexing them through the vector of named values
+	f.write('# indices of photolysis rates used\n')
+	f.write('J_use = numpy.array([%s], dtype=int)\n' %(', '.join([str(i) for i in J_use])))
+	f.write('\n')
+
+	# following part is the functions (there should be an indent at the start of each 
+	# line), suggest using one tab
 	f.write('def evaluate_rates(RO2, H2O, TEMP, lightm, time, lat, lon, act_flux_path, DayOfYear, M, N2, O2, photo_par_file, Jlen):\n')
 	f.write('\n')
-	f.write('	# ------------------------------------------------------------------------')
+	f.write('	# ------------------------------------------------------------------------\n')
 	f.write('	# inputs:\n')
 	f.write('	# M - third body concentration (molecules/cc (air))\n')
 	f.write('	# N2 - nitrogen concentration (molecules/cc (air))\n')
@@ -384,30 +340,224 @@ def write_rate_file(reac_coef, rrc, rrc_name, testf):
 	f.write('	# RO2: specified by the chemical scheme. eg: subset of MCM\n')
 	f.write('	# H2O, TEMP: given by the user\n')
 	f.write('	# lightm: given by the user and is 0 for lights off and 1 for on\n')
-	f.write('	# reaction rate coefficients and their names parsed in eqn_parser.py \n')
-	f.write('	# Jlen - number of photolysis reactions')
-	f.write('\n')
-	f.write('	# calculate generic reaction rate coefficients given by chemical scheme\n')
-	# code to calculate rate coefficients given by chemical scheme file
-	for line in rrc:
-		f.write('	%s \n' %line)
-	f.write('\n')
-	f.write('	# estimate and append photolysis rates\n')
-	f.write('	J = PhotolysisRates.PhotolysisCalculation(time, lat, lon, TEMP, act_flux_path, DayOfYear, photo_par_file, Jlen)\n')
+	f.write('	# Jlen - number of photolysis reactions\n')
+	f.write('	# ------------------------------------------------------------------------\n')
 	f.write('\n')
+	f.write('	# estimate photolysis rates\n')
 	f.write('	if lightm == 0:\n')
-	f.write('		J = [0]*len(J)\n')
-
-	# calculate the rate coefficient for each equation
-	f.write('	rate_values = numpy.zeros(%i)\n' %(len(reac_coef)))
-	# BE NOTIFIED!!!: before writing the script, 'reac_coef' must be converted to 
-	# python-compatible format
-	f.write('	# reac_coef has been formatted so that python can recognize it\n')
-	for eqn_key in range (len(reac_coef)):
-		f.write('	rate_values[%s] = %s\n' %(eqn_key, reac_coef[eqn_key]))
+	f.write('		J = numpy.zeros(Jlen)\n')
+	f.write('	else:\n')
+	f.write('		J = PhotolysisRates.PhotolysisCalculation(time, lat, lon, TEMP, act_flux_path, DayOfYear, photo_par_file, Jlen, 0.0, J_use)\n')
+	f.write('\n')
+	f.write('	[rate_values, V] = evaluate_therm(TEMP, H2O, M, N2, O2)\n')
+	f.write('	[rate_values, V] = evaluate_photo(rate_values, V, J, TEMP, H2O, M, N2, O2)\n')
+	f.write('	[rate_values, V] = evaluate_ro2(rate_values, V, RO2, TEMP, H2O, M, N2, O2)\n')
 	f.write('	\n')
 	f.write('	return rate_values\n')
+	f.write('\n')
+	
+	# unpacking of generic rate coefficients from vector of named values
+	if len(rrc_name)>0:
+		rrc_unpack = str('	[%s] = V[1:%i]\n' %(', '.join(rrc_name), len(rrc_name)+1))
+	else:
+		rrc_unpack = ''
+	
+	cse_cnt = [0, 0, 0] # operations before and after elimination, common subexpressions
+	
+	for parti in range(len(part_name)):
+		
+		# expressions evaluated one at a time in this part: generic rate coefficients (in
+		# evaluate_therm for those independent of RO2 and photolysis rates, in 
+		# evaluate_ro2 otherwise) then reactions not grouped, with subexpressions 
+		# repeated amongst them evaluated once
+		rrc_i = [i for i in range(len(rrc)) if (part_name[parti] == 'therm' and 
+					rrc_dep[i] == 0) or (part_name[parti] == 'ro2' and rrc_dep[i] == 1)]
+		fall_now = [i for i in fall_i if rate_p[i] == parti]
+		[exprs, cse_pre, op_num0, op_num1] = rate_cse([rrc[i][rrc[i].index('=')+1::] for 
+					i in rrc_i] + [reac_coef[i] for i in fall_now], 'cse_')
+		cse_cnt[0] += op_num0
+		cse_cnt[1] += op_num1
+		cse_cnt[2] += sum([len(pre_list) for pre_list in cse_pre])
+		
+		# function to write an expression and any common subexpressions it needs
+		def write_expr(target, k):
+			for line in cse_pre[k]:
+				f.write('	%s\n' %line)
+			f.write('	%s = %s\n' %(target, exprs[k]))
+		
+		if part_name[parti] == 'therm':
+			f.write('def evaluate_therm(TEMP, H2O, M, N2, O2):\n')
+			f.write('\n')
+			f.write('	# rate coefficients (/s) depending only on temperature and the concentrations of\n')
+			f.write('	# M, N2 and O2, with the vector of named values (V) that rate coefficients are\n')
+			f.write('	# scaled by, starting with unity\n')
+			f.write('\n')
+			f.write('	# calculate generic reaction rate coefficients given by chemical scheme\n')
+			# code to calculate rate coefficients given by chemical scheme file, those
+			# depending on H2O, RO2 or photolysis rates are held at zero until 
+			# evaluate_ro2
+			for i in range(len(rrc)):
+				if rrc_dep[i] == 0:
+					write_expr(rrc_name[i], rrc_i.index(i))
+				else:
+					f.write('	%s = 0.0 \n' %rrc_name[i])
+			f.write('	V = numpy.array([1.0, %s])\n' %(', '.join(rrc_name+[vn if vn not in 
+				['H2O', 'RO2'] else '0.0' for vn in var_name])))
+			f.write('	rate_values = numpy.zeros(%i)\n' %(len(reac_coef)))
+		if part_name[parti] == 'photo':
+			f.write('def evaluate_photo(rate_values, V, J, TEMP, H2O, M, N2, O2):\n')
+			f.write('\n')
+			f.write('	# rate coefficients (/s) also depending on photolysis rates (J), with the\n')
+			f.write('	# photolysis rates used appended to the vector of named values (V) from\n')
+			f.write('	# evaluate_therm\n')
+			f.write('\n')
+			f.write('	V = numpy.append(V[0:%i], numpy.asarray(J)[J_use])\n' %(J0))
+			if sum(fall_p == parti)>0:
+				f.write(rrc_unpack)
+		if part_name[parti] == 'ro2':
+			f.write('def evaluate_ro2(rate_values, V, RO2, TEMP, H2O, M, N2, O2):\n')
+			f.write('\n')
+			f.write('	# rate coefficients (/s) also depending on the concentrations of H2O or total\n')
+			f.write('	# RO2, with these added to the vector of named values (V) from evaluate_photo\n')
+			f.write('\n')
+			f.write('	J = numpy.zeros(%i)\n' %(max(J_use+[0])+1))
+			f.write('	J[J_use] = V[%i::]\n' %(J0))
+			if sum(rrc_dep)>0 or sum(fall_p == parti)>0:
+				f.write(rrc_unpack)
+			for i in range(len(rrc)):
+				if rrc_dep[i] == 1:
+					write_expr(rrc_name[i], rrc_i.index(i))
+					f.write('	V[%i] = %s\n' %(i+1, rrc_name[i]))
+			f.write('	V[%i] = H2O\n' %(len(rrc_name)+1+var_name.index('H2O')))
+			f.write('	V[%i] = RO2\n' %(len(rrc_name)+1+var_name.index('RO2')))
+		
+		# calculate the rate coefficient for each equation in this part
+		# BE NOTIFIED!!!: before writing the script, 'reac_coef' must be converted to 
+		# python-compatible format
+		f.write('	# rate coefficients of reactions grouped by the form of their expression\n')
+		pre = part_name[parti]
+		if sum(rate_p[rate_grp['cnst']['i']] == parti)>0:
+			f.write('	rate_values[%s_cnst_i] = %s_cnst_A\n' %(pre, pre))
+		if sum(rate_p[rate_grp['arr']['i']] == parti)>0:
+			f.write('	rate_values[%s_arr_i] = %s_arr_A*numpy.exp(%s_arr_B/TEMP)\n' %(pre, 
+				pre, pre))
+		if sum(rate_p[rate_grp['scl']['i']] == parti)>0:
+			f.write('	rate_values[%s_scl_i] = %s_scl_A*numpy.exp(%s_scl_B/TEMP)*(V[%s_scl_v].prod(axis=1))\n' %(pre, pre, pre, pre))
+		f.write('	# rate coefficients of reactions with other expressions\n')
+		for k in range(len(fall_now)):
+			write_expr(str('rate_values[' + str(fall_now[k]) + ']'), len(rrc_i)+k)
+		f.write('	\n')
+		f.write('	return(rate_values, V)\n')
+		f.write('\n')
+	
+	# report the reduction in operations for expressions evaluated one at a time
+	print('%s: %i common subexpressions evaluated once, reducing operations in rate coefficient expressions from %i to %i' %(mod_name, cse_cnt[2], cse_cnt[0], cse_cnt[1]))
+	src = f.getvalue()
 	f.close()
+	
+	if (testf == 2): # test mode requires the module file in the working directory
+		with open('Rate_coeffs.py', mode='w') as fw:
+			fw.write(src)
+	
+	mod_path = '<' + mod_name + '>' # name shown in tracebacks
+	if cache_dir != '': # store module source
+		os.makedirs(cache_dir, exist_ok=True)
+		mod_path = os.path.join(cache_dir, str(mod_name + '.py'))
+		# write to a temporary file then rename, so that a simultaneous simulation never
+		# reads a partly written module
+		with open(str(mod_path + '.tmp' + str(os.getpid())), mode='w') as fw:
+			fw.write(src)
+		os.replace(str(mod_path + '.tmp' + str(os.getpid())), mod_path)
+	
+	rate_mod = rate_mod_comp(src, mod_name, mod_path)
+	
+	# outputs: ---------------------------------------------------------------------------
+	# rate_mod - module with evaluate_rates function for calculating rate coefficients
+	# ------------------------------------------------------------------------------------
+	
+	return(rate_mod)
+
+# function to compile the source of a generated rate coefficient module and execute it 
+# in a new module object, without importing from disk
+def rate_mod_comp(src, mod_name, mod_path):
+
+	# inputs: ----------------------------------------------------------------------------
+	# src - source of module
+	# mod_name - name of module
+	# mod_path - path of stored source, or name shown in tracebacks if not stored
+	# ------------------------------------------------------------------------------------
+	
+	rate_mod = types.ModuleType(mod_name)
+	rate_mod.__file__ = mod_path
+	exec(compile(src, mod_path, 'exec'), rate_mod.__dict__)
+	
+	return(rate_mod)
+
+# function to find the number of photolysis reactions
+def Jlen_calc(photo_par_file):
+
+	# inputs: ----------------------------------------------------------------------------
+	# photo_par_file - path to file containing photolysis information
+	# ------------------------------------------------------------------------------------
+	
+	cwd = os.getcwd() # address of current working directory
+	if photo_par_file == str(cwd + '/PyCHAM/photofiles/MCMv3.2'):
+		Jlen = 62 # for MCM (default name of photolysis parameters)
+	else: # need to find out number of photolysis reactions
+		# use Fortran indexing to be consistent with MCM photochemical reaction numbers
+		Jlen = 1 
+		# open file to read
+		f = open(str(photo_par_file), 'r')
+		for line in f: # loop through line
+			if line.strip() == str('J_'+str(Jlen) + '_axs'):
+				Jlen += 1
+		f.close()
+	
+	return(Jlen)
+
+# function to load a mechanism stored by extract_mechanism, in place of parsing the 
+# chemical scheme and xml files, giving the same outputs as extract_mechanism; Pybel 
+# objects can't be stored so are made again from the SMILES strings
+def mech_load(cache_dir, Jlen):
+
+	# inputs: ----------------------------------------------------------------------------
+	# cache_dir - folder holding the stored mechanism and rate coefficient modules
+	# Jlen - number of photolysis reactions
+	# ------------------------------------------------------------------------------------
+	
+	print('Now loading the equation information from ' + cache_dir + ' ... \n')
+	
+	with open(os.path.join(cache_dir, 'mech.pkl'), mode='rb') as pk:
+		mech = pickle.load(pk)
+	
+	Pybel_objects = [pybel.readstring('smi', name_SMILE) for name_SMILE in 
+					mech['spec_list']]
+	
+	# modules for calculating gas- and aqueous-phase reaction rate coefficients
+	[rate_mod, rate_mod_aq] = [None, None]
+	for mod_name in ['Rate_coeffs', 'Rate_coeffs_aq']:
+		mod_path = os.path.join(cache_dir, str(mod_name + '.py'))
+		with open(mod_path, mode='r') as fr:
+			src = fr.read()
+		if mod_name == 'Rate_coeffs':
+			rate_mod = rate_mod_comp(src, mod_name, mod_path)
+		else:
+			rate_mod_aq = rate_mod_comp(src, mod_name, mod_path)
+	
+	# print the brief info for the simulation to the screen
+	print('Briefing:')
+	print('Total number of gas-phase equations: %i' %(mech['num_eqn'][0]))
+	print('Total number of aqueous-phase equations: %i' %(mech['num_eqn'][1]))
+	print('Total number of components found in chemical scheme file: %i\n' %(
+			mech['comp_num']))
+	
+	return(mech['rindx'], mech['pindx'], mech['rstoi'], mech['pstoi'], mech['reac_coef'], 
+			mech['spec_list'], Pybel_objects, mech['num_eqn'], mech['comp_num'], 
+			mech['RO2_indices'], mech['nreac'], mech['nprod'], mech['prodn'], 
+			mech['reacn'], mech['spec_namelist'], Jlen, mech['rindx_aq'], 
+			mech['pindx_aq'], mech['rstoi_aq'], mech['pstoi_aq'], mech['reac_coef_aq'], 
+			mech['nreac_aq'], mech['nprod_aq'], mech['prodn_aq'], mech['reacn_aq'], 
+			rate_mod, rate_mod_aq, mech['spec_reg'])
 
 # function to automatically generate a module that is used to record the tendency
 # of components (components specified by the user, their index given by rec_comp_index) 
@@ -477,7 +627,7 @@ def write_dydt_rec():
 # this function is used when certain reaction rate coefficients are a function a RO2
 # and is called on by the extract_mechanism function above,
 # whilst the resulting RO2 index is used inside rate_valu_calc.py
-def write_RO2_indices(smiles_array, RO2_names):
+def write_RO2_indices(spec_reg, RO2_names):
     
     # store the names of RO2 species which are present in the equation file
     # get a list of INDICES of RO2 that present in the equation file 
@@ -486,14 +636,19 @@ def write_RO2_indices(smiles_array, RO2_names):
     RO2_indices0 = []
     RO2_indices = []
     
+    # index of the first occurrence of each name in the RO2 list
+    RO2_reg = {}
+    for i in range(len(RO2_names)):
+        RO2_reg.setdefault(RO2_names[i], i)
+    
     for name in RO2_names:
         
-        if name in smiles_array:
+        if name in spec_reg['indx']:
             # get the RO2 index
-            index0 = RO2_names.index(name)
+            index0 = RO2_reg[name]
             RO2_indices0.append(index0)
-            # get the smiles_array index for this RO2 species
-            index1 = smiles_array.index(name)
+            # get the component index for this RO2 species
+            index1 = spec_reg['indx'][name]
             RO2_indices.append(index1)
     
     # Ensure elements in RO2_indices are int (iterable)
@@ -0,0 +1,181 @@
+'''module to tokenize the lines of a chemical scheme file'''
+# called by eqn_parser, this module classifies each line of the chemical scheme file as
+# a generic reaction rate coefficient, part of the peroxy radical (RO2) list, a
+# gas-phase equation or an aqueous-phase equation using the chem_scheme_markers, and
+# splits equation lines into their reaction rate coefficient expression, reactants and
+# products (with stoichiometries), in a single pass; the patterns for splitting
+# equation lines are compiled once from the markers, rather than for every line, and
+# the markers that just need to be present in (or at the start or end of) a line are
+# checked with string methods
+
+import re
+import sys
+import formatting
+
+# stoichiometric number (group 1, empty if none given) and name (group 2) of a
+# component in an equation
+stoich_regex = re.compile(r'(\d*\.\d*|\d*)(.*)', re.S)
+
+def eqn_token(total_list_eqn, chem_scheme_markers):
+
+	# inputs: ----------------------------------------------------------------------------
+	# total_list_eqn - lines of the chemical scheme file
+	# chem_scheme_markers - markers for different sections of the chemical scheme
+	# ------------------------------------------------------------------------------------
+
+	mark = chem_scheme_markers
+
+	# patterns for splitting equation lines, depending on whether the reaction rate
+	# coefficient section comes before (rate_first) or after (eqn_first) the equation
+	# section, with the rate coefficient and equation sections as groups
+	rate_first = re.compile(str(re.escape(mark[9]) + '(.*)' + re.escape(mark[10]) +
+					'(.*)' + re.escape(mark[11])))
+	eqn_first = re.compile(str(re.escape(mark[10]) + '(.*)' + re.escape(mark[9]) +
+					'(.*)' + re.escape(mark[11])))
+
+	rrc = [] # generic reaction rate coefficients (name = expression)
+	rrc_name = [] # names of generic reaction rate coefficients
+	RO2_names = [] # names of peroxy radicals
+	eqn_list = [] # gas-phase equations
+	eqn_list_aq = [] # aqueous-phase equations
+
+	pr_flag = 0 # don't collate peroxy radicals until seen
+
+	for line in total_list_eqn:
+
+		line1 = line.strip() # remove bounding white space
+
+		# --------------------------------------------------------------------------------
+		# generic reaction rate coefficients part, which could be a line with just one =
+		if line1.count('=') == 1:
+			[lhs, rhs] = [(part.strip()) for part in line1.split('=')]
+			# don't record if nothing preceding '=' (can occur in KPP files, e.g.
+			# =IGNORE), if just an IGNORE command, or if the marker (if one present) for
+			# the end of generic reaction rate coefficient lines is not present
+			if (len(lhs) > 0 and rhs[0:6] != 'IGNORE' and line1.endswith(mark[7]) and
+				# don't consider if start of peroxy radical list or a gas- or
+				# aqueous-phase chemical scheme reaction
+				lhs != mark[1] and lhs[0] != mark[0] and lhs[0] != mark[8]):
+
+				# remove end characters and all white space
+				line2 = line1.replace(mark[7], '').replace(' ', '')
+				# convert fortran-type scientific notation to python type
+				line2 = formatting.SN_conversion(line2)
+				# ensure rate coefficient is python readable
+				line2 = formatting.convert_rate_mcm(line2)
+				rrc.append(line2.strip())
+				# get just name of generic reaction rate coefficient
+				rrc_name.append((line2.split('=')[0]).strip())
+
+		# --------------------------------------------------------------------------------
+		# peroxy radical part, with recording needed if the starting marker for the list
+		# is seen together with the marker for the end of the list (when the list
+		# comprises one line) or the marker for the list continuing onto the next line
+		if mark[1] in line1:
+			if len(mark[5].strip()) > 0 and mark[5] in line1:
+				pr_flag = 1
+			if mark[6] in line1:
+				pr_flag = 1
+
+		if pr_flag == 1:
+
+			# loop through elements in line separated by peroxy radical separator
+			for line3 in line1.split(mark[2]):
+				if len(line3.split('='))>1: # in case of RO2 = ...
+					line3 = (line3.split('='))[1]
+				if len(line3.split(';'))>1: # in case of RO2 list finishing with ...;
+					line3 = (line3.split(';'))[0]
+				if len(line3.split('&'))>1: # in case of RO2 list finishing with &
+					line3 = (line3.split('&'))[0]
+
+				line3 = line3.strip() # remove any white space
+				# don't include white space or ampersands
+				if (line3 == '' or line3 == '&'):
+					continue
+
+				# strip surrounding marks
+				if line3[0:len(mark[3])] == mark[3]:
+					line3 = line3[len(mark[3])::]
+				if line3[-len(mark[4])::] == mark[4]:
+					line3 = line3[0:-len(mark[4])]
+
+				RO2_names.append(line3)
+
+			# check for end of RO2 list - given either by marker for end or absence of
+			# marker for continuation onto next line of RO2
+			if len(mark[5].strip()) > 0:
+				if mark[5] in line1:
+					pr_flag = 0
+			elif mark[6] not in line1:
+				pr_flag = 0
+
+		# --------------------------------------------------------------------------------
+		# gas- and aqueous-phase reaction equation parts, which start with the marker for
+		# their phase and contain the markers for the start of the reaction rate
+		# coefficient and the end of the equation line
+		if mark[9] not in line1 or mark[11] not in line1:
+			continue
+		if line1.startswith(mark[0]):
+			eqn_list.append(eqn_split(line1, mark, rate_first, eqn_first))
+		if mark[8] != '' and line1.startswith(mark[8]):
+			eqn_list_aq.append(eqn_split(line1, mark, rate_first, eqn_first))
+
+	# outputs: ---------------------------------------------------------------------------
+	# rrc - expressions for generic reaction rate coefficients (name = expression)
+	# rrc_name - names of generic reaction rate coefficients
+	# RO2_names - names of components in the peroxy radical list
+	# eqn_list - gas-phase equations, each given by its reaction rate coefficient
+	#			expression (as in the chemical scheme), stoichiometries and names of
+	#			reactants and stoichiometries and names of products
+	# eqn_list_aq - aqueous-phase equations, given as for the gas-phase
+	# ------------------------------------------------------------------------------------
+
+	return(rrc, rrc_name, RO2_names, eqn_list, eqn_list_aq)
+
+# function to split an equation line into its reaction rate coefficient expression,
+# reactants and products
+def eqn_split(line1, mark, rate_first, eqn_first):
+
+	# inputs: ----------------------------------------------------------------------------
+	# line1 - equation line
+	# mark - markers for different sections of the chemical scheme
+	# rate_first - pattern for lines with the rate coefficient section first
+	# eqn_first - pattern for lines with the equation section first
+	# ------------------------------------------------------------------------------------
+
+	# work out whether equation or reaction rate coefficient section comes first from the
+	# last occurrence of their starting markers
+	if line1.rfind(mark[10])+len(mark[10]) > line1.rfind(mark[9])+len(mark[9]):
+		sec = rate_first.search(line1)
+		if sec is not None:
+			[rate_ex, eqn] = [sec.group(1), sec.group(2)]
+	else:
+		sec = eqn_first.search(line1)
+		if sec is not None:
+			[eqn, rate_ex] = [sec.group(1), sec.group(2)]
+	if sec is None:
+		sys.exit(str('Error: inside eqn_parser, equation line ' + line1 + ' could not be split into equation and reaction rate coefficient sections using chem_scheme_markers'))
+
+	eqn_parts = eqn.split()
+	eqmark_pos = eqn_parts.index('=')
+
+	# reactants, ruling out the photon, and products with their stoichiometries (1 if
+	# none given)
+	reac_stoi = []
+	reac_name = []
+	for reactant in eqn_parts[:eqmark_pos]:
+		if reactant == '+' or reactant == 'hv':
+			continue
+		comp = stoich_regex.match(reactant)
+		reac_stoi.append(float(comp.group(1)) if comp.group(1) != '' else 1.0)
+		reac_name.append(comp.group(2))
+	prod_stoi = []
+	prod_name = []
+	for product in eqn_parts[eqmark_pos+1:]:
+		if product == '+':
+			continue
+		comp = stoich_regex.match(product)
+		prod_stoi.append(float(comp.group(1)) if comp.group(1) != '' else 1.0)
+		prod_name.append(comp.group(2))
+
+	return(rate_ex.strip(), reac_stoi, reac_name, prod_stoi, prod_name)
@@ -0,0 +1,78 @@
+'''module to schedule changes to boundary conditions during a simulation'''
+# the times of light setting changes, temperature changes, instantaneous injections of
+# gas-phase components and seed particles, and changes to constant influxes are merged
+# into one priority queue (heap) before integration starts; ode_gen then applies every
+# event due at the start of an integration interval and limits the interval so that it
+# ends at the next event, to add a new time-dependent forcing append its times here and
+# handle its name in ode_gen
+
+import numpy as np
+import heapq
+
+# order in which events occurring at the same time are applied
+event_order = ['light', 'temp', 'gasinj', 'seed', 'influx']
+
+def event_sched(light_time, TEMP, tempt, injectt, pconct, const_infl_t):
+
+	# inputs: ----------------------------------------------------------------------------
+	# light_time - times (s) of light setting changes
+	# TEMP - chamber temperatures (K)
+	# tempt - times (s) at which chamber temperatures given in TEMP reached
+	# injectt - times (s) of instantaneous injections of gas-phase components
+	# pconct - times (s) of instantaneous injections of seed particles
+	# const_infl_t - times (s) of changes to constant influx of components
+	# ------------------------------------------------------------------------------------
+
+	events = [] # empty heap
+
+	# times of each event type, an empty list means no events of this type
+	ev_times = [[], [], [], [], []]
+	ev_times[0] = light_time
+	if len(TEMP)>1: # because a temperature must be given for experiment start
+		ev_times[1] = tempt
+	ev_times[2] = injectt
+	if (sum(pconct[0, :])>0): # if seed particles injected after experiment start
+		ev_times[3] = pconct[0, :]
+	ev_times[4] = const_infl_t
+
+	for evi in range(len(event_order)): # event type loop
+		for ti in range(len(ev_times[evi])): # time loop
+			# each event holds its time (s), type and index in the input arrays
+			heapq.heappush(events, (float(ev_times[evi][ti]), evi, ti))
+
+	# outputs: ---------------------------------------------------------------------------
+	# events - heap of events ordered by time (s) and event_order
+	# ------------------------------------------------------------------------------------
+
+	return(events)
+
+def event_due(events, sumt):
+
+	# inputs: ----------------------------------------------------------------------------
+	# events - heap of events from event_sched
+	# sumt - time through simulation (s)
+	# ------------------------------------------------------------------------------------
+
+	due = [] # events due
+
+	while len(events)>0 and events[0][0]<=sumt:
+		[_, evi, ti] = heapq.heappop(events)
+		due.append([event_order[evi], ti])
+
+	# outputs: ---------------------------------------------------------------------------
+	# due - names of events due and their indices in the input arrays, in order of
+	#	application
+	# ------------------------------------------------------------------------------------
+
+	return(due)
+
+def event_next(events):
+
+	# inputs: ----------------------------------------------------------------------------
+	# events - heap of events from event_sched
+	# ------------------------------------------------------------------------------------
+
+	if len(events)>0:
+		return(events[0][0]) # time of next event (s)
+	else:
+		return(np.inf) # no more events
@@ -39,7 +39,8 @@ def run(testf):
 	const_comp, const_infl, Cinfl, act_comp, act_user, seed_mw, 
 	umansysprop_update, core_dens, p_char, e_field, const_infl_t, 
 	chem_scheme_markers, int_tol, photo_par_file, dil_fac, pconct, accom_coeff_ind, 
-	accom_coeff_user, update_step, tempt, coag_on] = ui.run(0, testf)
+	accom_coeff_user, update_step, tempt, coag_on, linear_solver, mech_cache, rate_tol, 
+	photo_tab_step, rate_interp, prop_proc] = ui.run(0, testf)
 	
 	if testm == 1:
 		print('PyCHAM calls front fine, now returning to PyCHAM.py')
@@ -55,10 +56,10 @@ def run(testf):
 		RO2_indices, nreac, nprod, prodn, 
 		reacn, spec_namelist, Jlen, rindx_aq, pindx_aq, rstoi_aq, 
 		pstoi_aq, reac_coef_aq, nreac_aq, nprod_aq, prodn_aq, 
-		reacn_aq] = eqn_parser.extract_mechanism(fname, xmlname, 
+		reacn_aq, rate_mod, rate_mod_aq, spec_reg] = eqn_parser.extract_mechanism(fname, xmlname, 
 		PInit, testf, RH, start_sim_time, lat, 
 		lon, act_flux_path, DayOfYear, chem_scheme_markers, 
-		photo_par_file)
+		photo_par_file, mech_cache)
 
 	if testf==1:
 		print('eqn_parser.extract_mechanism called and returned fine')
@@ -74,7 +75,7 @@ def run(testf):
 							PInit, start_sim_time, lat, lon, Pybel_objects, testf, pconc,
 							act_flux_path, dydt_trak, end_sim_time, save_step, rindx, 
 							pindx, num_eqn, nreac, nprod, DayOfYear, 
-							spec_namelist, Compt, seed_name, const_comp, const_infl, 
+							spec_namelist, spec_reg, Compt, seed_name, const_comp, const_infl, 
 							seed_mw, core_diss, nuc_comp)
 
 	if testf==1:
@@ -85,7 +86,7 @@ def run(testf):
 											TEMP[0], 
 											num_speci, testf, Cw, act_comp, act_user, 
 											accom_coeff_ind, accom_coeff_user, 
-											spec_namelist, num_sb)
+											spec_reg, num_sb)
 
 	# volatility (molecules/cc (air)) and density (rho, kg/m3) of components
 	if testf==1:
@@ -95,8 +96,8 @@ def run(testf):
 	[Psat, y_dens, Psat_Pa] = volat_calc(spec_list, Pybel_objects, TEMP[0], H2Oi, 
 								num_speci,  
 								Psat_water, vol_Comp, volP, testf, corei, pconc,
-								umansysprop_update, core_dens, spec_namelist, 0, nuci,
-								nuc_comp)
+								umansysprop_update, core_dens, spec_reg, 0, nuci,
+								nuc_comp, prop_proc)
 
 	if testf==1:
 		print('volat_calc called and returned fine')
@@ -114,13 +115,13 @@ def run(testf):
 		pconc_now = np.zeros((1))
 
 	[y, N_perbin, x, Varr, Vbou, rad0, Vol0, rbou, 
-							MV, num_sb, nuc_comp, rbou00, upper_bin_rad_amp] = pp_intro(y, 
+							MV, num_sb, nuc_compi, rbou00, upper_bin_rad_amp] = pp_intro(y, 
 							num_speci, Pybel_objects, TEMP[0], H2Oi, 
 							mfp, accom_coeff, y_mw, surfT, DStar_org, 
 							RH, num_sb, lowersize, uppersize, pconc_now, nuc_comp, 
 							testf, std[0, 0], mean_rad[0, 0], 
 							therm_sp, Cw, y_dens, Psat, core_diss, kgwt, space_mode, 
-							corei, spec_namelist, act_coeff)
+							corei, spec_reg, act_coeff)
 	
 	t1 = time.clock() # get wall clock time before call to solver
 	if testf==1:
@@ -139,14 +140,15 @@ def run(testf):
 				rbou, therm_sp, Cw, light_time, light_stat,
 				nreac, nprod, prodn,
 				reacn, new_partr, MV, nucv1, nucv2, nucv3, inflectDp, pwl_xpre, 
-				pwl_xpro, inflectk, nuc_comp, ChamR, Rader, PInit, testf, kgwt, dydt_vst,
+				pwl_xpro, inflectk, nuc_compi, ChamR, Rader, PInit, testf, kgwt, dydt_vst,
 				start_sim_time, lat, lon, act_flux_path, DayOfYear, Ct, injectt, inj_indx,
 				corei, const_compi, const_comp, const_infli, Cinfl, act_coeff, p_char, 
 				e_field, const_infl_t, int_tol, photo_par_file, Jlen, dil_fac, pconct,
 				lowersize, uppersize, mean_rad, std, update_step, Pybel_objects, tempt,
 				Cfactor, coag_on, rindx_aq, pindx_aq, rstoi_aq, 
 				pstoi_aq, nreac_aq, nprod_aq, prodn_aq, 
-				reacn_aq)
+				reacn_aq, linear_solver, rate_mod, rate_mod_aq, rate_tol, 
+				photo_tab_step, rate_interp, nuci, nuc_comp)
 				
 	
 	t2 = time.clock() # get wall clock time after call to solver
@@ -10,7 +10,7 @@ def init_conc_func(num_speci, Comp0, init_conc, TEMP, RH,
 					reac_coef, filename, PInit, time, lat, lon, Pybel_objects,
 					testf, pconc, act_flux_path, dydt_trak, end_sim_time, save_step, 
 					rindx, pindx, num_eqn, nreac, nprod, DayOfYear, 
-					spec_namelist, Compt, seed_name, const_comp, const_infl, seed_mw,
+					spec_namelist, spec_reg, Compt, seed_name, const_comp, const_infl, seed_mw,
 					core_diss, nuc_comp):
 		
 	# -----------------------------------------------------------
@@ -33,6 +33,8 @@ def init_conc_func(num_speci, Comp0, init_conc, TEMP, RH,
 	# num_eqn - number of equations
 	# DayOfYear - day of year for natural light calculation (integer 1-365)
 	# spec_namelist - list of components' names in chemical equation file
+	# spec_reg - registry of components, with indices of components by their names in 
+	#			indx, updated here for water and core
 	# Compt - name of component injected after start of experiment
 	# seed_name - name of core component (input by user)
 	# const_comp - names of components with constant gas-phase concentration
@@ -66,7 +68,7 @@ def init_conc_func(num_speci, Comp0, init_conc, TEMP, RH,
 	# insert initial concentrations where appropriate
 	for i in range (len(Comp0)):
     	# index of where initial species occurs in list of components
-		y_indx = spec_namelist.index(Comp0[i])
+		y_indx = spec_reg['indx'][Comp0[i]]
 		y[y_indx] = init_conc[i]*Cfactor # convert from ppb to molecules/cc (air)
 		# remember index for plotting gas-phase concentrations later
 		y_indx_plot.append(y_indx)
@@ -76,7 +78,7 @@ def init_conc_func(num_speci, Comp0, init_conc, TEMP, RH,
 	const_compi = []
 	for i in range (len(const_comp)):
 		# index of where constant components occur in list of components
-		y_indx = spec_namelist.index(const_comp[i])
+		y_indx = spec_reg['indx'][const_comp[i]]
 		const_compi.append(y_indx) # remember their index
 	
 	# empty array for storing index of components with constant influx
@@ -86,7 +88,7 @@ def init_conc_func(num_speci, Comp0, init_conc, TEMP, RH,
 
 	for i in range (num_const_infl):
 		# index of where constant components occur in list of components
-		y_indx = spec_namelist.index(const_infl[i])
+		y_indx = spec_reg['indx'][const_infl[i]]
 		const_infli[i] = y_indx # remember their index
 		
 
@@ -101,7 +103,7 @@ def init_conc_func(num_speci, Comp0, init_conc, TEMP, RH,
 		for i in range (len(dydt_trak)):
 			reac_index = [] # indices of reactions involving this species
 			# index of where initial species occurs in SMILE string
-			y_indx = spec_namelist.index(dydt_trak[i])
+			y_indx = spec_reg['indx'][dydt_trak[i]]
 
 			# remember index for plotting gas-phase concentrations later
 			dydt_traki.append(int(y_indx))
@@ -143,6 +145,7 @@ def init_conc_func(num_speci, Comp0, init_conc, TEMP, RH,
 	y = np.append(y, C_H2O)
 	y_mw = (np.append(y_mw, H2O_mw)).reshape(-1, 1)
 	spec_namelist.append('H2O') # append water's name to component name list
+	spec_reg['indx'].setdefault('H2O', H2Oi)
 
 	# ------------------------------------------------------------------------------------
 	# account for seed properties - note that even if no seed particle, this code ensures
@@ -158,6 +161,7 @@ def init_conc_func(num_speci, Comp0, init_conc, TEMP, RH,
 		corei = num_speci # index of core component
 		num_speci += 1 # update number of species to account for core material
 		spec_namelist.append('core') # append core's name to component name list
+		spec_reg['indx'].setdefault('core', corei)
 	# if nucleating component formed of core component
 	if nuc_comp[0] == 'core':
 		if sum(sum(pconc))>0.0 and seed_name == 'core':
@@ -168,6 +172,7 @@ def init_conc_func(num_speci, Comp0, init_conc, TEMP, RH,
 			nuci = num_speci # index of core component
 			num_speci += 1 # update number of species to account for core material
 			spec_namelist.append('core') # append core's name to component name list
+			spec_reg['indx'].setdefault('core', nuci)
 	else:
 		nuci = -1 # filler
 		
@@ -175,7 +180,7 @@ def init_conc_func(num_speci, Comp0, init_conc, TEMP, RH,
 	if seed_name != 'core':
 		# append core gas-phase concentration (molecules/cc (air)) and molecular weight 
 		# (g/mol) (needs to have a 1 length in second dimension for the kimt calculations)
-		corei = spec_namelist.index(seed_name) # index of core component
+		corei = spec_reg['indx'][seed_name] # index of core component
 	if sum(sum(pconc)) == 0.0: # no seed particle case
 		corei = -1 # filler
 		core_diss = 1.0 # ensure no artefact in Raoult term due to this filler
@@ -185,7 +190,7 @@ def init_conc_func(num_speci, Comp0, init_conc, TEMP, RH,
 		inj_indx = np.zeros((len(Compt)))
 		for i in range(len(Compt)):
 			# index of where initial species occurs in SMILE string
-			inj_indx[i] = spec_namelist.index(Compt[i])
+			inj_indx[i] = spec_reg['indx'][Compt[i]]
 	else:
 		inj_indx = np.zeros((1)) # dummy
 	# ensure inj_indx is integer type
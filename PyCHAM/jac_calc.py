@@ -0,0 +1,256 @@
+'''module to calculate the Jacobian of the ode system for the ode solver'''
+# the analytical Jacobian of the right-hand side given in dydt_calc, covering gas-phase
+# reactions, gas-particle partitioning and gas-wall partitioning; jac_prep is called
+# once by ode_gen to set the sparsity pattern (compressed sparse column (CSC) format),
+# whilst jac_calc is compiled by numba and called by the ode solver to fill the values
+# of that pattern
+
+import numpy as np
+from scipy import sparse
+from numba import jit
+
+def jac_prep(num_speci, num_sb, rord_ptr, rord_ind, nstoi_ptr, nstoi_ind, nstoi_val,
+			num_eqn, const_compi, rord_ptr_aq, rord_ind_aq, nstoi_ptr_aq, nstoi_ind_aq, 
+			nstoi_val_aq):
+
+	# inputs: ----------------------------------------------------------------------------
+	# num_speci - number of components
+	# num_sb - number of size bins (including wall)
+	# rord_ptr, rord_ind - CSR row pointers and component indices of the gas-phase
+	#	reactant order matrix (equations in rows), from stoich_mat
+	# nstoi_ptr, nstoi_ind, nstoi_val - CSR row pointers, equation indices and values of
+	#	the gas-phase net stoichiometry matrix (components in rows), from stoich_mat
+	# num_eqn - number of gas-phase equations
+	# const_compi - indices of components with constant gas-phase concentration
+	# rord_ptr_aq, rord_ind_aq - CSR row pointers and component indices of the 
+	#	particle-phase reactant order matrix, from stoich_mat
+	# nstoi_ptr_aq, nstoi_ind_aq, nstoi_val_aq - CSR format of the particle-phase net 
+	#	stoichiometry matrix, from stoich_mat
+	# ------------------------------------------------------------------------------------
+
+	n = num_speci*(num_sb+1) # number of elements in y
+
+	# net stoichiometry by equation (i.e. in CSC format), so that the components
+	# affected by each equation can be looped through in jac_calc
+	nstoi = sparse.csr_matrix((nstoi_val, nstoi_ind, nstoi_ptr),
+		shape=(num_speci, num_eqn)).tocsc()
+	nsc_ptr = nstoi.indptr.astype(int)
+	nsc_ind = nstoi.indices.astype(int)
+	nsc_val = nstoi.data.astype(float)
+	# same for the particle-phase net stoichiometry
+	nstoi_aq = sparse.csr_matrix((nstoi_val_aq, nstoi_ind_aq, nstoi_ptr_aq),
+		shape=(num_speci, len(rord_ptr_aq)-1)).tocsc()
+	nsc_ptr_aq = nstoi_aq.indptr.astype(int)
+	nsc_ind_aq = nstoi_aq.indices.astype(int)
+	nsc_val_aq = nstoi_aq.data.astype(float)
+
+	# rows and columns of Jacobian elements in the order they are filled in jac_calc
+	# (duplicates are allowed and summed)
+	jrow = []
+	jcol = []
+
+	# gas-phase reactions: each component affected by an equation depends on every
+	# reactant of that equation
+	for i in range(num_eqn):
+		reac = rord_ind[rord_ptr[i]:rord_ptr[i+1]]
+		comp = nsc_ind[nsc_ptr[i]:nsc_ptr[i+1]]
+		jrow.append(np.tile(comp, len(reac)))
+		jcol.append(np.repeat(reac, len(comp)))
+
+	# particle-phase reactions: as for the gas phase, but within each size bin (excluding
+	# wall)
+	for ibin in range(num_sb-1):
+		for i in range(len(rord_ptr_aq)-1):
+			reac = rord_ind_aq[rord_ptr_aq[i]:rord_ptr_aq[i+1]]+num_speci*(ibin+1)
+			comp = nsc_ind_aq[nsc_ptr_aq[i]:nsc_ptr_aq[i+1]]+num_speci*(ibin+1)
+			jrow.append(np.tile(comp, len(reac)))
+			jcol.append(np.repeat(reac, len(comp)))
+
+	# gas-particle partitioning (size bins excluding wall) and gas-wall partitioning,
+	# each component couples its gas-phase and condensed-phase concentrations
+	gi = np.arange(num_speci)
+	for ibin in range(num_sb):
+		ci = gi+num_speci*(ibin+1) # condensed-phase indices
+		jrow.append(np.concatenate((gi, gi, ci, ci)))
+		jcol.append(np.concatenate((gi, ci, gi, ci)))
+
+	jrow = np.concatenate(jrow).astype(int)
+	jcol = np.concatenate(jcol).astype(int)
+
+	# unique elements sorted by column then row (i.e. CSC order) and the position
+	# of every filled element in the CSC data array
+	[jkey, jmap] = np.unique(jcol*n+jrow, return_inverse=True)
+	jac_ind = (jkey % n).astype(int) # row indices
+	jac_ptr = np.searchsorted(jkey//n, np.arange(n+1)).astype(int) # column pointers
+
+	# positions of elements in rows of components with constant gas-phase
+	# concentration, as their rate of change is fixed at zero
+	jac_cpos = np.where(np.isin(jac_ind, const_compi))[0].astype(int)
+
+	# positions in the CSC data array of elements inside the diagonal blocks of the
+	# phases (gas, each size bin and wall), along with the column pointers of this
+	# block-diagonal part, used for the preconditioner of the iterative linear solver
+	jac_colm = np.repeat(np.arange(n), np.diff(jac_ptr)) # column indices
+	jac_blk = np.where((jac_ind//num_speci) == (jac_colm//num_speci))[0].astype(int)
+	blk_ptr = np.searchsorted(jac_blk, jac_ptr).astype(int)
+
+	# outputs: ---------------------------------------------------------------------------
+	# jac_ptr, jac_ind - CSC column pointers and row indices of the Jacobian
+	# jmap - position in the CSC data array of each element filled by jac_calc
+	# jac_cpos - positions in the CSC data array of rows with constant concentration
+	# jac_blk - positions in the CSC data array of elements in the phase diagonal blocks
+	# blk_ptr - CSC column pointers of the phase diagonal blocks
+	# nsc_ptr, nsc_ind, nsc_val - CSC format of the net stoichiometry matrix
+	# nsc_ptr_aq, nsc_ind_aq, nsc_val_aq - CSC format of the particle-phase net 
+	#	stoichiometry matrix
+	# ------------------------------------------------------------------------------------
+
+	return(jac_ptr, jac_ind, jmap.astype(int), jac_cpos, jac_blk, blk_ptr, nsc_ptr, nsc_ind, 
+		nsc_val, nsc_ptr_aq, nsc_ind_aq, nsc_val_aq)
+
+# numba compiler to convert to machine code, cache=True stores the compiled version in
+# __pycache__ for use by later simulations
+@jit(nopython=True, cache=True)
+def jac_calc(t, y, num_eqn, rord_ptr, rord_ind, rord_val, nsc_ptr, nsc_ind, nsc_val,
+			reac_coef, num_sb, num_speci, corei, core_diss, Psat, kelv_fac, act_coeff,
+			kimt, kgwt, Cw, jmap, jac_cpos, nnz, num_eqn_aq, rord_ptr_aq, rord_ind_aq, 
+			rord_val_aq, nsc_ptr_aq, nsc_ind_aq, nsc_val_aq, reac_coef_aq, ro2_i, ro2_k, 
+			RO2_y):
+
+	# inputs: ----------------------------------------------------------------------------
+	# t - time through integration interval (s)
+	# y - concentrations of components in all phases (molecules/cc (air))
+	# num_eqn - number of gas-phase equations
+	# rord_ptr, rord_ind, rord_val - CSR format of the gas-phase reactant order matrix
+	# nsc_ptr, nsc_ind, nsc_val - CSC format of the gas-phase net stoichiometry matrix
+	# reac_coef - gas-phase reaction rate coefficients (/s)
+	# num_sb - number of size bins (including wall)
+	# num_speci - number of components
+	# corei - index of core component
+	# core_diss - dissociation constant of core component
+	# Psat - saturation vapour pressures of components (molecules/cc (air))
+	# kelv_fac - Kelvin factor per size bin
+	# act_coeff - activity coefficients of components
+	# kimt - partitioning coefficients of components (rows) to size bins (columns) (/s)
+	# kgwt - mass transfer coefficient for vapour-wall partitioning (/s)
+	# Cw - effective absorptive concentration of wall (molecules/cc (air))
+	# jmap - position in CSC data array of each element filled here, from jac_prep
+	# jac_cpos - positions in CSC data array of constant concentration rows
+	# nnz - number of non-zero elements in the Jacobian
+	# num_eqn_aq - number of particle-phase equations
+	# rord_ptr_aq, rord_ind_aq, rord_val_aq - CSR format of the particle-phase reactant 
+	#	order matrix
+	# nsc_ptr_aq, nsc_ind_aq, nsc_val_aq - CSC format of the particle-phase net 
+	#	stoichiometry matrix
+	# reac_coef_aq - particle-phase reaction rate coefficients (/s)
+	# ro2_i - indices of gas-phase reactions with rate coefficients proportional to the 
+	#	total RO2 concentration (integer)
+	# ro2_k - rate coefficients of these reactions per unit RO2 concentration
+	#	(/s/(molecules/cc (air)))
+	# RO2_y - indices of components in the RO2 pool (integer)
+	# ------------------------------------------------------------------------------------
+
+	jac_val = np.zeros((nnz)) # Jacobian values in CSC order (/s)
+	fi = 0 # count on filled elements
+	
+	# rate coefficients proportional to the total RO2 concentration, from the current
+	# RO2 pool (molecules/cc (air)), note that the dependence of these rate 
+	# coefficients on the concentrations of RO2 components is not included in the 
+	# Jacobian, as it would fill the columns of all RO2 components, and the ode solver
+	# only needs an approximate Jacobian for its Newton iteration
+	if len(ro2_i)>0:
+		RO2 = 0.0
+		for i in range(len(RO2_y)):
+			RO2 += y[RO2_y[i]]
+		reac_coef = reac_coef.copy()
+		for i in range(len(ro2_i)):
+			reac_coef[ro2_i[i]] = ro2_k[i]*RO2
+
+	# gas-phase reactions --------------------------------------------------------------
+	for i in range(num_eqn): # equation loop
+		for k in range(rord_ptr[i], rord_ptr[i+1]): # reactant loop
+			# derivative of reaction rate with respect to this reactant
+			# (molecules/cc (air).s per molecules/cc (air))
+			drdy = reac_coef[i]*rord_val[k]*y[rord_ind[k]]**(rord_val[k]-1.0)
+			for kk in range(rord_ptr[i], rord_ptr[i+1]): # other reactants
+				if kk != k:
+					drdy *= y[rord_ind[kk]]**rord_val[kk]
+
+			for kc in range(nsc_ptr[i], nsc_ptr[i+1]): # affected component loop
+				jac_val[jmap[fi]] += nsc_val[kc]*drdy
+				fi += 1
+
+	# particle-phase reactions ---------------------------------------------------------
+	for ibin in range(num_sb-1): # size bin loop
+		yi = num_speci*(ibin+1) # index of first component in this size bin
+		for i in range(num_eqn_aq): # equation loop
+			for k in range(rord_ptr_aq[i], rord_ptr_aq[i+1]): # reactant loop
+				drdy = (reac_coef_aq[i]*rord_val_aq[k]*
+						y[yi+rord_ind_aq[k]]**(rord_val_aq[k]-1.0))
+				for kk in range(rord_ptr_aq[i], rord_ptr_aq[i+1]): # other reactants
+					if kk != k:
+						drdy *= y[yi+rord_ind_aq[kk]]**rord_val_aq[kk]
+
+				for kc in range(nsc_ptr_aq[i], nsc_ptr_aq[i+1]): # affected components
+					jac_val[jmap[fi]] += nsc_val_aq[kc]*drdy
+					fi += 1
+
+	# gas-particle partitioning --------------------------------------------------------
+	# note that the dependence of the particle surface concentration of a component on
+	# the concentrations of the other components in a size bin (through the mole 
+	# fraction denominator) is neglected, which keeps this part of the Jacobian diagonal
+	# for each size bin; this is sufficient for the Newton iteration of the ode solver, 
+	# whilst the dependence on the component's own concentration is included in full
+	for ibin in range(num_sb-1): # size bin loop
+
+		# sum of molecular concentrations in this bin (molecules/cc (air))
+		conc_sum = 0.0
+		for j in range(num_speci):
+			conc_sum += y[num_speci*(ibin+1)+j]
+		conc_sum += y[num_speci*(ibin+1)+(corei % num_speci)]*(core_diss-1.0)
+		# prevent numerical error due to division by zero
+		if conc_sum == 0.0:
+			conc_sum = 1.0e-40
+
+		# derivative of the mole fraction of each component with respect to its own
+		# particle-phase concentration (/molecules/cc (air)), with the core counted 
+		# core_diss times in the total
+		dxdy = np.zeros((num_speci))
+		for j in range(num_speci):
+			dxdy[j] = (1.0-y[num_speci*(ibin+1)+j]/conc_sum)/conc_sum
+		dxdy[corei % num_speci] = (1.0-y[num_speci*(ibin+1)+(corei % num_speci)]*
+									core_diss/conc_sum)/conc_sum
+
+		for j in range(num_speci): # gas-phase derivatives
+			jac_val[jmap[fi]] -= kimt[j, ibin]
+			fi += 1
+		for j in range(num_speci): # particle-phase derivatives
+			jac_val[jmap[fi]] += kimt[j, ibin]*Psat[j, 0]*kelv_fac[ibin]*act_coeff[j, 0]*dxdy[j]
+			fi += 1
+		for j in range(num_speci): # gas-phase derivatives
+			jac_val[jmap[fi]] += kimt[j, ibin]
+			fi += 1
+		for j in range(num_speci): # particle-phase derivatives
+			jac_val[jmap[fi]] -= kimt[j, ibin]*Psat[j, 0]*kelv_fac[ibin]*act_coeff[j, 0]*dxdy[j]
+			fi += 1
+
+	# gas-wall partitioning ------------------------------------------------------------
+	if (kgwt*Cw)>1.0e-10:
+		for j in range(num_speci): # gas-phase derivatives
+			jac_val[jmap[fi]] -= kgwt
+			fi += 1
+		for j in range(num_speci): # wall derivatives
+			jac_val[jmap[fi]] += kgwt*Psat[j, 0]*act_coeff[j, 0]/Cw
+			fi += 1
+		for j in range(num_speci): # gas-phase derivatives
+			jac_val[jmap[fi]] += kgwt
+			fi += 1
+		for j in range(num_speci): # wall derivatives
+			jac_val[jmap[fi]] -= kgwt*Psat[j, 0]*act_coeff[j, 0]/Cw
+			fi += 1
+
+	# constant gas-phase concentration of components with this property
+	for k in range(len(jac_cpos)):
+		jac_val[jac_cpos[k]] = 0.0
+
+	return(jac_val)
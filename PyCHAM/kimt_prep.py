@@ -7,7 +7,7 @@ import numpy as np
 import scipy.constants as si
 
 def kimt_prep(y_mw, TEMP, num_speci, testf, Cw, act_comp, act_user, accom_coeff_ind, 
-			accom_coeff_user, spec_namelist, num_sb):
+			accom_coeff_user, spec_reg, num_sb):
 	
 	# ------------------------------------------------------------------
 	# inputs:
@@ -22,7 +22,8 @@ def kimt_prep(y_mw, TEMP, num_speci, testf, Cw, act_comp, act_user, accom_coeff_
 	#			act_comp
 	# accom_coeff_ind - index of components with accommodation coefficient set by the user
 	# accom_coeff_user - accommodation coefficient set by the user
-	# spec_namelist - names of components as stated in the chemical scheme
+	# spec_reg - registry of components, with indices of components by their names
+	#			(as stated in the chemical scheme) in indx
 	# num_sb - number of size bins (excluding wall)
 	# -----------------------------------------------------------------
 	
@@ -59,7 +60,7 @@ def kimt_prep(y_mw, TEMP, num_speci, testf, Cw, act_comp, act_user, accom_coeff_
 		for i in range(len(accom_coeff_ind)):
 			
 			# get index of component stated
-			ac_indx = spec_namelist.index(accom_coeff_ind[i].strip())
+			ac_indx = spec_reg['indx'][accom_coeff_ind[i].strip()]
 			
 			# ensure it's a constant (not a function, which would be a string)
 			if isinstance(accom_coeff_user[i], str)==False:
@@ -104,7 +105,7 @@ def kimt_prep(y_mw, TEMP, num_speci, testf, Cw, act_comp, act_user, accom_coeff_
 	act_coeff = np.ones((num_speci, 1))*1.0e0
 	for i in range(len(act_comp)): # user-defined activity coefficients
 		# get index of component stated
-		ac_indx = spec_namelist.index(act_comp[i].strip())
+		ac_indx = spec_reg['indx'][act_comp[i].strip()]
 		act_coeff[ac_indx] = act_user[i].strip()
 
 	# convert Cw (effective absorbing mass of wall) from g/m3 (air) to 
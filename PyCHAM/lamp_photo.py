@@ -1,9 +1,27 @@
 '''module for calculating photolysis rates for specified absorption cross-section and quantum yield files using actinic flux file'''
+# the actinic flux, absorption cross-section and quantum yield files are read once, 
+# with the product of absorption cross-section and quantum yield of each photolysis 
+# reaction interpolated to the wavelengths of the actinic flux file, so that photolysis
+# rates are given by one matrix-vector product per actinic flux spectrum; the actinic 
+# flux file can be a csv file with one spectrum, or a .npy file with a time series of 
+# spectra that is memory-mapped and processed in blocks of times, so that only the 
+# photolysis rates at each time of the series are held and then interpolated in time;
+# because some MCM absorption cross-sections depend on temperature, MCM files are read 
+# again when temperature changes
 
 import numpy as np
 import os
 
-def lamp_photo(fname, J, TEMP, act_flux_path):
+# photolysis information already loaded, keyed by the photolysis and actinic flux file 
+# names and the photolysis rates used, with the temperature (K) it was loaded at, the 
+# times (s) of actinic flux spectra and the photolysis rates used (/s) at these times 
+# (times in rows)
+photo_data = {}
+
+# number of times of a time series of actinic flux spectra processed together
+act_blk = 1000
+
+def lamp_photo(fname, J, TEMP, act_flux_path, time=0.0, J_use=None):
 
 	# --------------------------------------------------------------
 	# inputs
@@ -12,26 +30,96 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 	# TEMP - chamber temperature (K)
 	# act_flux_path - path of actinic flux file, 'no' if none given (in which case this
 	# module should not be called)
+	# time - time of day (s) counted from midnight of the first day of the simulation,
+	#		only used for a time series of actinic flux spectra
+	# J_use - indices of photolysis rates used by the chemical scheme, the others are 
+	#		left at zero, None to calculate all
+	# --------------------------------------------------------------
+	
+	cwd = os.getcwd() # address of current working directory
+	
+	if J_use is None: # calculate all photolysis rates
+		J_use = np.arange(len(J))
+	J_use = np.array(J_use).astype(int)
+	
+	key = str(fname + ', ' + act_flux_path + ', ' + str(len(J)) + ', ' + 
+			' '.join([str(i) for i in J_use]))
+	if key not in photo_data:
+		photo_data[key] = [None, 0, 0]
+	# load photolysis information if not already loaded, or if temperature has changed
+	# and MCM absorption cross-sections used
+	if photo_data[key][0] is None or (photo_data[key][0] != TEMP and 
+		fname == str(cwd+'/PyCHAM/photofiles/MCMv3.2')):
+		
+		if act_flux_path[-4::] == '.npy': # time series of actinic flux spectra
+			# the first row holds wavelengths (nm) and the first column times (s), with
+			# actinic flux (photon/cm2/nm/s) in the remainder
+			act_ser = np.load(act_flux_path, mmap_mode='r')
+			wl_chm = np.array(act_ser[0, 1::])
+			t_ser = np.array(act_ser[1::, 0])
+			# only for the photolysis rates used
+			xsqy = lamp_photo_load(fname, len(J), TEMP, wl_chm)[J_use, :]
+			# photolysis rates used (/s) at each time
+			J_ser = np.zeros((len(t_ser), len(J_use)))
+			for ti in range(0, len(t_ser), act_blk):
+				J_ser[ti:ti+act_blk, :] = (np.array(act_ser[ti+1:ti+1+act_blk, 1::])).dot(
+											xsqy.transpose())
+			del act_ser
+		else: # single spectrum
+			# open wavelengths (nm) we have total actinic flux for (photon/cm2/nm/s)
+			# from chamber
+			f = open(act_flux_path, 'r')
+			wl_chm = [] # chamber wavelengths (nm)
+			act_chm = [] # chamber actinic flux
+	
+			for line in f: # loop through line
+		
+				try: # omit headers
+					wl = float((line.strip()).split(',')[0])
+					act = float((line.strip()).split(',')[1])
+				except:
+					continue
+				wl_chm.append(wl)
+				act_chm.append(act)
+		
+			f.close() # close file
+			# only for the photolysis rates used
+			xsqy = lamp_photo_load(fname, len(J), TEMP, np.array(wl_chm))[J_use, :]
+			t_ser = np.zeros((1))
+			# photolysis rates used (/s)
+			J_ser = (xsqy.dot(np.array(act_chm))).reshape(1, -1)
+		
+		photo_data[key] = [TEMP, t_ser, J_ser]
+	
+	[TEMP_load, t_ser, J_ser] = photo_data[key]
+	
+	# photolysis rates (/s) at this time, interpolated linearly between the times of 
+	# spectra and held at the first and last spectra outside of the times given, note, 
+	# length of J set in eqn_parser.py
+	J = np.zeros((len(J)))
+	if len(t_ser) == 1:
+		J[J_use] = J_ser[0, :]
+	else:
+		ti = min(max(int(np.searchsorted(t_ser, time)), 1), len(t_ser)-1)
+		w = min(max((time-t_ser[ti-1])/(t_ser[ti]-t_ser[ti-1]), 0.0), 1.0)
+		J[J_use] = J_ser[ti-1, :]*(1.0-w)+J_ser[ti, :]*w
 	
+	return J
+
+# function to read the absorption cross-section and quantum yield files
+def lamp_photo_load(fname, Jlen, TEMP, wl_chm):
+
+	# --------------------------------------------------------------
+	# inputs
+	# fname - name of folder where photoloysis information stored
+	# Jlen - number of photolysis reactions
+	# TEMP - chamber temperature (K)
+	# wl_chm - wavelengths (nm) of chamber actinic flux
 	# --------------------------------------------------------------
-	# open wavelengths (nm) we have total actinic flux for (photon/cm2/nm/s)
-	# from chamber
-	f = open(act_flux_path, 'r')
-	wl_chm = np.empty(0) # chamber wavelengths (nm)
-	act_chm = np.empty(0) # chamber actinic flux
 	
-	for line in f: # loop through line
-		
-		try: # omit headers
-			float((line.strip()).split(',')[0])
-			wl = float((line.strip()).split(',')[0])
-			act = float((line.strip()).split(',')[1])
-			wl_chm = np.append(wl_chm, (np.array(wl)).reshape(1), axis=0)
-			act_chm = np.append(act_chm, (np.array(act)).reshape(1), axis=0)
-			
-		except:
-			continue
-	f.close() # close file
+	# product of absorption cross-section (cm2/molecule) and quantum yield (fraction) at
+	# chamber wavelengths for each photolysis reaction
+	xsqy = np.zeros((Jlen, len(wl_chm)))
 	
 	# determine whether to use MCM estimation for wavelength-dependent absorption 
 	# cross-sections (cm2/molecule) and quantum yields (fraction) or other
@@ -46,10 +134,10 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		# MCM photochemical reaction numbers
 		Ji = 1
 		
-		wlxs = np.empty(0) # will contain wavelengths for cross-sections (nm)
-		all_xs = np.empty(0) # will contain absorption cross-sections (cm2/molecule)
-		wlqy = np.empty(0) # will contain wavelengths for quantum yields (nm)
-		all_qy = np.empty(0) # will contain quantum yields (fraction)
+		wlxs = [] # will contain wavelengths for cross-sections (nm)
+		all_xs = [] # will contain absorption cross-sections (cm2/molecule)
+		wlqy = [] # will contain wavelengths for quantum yields (nm)
+		all_qy = [] # will contain quantum yields (fraction)
 		
 		# flags for when to record absorption cross section and quantum yields
 		xs_rec = 0
@@ -60,21 +148,16 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 			# know when end reached
 			if line.strip() == str('J_'+str(Ji+1) + '_axs') or line.strip() == str('J_'+str(Ji+1) + '_qy') or line.strip() =='J_end':
 
-				# absorption cross section (cm2/molecule) interpolation to wavelengths
-				# given in actinic flux file
-				all_xs = np.interp(wl_chm, wlxs, all_xs)
-				# quantum yield (fraction) interpolation to wavelengths
-				# given in actinic flux file
-				all_qy = np.interp(wl_chm, wlqy, all_qy)
-				# note, length of J set in eqn_parser.py
-				
-				J[Ji] = sum(all_xs*all_qy*act_chm)
+				# absorption cross section (cm2/molecule) and quantum yield (fraction) 
+				# interpolation to wavelengths given in actinic flux file
+				xsqy[Ji, :] = (np.interp(wl_chm, wlxs, all_xs)*
+								np.interp(wl_chm, wlqy, all_qy))
 				
 				# reset to empty
-				wlxs = np.empty(0) # wavelengths for cross-sections (nm)
-				all_xs = np.empty(0) # absorption cross-sections (cm2/molecule)
-				wlqy = np.empty(0) # wavelengths for quantum yields (nm)
-				all_qy = np.empty(0) # quantum yields (fraction)
+				wlxs = [] # wavelengths for cross-sections (nm)
+				all_xs = [] # absorption cross-sections (cm2/molecule)
+				wlqy = [] # wavelengths for quantum yields (nm)
+				all_qy = [] # quantum yields (fraction)
 				
 				if line.strip() =='J_end':
 					continue
@@ -96,17 +179,13 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 				continue
 			
 			if xs_rec == 1:
-				wl = float(line.split(',')[0])
-				xs = float(line.split(',')[1])
-				wlxs = np.append(wlxs, (np.array(wl)).reshape(1), axis=0)
-				all_xs = np.append(all_xs, (np.array(xs)).reshape(1), axis=0)
+				wlxs.append(float(line.split(',')[0]))
+				all_xs.append(float(line.split(',')[1]))
 				
 			
 			if qy_rec == 1:
-				wl = float(line.split(',')[0])
-				qy = float(line.split(',')[1])
-				wlqy = np.append(wlqy, (np.array(wl)).reshape(1), axis=0)
-				all_qy = np.append(all_qy, (np.array(xs)).reshape(1), axis=0)
+				wlqy.append(float(line.split(',')[0]))
+				all_qy.append(float(line.split(',')[1]))
 			
 			
 				
@@ -179,9 +258,9 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		qyO3P = np.interp(wl_chm, wlO3Pqy, qyO3P)
 		
 		
-		# photolysis rate for J<1> and J<2>(/s)
-		J[1] = sum(xsO3*qyO3*act_chm)
-		J[2] = sum(xsO3*qyO3P*act_chm)
+		# product of absorption cross-section and quantum yield for J<1> and J<2>
+		xsqy[1, :] = xsO3*qyO3
+		xsqy[2, :] = xsO3*qyO3P
 		
 		# --------------------------------------------------------------
 		# J<3> for H2O2 (hydrogen peroxide) photolysis: H2O2 = OH + OH
@@ -209,8 +288,8 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		# which is 1.0 above a wavelength of 230 nm and which states uncertainty below this.
 		# This is true on 04/12/2019.
 		# Therefore, here assume quantum yield of one for all wavelengths.
-		# photolysis rate for J<3> (/s)
-		J[3] = sum(xsH2O2*1.0*act_chm)
+		# product of absorption cross-section and quantum yield for J<3>
+		xsqy[3, :] = xsH2O2*1.0
 		
 		# --------------------------------------------------------------
 		# J<4> for NO2 (nitrogen dioxide) photolysis: NO2 = NO + O
@@ -254,8 +333,8 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		# absorption cross section (cm2/molecule) interpolation
 		qyNO2 = np.interp(wl_chm, wlNO2qy, qyNO2)
 		
-		# photolysis rate for J<4>
-		J[4] = sum(xsNO2*qyNO2*act_chm)
+		# product of absorption cross-section and quantum yield for J<4>
+		xsqy[4, :] = xsNO2*qyNO2
 		
 		# --------------------------------------------------------------
 		# J<5> for NO3 (nitrate radical) photolysis: NO3 = NO ;
@@ -299,8 +378,8 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		# absorption cross section (cm2/molecule) interpolation
 		qyNO3 = np.interp(wl_chm, wlNO3qy, qyNO3)
 		
-		# photolysis rate for J<5>
-		J[5] = sum(xsNO3*qyNO3*act_chm)
+		# product of absorption cross-section and quantum yield for J<5>
+		xsqy[5, :] = xsNO3*qyNO3
 		
 		# J<6> quantum yield: NO3 = NO2 + O
 		f = open(str(fname+'/NO3/no3_no2_o_johnson96_qy_298.txt'), 'r')
@@ -322,8 +401,8 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		# absorption cross section (cm2/molecule) interpolation
 		qyNO3 = np.interp(wl_chm, wlNO3qy, qyNO3)
 		
-		# photolysis rate for J<6>
-		J[6] = sum(xsNO3*qyNO3*act_chm)
+		# product of absorption cross-section and quantum yield for J<6>
+		xsqy[6, :] = xsNO3*qyNO3
 		
 		
 		# --------------------------------------------------------------
@@ -352,8 +431,8 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		# assume quantum yield of 1.0 for J<7> following recommendation of MCM website on
 		# 4/12/2019
 		
-		# photolysis rate for J<7>
-		J[7] = sum(xsHONO*1.0*act_chm)
+		# product of absorption cross-section and quantum yield for J<7>
+		xsqy[7, :] = xsHONO*1.0
 		
 		# --------------------------------------------------------------
 		# J<8> for HNO3 (nitric acid) photolysis: HNO3 = OH + NO2;
@@ -382,8 +461,8 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		# J<8> quantum yield: HNO3 = OH + NO2
 		# following MCM website recommendation (true on 4/12/2019), assume 1.0
 		
-		# photolysis rate
-		J[8] = sum(xs*1.0*act_chm)
+		# product of absorption cross-section and quantum yield
+		xsqy[8, :] = xs*1.0
 		
 		# --------------------------------------------------------------
 		# J<11> for HCHO (formaldehyde) photolysis: HCHO = CO + HO2 + HO2;
@@ -433,9 +512,9 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		qy = np.interp(wl_chm, wl_qy, qy)
 		qy2 = np.interp(wl_chm, wl_qy, qy2)
 		
-		# photolysis rate
-		J[11] = sum(xs*qy*act_chm)
-		J[12] = sum(xs*qy2*act_chm)
+		# product of absorption cross-section and quantum yield
+		xsqy[11, :] = xs*qy
+		xsqy[12, :] = xs*qy2
 		
 		# -------------------------------------------------------------------
 		# J<13> for → CH3 + HCO
@@ -474,8 +553,8 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		f.close() # close file
 		# quantum yield interpolation
 		qy = np.interp(wl_chm, wl_qy, qy)
-		# photolysis rate
-		J[13] = sum(xs*qy*act_chm)
+		# product of absorption cross-section and quantum yield
+		xsqy[13, :] = xs*qy
 		
 		# -------------------------------------------------------------------
 		# J<14> for → C2H5 + HCO
@@ -514,8 +593,8 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		f.close() # close file
 		# quantum yield interpolation
 		qy = np.interp(wl_chm, wl_qy, qy)
-		# photolysis rate
-		J[14] = sum(xs*qy*act_chm)
+		# product of absorption cross-section and quantum yield
+		xsqy[14, :] = xs*qy
 		
 		# --------------------------------------------------------------
 		# J<15> for multiple photolysis
@@ -541,8 +620,8 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		# using recommendation inside n_c3h7cho_iupac05_cs_qy_298 (true on 4/12/2019)
 		qy = 0.21
 		
-		# photolysis rate
-		J[15] = sum(xs*qy*act_chm)
+		# product of absorption cross-section and quantum yield
+		xsqy[15, :] = xs*qy
 		
 		# -------------------------------------------------------------------
 		# J<16> for → C2H4 + CH3CHO
@@ -552,8 +631,8 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		# using recommendation inside n_c3h7cho_iupac05_cs_qy_298 (true on 4/12/2019)
 		qy = 0.10
 		
-		# photolysis rate
-		J[16] = sum(xs*qy*act_chm)
+		# product of absorption cross-section and quantum yield
+		xsqy[16, :] = xs*qy
 		
 		# --------------------------------------------------------------
 		# J<17> for multiple photolysis
@@ -595,8 +674,8 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		# quantum yield interpolation
 		qy = np.interp(wl_chm, wl, qy)
 		
-		# photolysis rate
-		J[17] = sum(xs*qy*act_chm)
+		# product of absorption cross-section and quantum yield
+		xsqy[17, :] = xs*qy
 		
 		# --------------------------------------------------------------
 		# J<18> for → CH2=CCH3 + HCO and J<19> for → CH2=C(CH3)CO + H
@@ -625,9 +704,9 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		# use 1.95e-3 (true on 20/12/2019)
 		qy = 1.95e-3
 		
-		# photolysis rate
-		J[18] = sum(xs*qy*act_chm)
-		J[19] = sum(xs*qy*act_chm)
+		# product of absorption cross-section and quantum yield
+		xsqy[18, :] = xs*qy
+		xsqy[19, :] = xs*qy
 		
 		# --------------------------------------------------------------
 		# J<20> for → CH3C(CHO)=CHCH2O + OH
@@ -655,8 +734,8 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		# use 1.0 (true on 20/12/2019)
 		qy = 1.0
 		
-		# photolysis rate
-		J[20] = sum(xs*qy*act_chm)
+		# product of absorption cross-section and quantum yield
+		xsqy[20, :] = xs*qy
 		
 		# --------------------------------------------------------------
 		# J<21> for CH3COCH3 (acetone) photolysis: CH3COCH3 = CH3CO3 + CH3O2;
@@ -701,8 +780,8 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		# quantum yield interpolation
 		qy = np.interp(wl_chm, wl, qy)
 		
-		# photolysis rate
-		J[21] = sum(xs*qy*act_chm)
+		# product of absorption cross-section and quantum yield
+		xsqy[21, :] = xs*qy
 		
 		# --------------------------------------------------------------
 		# J<22> for → CH3CO + C2H5
@@ -729,8 +808,8 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		# (true on 4/12/2019) to use 0.16
 		qy = 0.16
 		
-		# photolysis rate
-		J[22] = sum(xs*qy*act_chm)
+		# product of absorption cross-section and quantum yield
+		xsqy[22, :] = xs*qy
 		
 		# --------------------------------------------------------------
 		# J<23> for → CH3CH=CH2 + CO and J<24> for → CH3CO + CH2=CH
@@ -778,9 +857,9 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		# quantum yield interpolation for J<24>
 		qy24 = np.interp(wl_chm, wl, qy24)
 		
-		# photolysis rate
-		J[23] = sum(xs*qy*act_chm)
-		J[24] = sum(xs*qy24*act_chm)
+		# product of absorption cross-section and quantum yield
+		xsqy[23, :] = xs*qy
+		xsqy[24, :] = xs*qy24
 		
 		# --------------------------------------------------------------
 		# J<31>, J<32>, J<33> for glyoxal photolysis
@@ -829,10 +908,10 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		qy2 = np.interp(wl_chm, wl, qy2)
 		qy3 = np.interp(wl_chm, wl, qy3)
 		
-		# photolysis rate
-		J[31] = sum(xs*qy*act_chm)
-		J[32] = sum(xs*qy2*act_chm)
-		J[33] = sum(xs*qy3*act_chm)
+		# product of absorption cross-section and quantum yield
+		xsqy[31, :] = xs*qy
+		xsqy[32, :] = xs*qy2
+		xsqy[33, :] = xs*qy3
 		
 		# --------------------------------------------------------------
 		# J<34> for → CH3CO + HCO
@@ -875,8 +954,8 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		# quantum yield interpolation
 		qy = np.interp(wl_chm, wl, qy)
 		
-		# photolysis rate
-		J[34] = sum(xs*qy*act_chm)
+		# product of absorption cross-section and quantum yield
+		xsqy[34, :] = xs*qy
 		
 		# --------------------------------------------------------------
 		# J<35> for → CH3CO + CH3CO
@@ -903,8 +982,8 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		# (true on 4/12/2019) 
 		qy = 0.158
 		
-		# photolysis rate
-		J[35] = sum(xs*qy*act_chm)
+		# product of absorption cross-section and quantum yield
+		xsqy[35, :] = xs*qy
 		
 		# --------------------------------------------------------------
 		# J<41> for → CH3O + OH
@@ -931,8 +1010,8 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		# (true on 4/12/2019)
 		qy = 1.0
 		
-		# photolysis rate
-		J[41] = sum(xs*qy*act_chm)
+		# product of absorption cross-section and quantum yield
+		xsqy[41, :] = xs*qy
 		
 		# --------------------------------------------------------------
 		# J<51> for → CH3O + NO2
@@ -961,8 +1040,8 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		# (true on 4/12/2019)
 		qy = 1.0
 		
-		# photolysis rate
-		J[51] = sum(xs*qy*act_chm)
+		# product of absorption cross-section and quantum yield
+		xsqy[51, :] = xs*qy
 	
 		# --------------------------------------------------------------
 		# J<52> for → C2H5O + NO2
@@ -991,8 +1070,8 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		# (true on 4/12/2019)
 		qy = 1.0
 		
-		# photolysis rate
-		J[52] = sum(xs*qy*act_chm)
+		# product of absorption cross-section and quantum yield
+		xsqy[52, :] = xs*qy
 	
 		# --------------------------------------------------------------
 		# J<53> for → n-C3H7O + NO2
@@ -1035,8 +1114,8 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		# quantum yield interpolation
 		qy = np.interp(wl_chm, wl, qy)
 		
-		# photolysis rate
-		J[53] = sum(xs*qy*act_chm)
+		# product of absorption cross-section and quantum yield
+		xsqy[53, :] = xs*qy
 		
 		# --------------------------------------------------------------
 		# J<54> for → CH3C(O.)CH3 + NO2
@@ -1065,8 +1144,8 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		# (true on 4/12/2019)
 		qy=1.0
 		
-		# photolysis rate
-		J[54] = sum(xs*qy*act_chm)
+		# product of absorption cross-section and quantum yield
+		xsqy[54, :] = xs*qy
 	
 		# --------------------------------------------------------------
 		# J<55> for → t-C4H9O + NO2
@@ -1083,8 +1162,8 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		# (true on 4/12/2019)
 		qy=1.0
 		
-		# photolysis rate
-		J[55] = sum(xs*qy*act_chm)
+		# product of absorption cross-section and quantum yield
+		xsqy[55, :] = xs*qy
 		
 		# --------------------------------------------------------------
 		# J<56> for → CH3C(O)CH2(O.) + NO2 and → CH3CO + HCHO + NO2
@@ -1111,7 +1190,7 @@ def lamp_photo(fname, J, TEMP, act_flux_path):
 		# (true on 4/12/2019)
 		qy=0.9
 		
-		# photolysis rate
-		J[56] = sum(xs*qy*act_chm)
+		# product of absorption cross-section and quantum yield
+		xsqy[56, :] = xs*qy
 	
-	return J
\ No newline at end of file
+	return(xsqy)
@@ -5,8 +5,7 @@
 import numpy as np
 from assimulo.problem import Explicit_Problem
 from assimulo.solvers import CVode
-import numba
-from numba import jit, f8
+from assimulo.exception import TerminateSimulation
 import matplotlib.pyplot as plt
 import ipdb
 from kimt_calc import kimt_calc
@@ -21,6 +20,13 @@ import math
 from pp_dursim import pp_dursim
 from water_calc import water_calc
 from volat_calc import volat_calc
+from dydt_calc import dydt_calc # right-hand side of ode system
+from stoich_mat import stoich_mat # sparse matrices of reaction stoichiometry
+from jac_calc import jac_prep, jac_calc # Jacobian of ode system
+from event_sched import event_sched, event_due, event_next # boundary condition changes
+from dense_out import dense_out # interpolation of ode solver results
+from scipy import sparse
+from scipy.sparse.linalg import splu
 import matplotlib.pyplot as plt
 import sys
 import time
@@ -40,7 +46,8 @@ def ode_gen(y, num_speci, num_eqn, rindx, pindx, rstoi, pstoi, H2Oi,
 			lowersize, uppersize, mean_rad, std, update_step, Pybel_objects, tempt,
 			Cfactor, coag_on, rindx_aq, pindx_aq, rstoi_aq, 
 			pstoi_aq, nreac_aq, nprod_aq, prodn_aq, 
-			reacn_aq):
+			reacn_aq, linear_solver, rate_mod, rate_mod_aq, rate_tol, photo_tab_step, 
+			rate_interp, nuci, nuc_name):
 
 	# inputs:---------------------------------------------------
 	
@@ -122,6 +129,21 @@ def ode_gen(y, num_speci, num_eqn, rindx, pindx, rstoi, pstoi, H2Oi,
 	# nprod_aq - total number of products per aqueous reaction
 	# prodn_aq - maximum number of products per aqueous reaction
 	# reacn_aq - maximum number of reactants per aqueous reaction
+	# linear_solver - linear solver used by the ode solver in its Newton iteration:
+	#	'DENSE', 'SPARSE' (direct sparse factorisation) or 'SPGMR' (iterative, with
+	#	block-diagonal preconditioner)
+	# rate_mod - module for gas-phase rate coefficients generated by eqn_parser
+	# rate_mod_aq - module for aqueous-phase rate coefficients generated by eqn_parser
+	# rate_tol - relative change in inputs to rate coefficients above which they are
+	#			recalculated
+	# photo_tab_step - time interval (s) of lookup table of natural light photolysis 
+	#					rates against time of day, 0 for no table
+	# rate_interp - number of linear segments of each integration interval for 
+	#				interpolating rate coefficients in time, 0 for constant rate 
+	#				coefficients through each interval
+	# nuci - index of nucleating component if formed of core component, -1 otherwise
+	# nuc_name - name of nucleating component (as given by the user, whereas nuc_comp
+	#			holds its index)
 			
 	# ------------------------------------------------------------------------------------
 	
@@ -188,16 +210,21 @@ def ode_gen(y, num_speci, num_eqn, rindx, pindx, rstoi, pstoi, H2Oi,
 							surfT, R_gas, TEMP[0], NA, y_dens, N_perbin, DStar_org, 
 							x.reshape(1, -1)*1.0e-6, Psat, therm_sp, H2Oi, act_coeff)
 	else:
-		kimt = 0.0
-		kelv_fac = 0.0
+		# empty arrays (rather than scalars) so that types are consistent for dydt_calc
+		kimt = np.zeros((num_speci, 0))
+		kelv_fac = np.zeros((0))
 	
 	save_count = int(1) # count on number of times saving code called
 	
+	# cache of the parts of the reaction rate coefficients, filled by rate_valu_calc
+	rate_cache = {}
+	
 	# reaction rate coefficients at experiment time = 0s
-	reac_coef = rate_valu_calc(RO2_indices, y[H2Oi], TEMP[0], lightm, y, 
+	[reac_coef, reac_coef_aq, ro2_k] = rate_valu_calc(RO2_indices, y[H2Oi], TEMP[0], lightm, y, 
 								daytime+sumt, 
 								lat, lon, act_flux_path, DayOfYear, Pnow, 
-								photo_par_file, Jlen)
+								photo_par_file, Jlen, rate_mod, rate_mod_aq, 
+								rate_cache, rate_tol, photo_tab_step)
 
 	# setup recording matrices and record initial conditions
 	[t_out, y_mat, Nresult_dry, Nresult_wet, x2, dydt_vst, 
@@ -222,10 +249,8 @@ def ode_gen(y, num_speci, num_eqn, rindx, pindx, rstoi, pstoi, H2Oi,
 	# flag for whether maximum integration time step has been reduced due to boundary 
 	# conditions
 	bc_red = 0 
-	light_time_count = 0 # count on light setting changes
-	gasinj_count = 0 # count on injection times of components
-	temp_count = 0 # count on changes to temperature
-	influx_count = 0 # count on constant influx of gas-phase components
+	# times of changes to boundary conditions (s)
+	events = event_sched(light_time, TEMP, tempt, injectt, pconct, const_infl_t)
 	# count on time since update to initial values/constants last called (s)
 	update_count = 0.0 
 	# temperature at start (K)
@@ -235,67 +260,208 @@ def ode_gen(y, num_speci, num_eqn, rindx, pindx, rstoi, pstoi, H2Oi,
 	num_const_compi = len(const_compi)
 	const_infli_len = len(const_infli)
 
-	# needs to be a numpy array to be used in integrator
-	const_compi = np.array(const_compi)
+	# needs to be an integer numpy array to be used in integrator, including when empty
+	const_compi = np.array(const_compi).astype(int)
+	const_infli = np.array(const_infli).astype(int)
+	# influx of components with constant influx (molecules/cc.s), zero until first
+	# influx time reached
+	Cinfl_now = np.zeros((const_infli_len, 1))
 	
+	# sparse reactant order and net stoichiometry matrices for gas-phase reactions
+	[rord_ptr, rord_ind, rord_val, nstoi_ptr, nstoi_ind, 
+		nstoi_val] = stoich_mat(rindx, rstoi, pindx, pstoi, nreac, nprod, num_speci)
+	# and for particle-phase reactions, which apply to every size bin
+	[rord_ptr_aq, rord_ind_aq, rord_val_aq, nstoi_ptr_aq, nstoi_ind_aq, 
+		nstoi_val_aq] = stoich_mat(rindx_aq, rstoi_aq, pindx_aq, pstoi_aq, nreac_aq, 
+		nprod_aq, num_speci)
 	
-	if len(const_infli)>0:
-		const_infli = const_infli.astype(int) # ensure int type for use in indexing
+	# sparsity pattern of the Jacobian of the ode system
+	[jac_ptr, jac_ind, jmap, jac_cpos, jac_blk, blk_ptr, nsc_ptr, nsc_ind, 
+		nsc_val, nsc_ptr_aq, nsc_ind_aq, nsc_val_aq] = jac_prep(num_speci, num_sb, 
+		rord_ptr, rord_ind, nstoi_ptr, nstoi_ind, nstoi_val, num_eqn[0], const_compi, 
+		rord_ptr_aq, rord_ind_aq, nstoi_ptr_aq, nstoi_ind_aq, nstoi_val_aq)
 	
-	print('starting ode solver')
+	# gas-phase reactions with rate coefficients proportional to the total RO2 
+	# concentration, which are recalculated inside the ode right-hand side from the 
+	# current concentrations of the components in the RO2 pool (indices in RO2_y)
+	ro2_i = rate_mod.ro2_lin_i
+	if (RO2_indices.size == 0):
+		RO2_y = np.zeros((0)).astype(int)
+	else:
+		RO2_y = (RO2_indices[:, 1]).astype(int)
 	
-	while sumt < end_sim_time: # step through time intervals to do ode
-		# start of update for changed initial values/constants ---------------------------
+	# ode solver -------------------------------------------------------------
+	# the right-hand side is compiled once (and cached on disk) in dydt_calc, with the 
+	# inputs that change between integration intervals read from this function's current
+	# values at call time
+	def dydt(t, y):
 		
-		# ---------------------
-		# change of light setting check
+		[reac_coef_now, reac_coef_aq_now, ro2_k_now] = rate_now(t)
 		
-		if len(light_time)>0:
+		return(dydt_calc(t, y, num_eqn, rord_ptr, rord_ind, rord_val, nstoi_ptr, 
+				nstoi_ind, nstoi_val, reac_coef_now, const_infli, Cinfl_now, num_sb, num_speci, corei, core_diss, 
+				Psat, kelv_fac, act_coeff, kimt, rord_ptr_aq, rord_ind_aq, rord_val_aq, 
+				nstoi_ptr_aq, nstoi_ind_aq, nstoi_val_aq, reac_coef_aq_now, kgwt, Cw, 
+				const_compi, ro2_i, ro2_k_now, RO2_y))
+	
+	# values of the analytical Jacobian of the ode system, in the order of its 
+	# compressed sparse column (CSC) sparsity pattern
+	def jac_val_calc(t, y):
 		
-			# check whether changes occur at start of this time step
-			if (sumt == light_time[light_time_count] and light_time_count>-1):
-				# whether lights on (1) or off (0) during this step
-				lightm = light_stat[light_time_count]
-				
-				if (light_time_count<(len(light_stat)-1)):
-					light_time_count += 1 # keep count of light setting index
-				else:
-					light_time_count = -1 # reached end
-				# reset flag for time step reduction due to boundary conditions
-				bc_red = 0
-					
-			
-			# check whether light on/off changes during proposed integration time step
-			if (sumt+tnew > light_time[light_time_count] and light_time_count!=-1):
-				# if yes, then reset integration time step so that next step coincides 
-				# with change
-				tnew = light_time[light_time_count]-sumt
-				bc_red = 1 # flag for time step reduction due to boundary conditions
-				
-		if (len(light_time) == 0): # if no input provided default to lights off
-			lightm = 0 
+		[reac_coef_now, reac_coef_aq_now, ro2_k_now] = rate_now(t)
+		
+		return(jac_calc(t, y, num_eqn[0], rord_ptr, rord_ind, rord_val, nsc_ptr, 
+				nsc_ind, nsc_val, reac_coef_now, num_sb, num_speci, corei, core_diss, Psat, 
+				kelv_fac, act_coeff, kimt, kgwt, Cw, jmap, jac_cpos, len(jac_ind), 
+				num_eqn[1], rord_ptr_aq, rord_ind_aq, rord_val_aq, nsc_ptr_aq, 
+				nsc_ind_aq, nsc_val_aq, reac_coef_aq_now, ro2_i, ro2_k_now, RO2_y))
+	
+	# reaction rate coefficients (/s) at time t (s) through the integration interval, 
+	# linearly interpolated between the rate coefficients at the ends of the segments 
+	# of the interval if requested, and held at the end values beyond the interval
+	def rate_now(t):
+		
+		if rate_interp == 0:
+			return(reac_coef, reac_coef_aq, ro2_k)
+		
+		k = min(int(t/rate_tab_t[-1]*rate_interp), rate_interp-1) # segment index
+		w = min(max((t-rate_tab_t[k])/(rate_tab_t[k+1]-rate_tab_t[k]), 0.0), 1.0)
+		
+		return(rate_tab[k, :]*(1.0-w)+rate_tab[k+1, :]*w, 
+				rate_tab_aq[k, :]*(1.0-w)+rate_tab_aq[k+1, :]*w, 
+				rate_tab_ro2[k, :]*(1.0-w)+rate_tab_ro2[k+1, :]*w)
+	
+	# analytical Jacobian of the ode system, passed as a dense array for the dense 
+	# linear solver or in CSC format for the sparse linear solver
+	def jac(t, y):
+		
+		jac_val = jac_val_calc(t, y)
+		
+		if linear_solver == 'SPARSE':
+			return(sparse.csc_matrix((jac_val, jac_ind, jac_ptr), 
+				shape=(len(y), len(y))))
+		else:
+			return(sparse.csc_matrix((jac_val, jac_ind, jac_ptr), 
+				shape=(len(y), len(y))).toarray())
+	
+	# preconditioner for the iterative (SPGMR) linear solver: the Newton matrix 
+	# (I-gamma*J) is approximated by its diagonal blocks per phase (gas, each size bin 
+	# and wall), with the gas-phase block holding the chemistry, and factorised
+	# with a sparse LU decomposition
+	def prec_setup(t, y, fy, jok, gamma, data):
+		
+		# reuse Jacobian values from the previous call if the solver allows
+		if jok and isinstance(data, list):
+			jac_val = data[0]
+			jcur = False
+		else:
+			jac_val = jac_val_calc(t, y)
+			jcur = True
+		
+		Pmat = sparse.identity(len(y), format='csc')-sparse.csc_matrix(
+				(gamma*jac_val[jac_blk], jac_ind[jac_blk], blk_ptr), 
+				shape=(len(y), len(y)))
+		
+		return([jcur, [jac_val, splu(Pmat.tocsc())]])
+	
+	# solve the preconditioner system using the factorisation from prec_setup
+	def prec_solve(t, y, fy, r, gamma, delta, data):
+	
+		return(data[1].solve(r))
+	
+	if num_sb>1:
+		# volume limits (um3) of single particles per size bin beyond which the moving 
+		# centre method rejects the integration (as checked in Vchange_check), moved 
+		# slightly inside so that the integration stops whilst still acceptable
+		Vlim_lo = np.zeros((num_sb-1))
+		Vlim_hi = np.ones((num_sb-1))*Vbou[-1]
+		for sbi in range(num_sb-1): # size bin loop
+			if (sbi-1) >= 1: # excessive shrink
+				Vlim_lo[sbi] = Vbou[sbi-1]
+			if (sbi+2) < num_sb: # excessive growth
+				Vlim_hi[sbi] = Vbou[sbi+2]
+		Vlim_lo = Vlim_lo*1.001
+		Vlim_hi = Vlim_hi*0.999
+	
+	# root functions for the ode solver, which change sign when the volume of single 
+	# particles in any size bin reaches its limits, so that the integration stops at 
+	# that time rather than being rejected and repeated with a smaller time step
+	def state_events(t, y, sw=None):
 		
-		# -------------------------------------------------------------------------------
-		# check on updates to temperature (K)
+		Nnow = N_perbin.reshape(-1)
+		# volume of single particles per size bin (um3), note MV has units cc/mol, so
+		# needs conversion to um3
+		Vsing = (((y[num_speci:num_speci*num_sb].reshape(num_sb-1, num_speci))/
+				(NA*np.maximum(Nnow, 1.0e-10)).reshape(-1, 1))*
+				(MV[:, 0]*1.0e12)).sum(axis=1)
 		
-		if len(TEMP)>1: # because a temperature must be given for experiment start
+		ev = np.append(Vsing-Vlim_lo, Vlim_hi-Vsing)
+		# no limits for size bins without particles
+		ev[np.tile(Nnow<1.0e-10, 2)] = 1.0
 		
-			# check whether changes occur at start of this time step
-			if (sumt == tempt[temp_count]):
-				print('updating temperature inside chamber to ' +str(TEMP[temp_count]) + ' K')
+		return(ev)
+	
+	# stop integration when a volume limit is reached
+	def handle_event(solver, event_info):
+		
+		raise TerminateSimulation
+	
+	# one problem and solver instance is used for the whole simulation and 
+	# re-initialised at the start of every integration interval, rather than being 
+	# rebuilt, so that the step size reached at the end of one interval starts the next
+	mod = Explicit_Problem(dydt, y0)
+	if linear_solver == 'SPGMR':
+		mod.prec_setup = prec_setup # block-diagonal preconditioner
+		mod.prec_solve = prec_solve
+	else:
+		mod.jac = jac # analytical Jacobian
+		mod.jac_nnz = len(jac_ind) # number of non-zero elements in Jacobian
+	if num_sb>1: # stop integration when particles reach the limits of size bins
+		mod.state_events = state_events
+		mod.handle_event = handle_event
+	mod_sim = CVode(mod) # define a solver instance
+	mod_sim.linear_solver = linear_solver
+	if linear_solver == 'SPGMR':
+		mod_sim.precond = 'PREC_LEFT'
+	# absolute tolerance, going higher than can 1.0e-3 cause issues with water 
+	# vapour
+	mod_sim.atol = int_tol[0]
+	# relative tolerance, going higher than 1.0e-4 can cause issues with water 
+	# vapour
+	mod_sim.rtol = int_tol[1]
+	mod_sim.discr = 'BDF' # the integration approach, default is 'Adams'
+	# last step size of solver (s), zero before the first interval so that the solver
+	# estimates its initial step
+	h_last = 0.0
+	
+	print('starting ode solver')
+	
+	while sumt < end_sim_time: # step through time intervals to do ode
+		# start of update for changed initial values/constants ---------------------------
+		
+		# apply any changes to boundary conditions due at the start of this time step, 
+		# in the order given by event_sched
+		for [ev_name, ev_i] in event_due(events, sumt):
+			
+			if ev_name == 'light': # change of light setting
+				# whether lights on (1) or off (0) during this step
+				lightm = light_stat[ev_i]
+			
+			if ev_name == 'temp': # update to temperature (K)
+				print('updating temperature inside chamber to ' +str(TEMP[ev_i]) + ' K')
 				# new temperature (K)
-				temp_now = TEMP[temp_count]
-				
+				temp_now = TEMP[ev_i]
+			
 				# update vapour pressure of water (log10(atm)), but don't change 
 				# gas-phase concentration because we assume RH allowed to change with
 				# varying temperature
 				[_, Psat_water, _] = water_calc(temp_now, RH, 6.02214129e+23)
-				
+			
 				# update vapour pressures of all components (molecules/cc and Pa), 
 				# ignore density output
 				[Psat, _, Psat_Pa] = volat_calc(0, Pybel_objects, temp_now, H2Oi,   
 								num_speci, Psat_water, [], [], 0, corei, 
-								pconc, 0, 0.0, [], 1)
+								pconc, 0, 0.0, {}, 1, nuci, nuc_name)
 
 				# note, assume that air pressure inside chamber stays constant despite
 				# varying temperature, therefore total molecular concentration must vary
@@ -306,119 +472,54 @@ def ode_gen(y, num_speci, num_eqn, rindx, pindx, rstoi, pstoi, H2Oi,
 				Cfactor0 = Cfactor
 				# update number of molecules in one billionth of this
 				Cfactor = ntot*1.0e-9 # ppb-to-molecules/cc
-								
+							
 				# update mean free path and thermal speed
 				# mean thermal speed of each molecule (m/s) (11.151 Jacobson 2005)
 				# note that we need the weight of one molecule, which is why y_mw is divided by
 				# Avogadro's constant, and we need it in kg, which is why we multiply by 1e-3
 				therm_sp = (np.power((8.0E0*si.k*temp_now)/(np.pi*(y_mw/si.N_A)*1.0E-3), 0.5E0))
-				
+			
 				# mean free path (m) for each species (16.23 of Jacobson 2005)
 				# molecular weight of air (28.966 g/mol taken from table 16.1 Jacobson 2005)
 				mfp = (((64.0*DStar_org)/(5*np.pi*therm_sp))*(28.966/(28.966+y_mw))).reshape(-1, 1)
-				
+			
 				# alter constant concentration (molecules/cc) of any components
 				# with constant gas-phase concentration (ppb)
 				if num_const_compi>0:
-					
-					y[const_compi[:]] = y[const_compi[:]]*(Cfactor/Cfactor0)
-	
-				if (temp_count<(len(tempt)-1)):
-					temp_count += 1 # keep count of temperature setting index
-				else:
-					temp_count = -1 # reached end
-				bc_red = 0 # reset flag for time step reduction due to boundary conditions
 				
-			# check whether light on/off changes during proposed integration time step
-			if (sumt+tnew > tempt[temp_count] and temp_count!=-1):
-				# if yes, then reset integration time step so that next step coincides 
-				# with change
-				tnew = tempt[temp_count]-sumt
-				bc_red = 1 # flag for time step reduction due to boundary conditions
-				
-		# ---------------------
-		# check on instantaneous injection of components
-		
-		if len(injectt)>0 and gasinj_count>-1: # if any injections occur
-		
-			# check whether changes occur at start of this time step
-			if (sumt == injectt[gasinj_count]):
+					y[const_compi[:]] = y[const_compi[:]]*(Cfactor/Cfactor0)
+			
+			if ev_name == 'gasinj': # instantaneous injection of components
 				# account for change in gas-phase concentration,
 				# convert from ppb/s to molecules/cc.s (air)
-				y[inj_indx] += Ct[:, gasinj_count]*Cfactor
-				
-				if (gasinj_count<(Ct.shape[1]-1)):
-					gasinj_count += 1 # update count on injections
-				else:
-					gasinj_count = -1 # reached end
-				bc_red = 0 # reset flag for time step reduction due to boundary conditions
-					
-			# check whether changes occur during proposed integration time step
-			if (sumt+tnew > injectt[gasinj_count] and gasinj_count!=-1):
-				# if yes, then reset integration time step so that next step coincides 
-				# with change
-				tnew = injectt[gasinj_count]-sumt
-				bc_red = 1 # flag for time step reduction due to boundary conditions
-		
-		# ----------------------
-		# instantaneous seed particle influx check
-		
-		if (sum(pconct[0, :])>0) and seedt_count>-1: # if constant influx occurs
-		
-			# check whether changes occur at start of this time step
-			if (sumt == pconct[0, seedt_count]):
-				
+				y[inj_indx] += Ct[:, ev_i]*Cfactor
+			
+			if ev_name == 'seed': # instantaneous seed particle influx
 				# account for change in seed particles
 				[y[num_speci:-num_speci], N_perbin, x, 
 						Varr] = pp_dursim(y[num_speci:-num_speci], N_perbin, 
-									mean_rad[0, seedt_count],
-									pconc[:, seedt_count], corei, lowersize, 
+									mean_rad[0, ev_i],
+									pconc[:, ev_i], corei, lowersize, 
 									uppersize, num_speci, num_sb, MV, rad0, 
-									std[0, seedt_count], y_dens, H2Oi, rbou)
-				if (seedt_count<(pconct.shape[1]-1)):
-					seedt_count += 1
-				else:
-					seedt_count = -1 # reached end
-				bc_red = 0 # reset flag for time step reduction due to boundary conditions
-				
-			# check whether changes occur during proposed integration time step
-			if (sumt+tnew > pconct[0, seedt_count] and seedt_count!=-1): 
-				# if yes, then reset integration time step so that next step coincides 
-				# with change
-				tnew = pconct[0, seedt_count]-sumt
-				bc_red = 1 # flag for time step reduction due to boundary conditions
-
-		
-		# ----------------------
-		# check on constant influxes of components, note this causes a change in the ode
-		# as influx occurs over a period and is not instantaneous
-		
-		if len(const_infl_t)>0 and influx_count>-1: # if constant influx occurs
-		
-			# in case influxes begin after simulation start
-			if (sumt == 0.0 and const_infl_t[influx_count] != 0.0):
-				Cinfl_now = np.zeros((Cinfl.shape[0], 1))
-		
-			# check whether changes occur at start of this time step
-			if (sumt == const_infl_t[influx_count]):
-				
+									std[0, ev_i], y_dens, H2Oi, rbou)
+			
+			# check on constant influxes of components, note this causes a change in the
+			# ode as influx occurs over a period and is not instantaneous
+			if ev_name == 'influx':
 				# influx of components now, convert from ppb/s to molecules/cc.s (air)
-				Cinfl_now = (Cinfl[:, influx_count]*Cfactor).reshape(-1, 1)
-				
-				
-				# update index counter for constant influxes - used in integrator below
-				if (influx_count<(Cinfl.shape[1]-1)):
-					influx_count += 1
-				else:
-					influx_count = -1 # reached end
-				bc_red = 0 # reset flag for time step reduction due to boundary conditions
+				Cinfl_now = (Cinfl[:, ev_i]*Cfactor).reshape(-1, 1)
 			
-			# check whether changes occur during proposed integration time step
-			if (sumt+tnew > const_infl_t[influx_count] and influx_count!=-1):
-				# if yes, then reset integration time step so that next step coincides 
-				# with change
-				tnew = const_infl_t[influx_count]-sumt
-				bc_red = 1 # flag for time step reduction due to boundary conditions
+			bc_red = 0 # reset flag for time step reduction due to boundary conditions
+			# let the solver estimate its first step after a change to the ode system
+			h_last = 0.0
+		
+		# check whether a change to boundary conditions occurs during proposed 
+		# integration time step
+		if (sumt+tnew > event_next(events)):
+			# if yes, then reset integration time step so that next step coincides 
+			# with change
+			tnew = event_next(events)-sumt
+			bc_red = 1 # flag for time step reduction due to boundary conditions
 		
 		# end of update for changed boundary conditions ----------------------------------
 		
@@ -443,10 +544,31 @@ def ode_gen(y, num_speci, num_eqn, rindx, pindx, rstoi, pstoi, H2Oi,
 			a = int(a[0])
 			
 		# update reaction rate coefficients
-		[reac_coef, reac_coef_aq] = rate_valu_calc(RO2_indices, y[H2Oi], temp_now, lightm, y, 
+		[reac_coef, reac_coef_aq, ro2_k] = rate_valu_calc(RO2_indices, y[H2Oi], temp_now, lightm, y, 
 									daytime+sumt, 
 									lat, lon, act_flux_path, DayOfYear, Pnow, 
-									photo_par_file, Jlen)
+									photo_par_file, Jlen, rate_mod, rate_mod_aq, 
+									rate_cache, rate_tol, photo_tab_step)
+		
+		if rate_interp > 0:
+			# reaction rate coefficients at the ends of the segments of this interval 
+			# (s), with concentrations and temperature held at their values at the start
+			# of the interval, note that temperature changes are applied as events at 
+			# the start of intervals
+			rate_tab_t = np.linspace(0.0, t, rate_interp+1)
+			rate_tab = np.zeros((rate_interp+1, len(reac_coef)))
+			rate_tab_aq = np.zeros((rate_interp+1, len(reac_coef_aq)))
+			rate_tab_ro2 = np.zeros((rate_interp+1, len(ro2_k)))
+			rate_tab[0, :] = reac_coef
+			rate_tab_aq[0, :] = reac_coef_aq
+			rate_tab_ro2[0, :] = ro2_k
+			for k in range(1, rate_interp+1):
+				[rate_tab[k, :], rate_tab_aq[k, :], 
+					rate_tab_ro2[k, :]] = rate_valu_calc(RO2_indices, y[H2Oi], 
+									temp_now, lightm, y, daytime+sumt+rate_tab_t[k], 
+									lat, lon, act_flux_path, DayOfYear, Pnow, 
+									photo_par_file, Jlen, rate_mod, rate_mod_aq, 
+									rate_cache, rate_tol, photo_tab_step)
 		
 		y0[:] = y[:] # update initial concentrations (molecules/cc (air))
 		# update particle volumes at start of time step (um3)
@@ -469,113 +591,18 @@ def ode_gen(y, num_speci, num_eqn, rindx, pindx, rstoi, pstoi, H2Oi,
 		# note, need to have rstoi and pstoi multiplication in the gas-phase reaction part
 		while redt == 1:
 			
-			# numba compiler to convert to machine code
-			@jit(f8[:](f8, f8[:]), nopython=True, cache=False)
-			# ode solver -------------------------------------------------------------
-			def dydt(t, y):
-				
-				# empty array to hold rate of change (molecules/cc(air).s)
-				dydt = np.zeros((len(y)))
-				# gas-phase rate of change ------------------------------------
-				for i in range(num_eqn[0]): # equation loop
-					
-					# gas-phase rate of change (molecules/cc (air).s)
-					if (y[rindx[i, 0:nreac[i]]]==0.0).sum()>0: 
-						continue # if any reactants not present skip this reaction
-					else:
-						gprate = ((y[rindx[i, 0:nreac[i]]]**
-									rstoi[i, 0:nreac[i]]).prod())*reac_coef[i]
-						# loss of reactants
-						dydt[rindx[i, 0:nreac[i]]] -= gprate*rstoi[i, 0:nreac[i]]
-						# gain of products
-						dydt[pindx[i, 0:nprod[i]]] += gprate*pstoi[i, 0:nprod[i]]
-				
-				# the constant gas-phase influx of components with this property
-				if const_infli_len>0:
-					for i in range(const_infli_len):
-						dydt[const_infli[i]] = dydt[const_infli[i]]+Cinfl_now[i, 0]
-
-				if num_sb>1: # as num_sb includes 1 for wall
-					# gas-particle partitioning, based on eqs. 3 and 4 of Zaveri et al.
-					# (2008): doi:10.1029/2007JD008782
-					# and eq. 3 of Riipinen et al.
-					# (2010): doi:10.1016/j.atmosenv.2009.11.022
-					# -----------------------------------------------------------
-					for ibin in range(num_sb-1): # size bin loop
-							
-						Csit = y[num_speci*(ibin+1):num_speci*(ibin+2)]
-						# sum of molecular concentrations per bin (molecules/cc (air))
-						conc_sum = np.zeros((1))
-						
-						conc_sum[0] = ((Csit.sum()-Csit[corei])+Csit[corei]*core_diss)
-						
-						# prevent numerical error due to division by zero
-						ish = conc_sum==0.0
-						conc_sum[ish] = 1.0e-40
-							
-						# particle surface gas-phase concentration (molecules/cc (air))
-						Csit = (Csit/conc_sum)*Psat[:, 0]*kelv_fac[ibin]*act_coeff[:, 0]
-							
-						# partitioning rate (molecules/cc.s)
-						dydt_all = kimt[:, ibin]*(y[0:num_speci]-Csit)
-							
-						# gas-phase change
-						dydt[0:num_speci] -= dydt_all
-						# particle-phase change
-						dydt[num_speci*(ibin+1):num_speci*(ibin+2)] += dydt_all
-						
-						# rate of change to particulate components due to
-						# reactions in particulates (molecules/cc (air).s)
-						for i in range(num_eqn[1]): # particulate equation loop
-							if (y[rindx_aq[i, 0:nreac_aq[i]]]==0.0).sum()>0: 
-								continue # if any reactants not present skip this reaction
-							else:
-								gprate = ((y[rindx_aq[i, 0:nreac_aq[i]]]**
-											rstoi_aq[i, 0:nreac_aq[i]]).prod())*reac_coef_aq[i]
-								# loss of reactants
-								dydt[rindx_aq[i, 0:nreac_aq[i]]+num_speci*(ibin+1)] -= gprate*rstoi_aq[i, 0:nreac_aq[i]]
-								# gain of products
-								dydt[pindx_aq[i, 0:nprod_aq[i]]+num_speci*(ibin+1)] += gprate*pstoi_aq[i, 0:nprod_aq[i]]
-				
-				if (kgwt*Cw)>1.0e-10:
-					# -----------------------------------------------------------
-					# gas-wall partitioning (dydt is in molecules/cc.s (air))
-					
-					# concentration at wall (molecules/cc (air))
-					Csit = y[num_speci*num_sb:num_speci*(num_sb+1)]
-					Csit = (Psat[:,0]*(Csit/Cw)*act_coeff[:, 0]) # with Raoult term
-	
-					dydt_all = (kgwt)*(y[0:num_speci]-Csit)
-							
-					# gas-phase change
-					dydt[0:num_speci] -= dydt_all
-					# wall concentration change
-					dydt[num_speci*num_sb:num_speci*(num_sb+1)] += dydt_all
-				
-				# constant gas-phase concentration of components with this property
-				if num_const_compi>0:
-					dydt[const_compi[:]] = 0.0
-
-				return(dydt)
-				
-			
-			mod = Explicit_Problem(dydt, y0)
-			mod_sim = CVode(mod) # define a solver instance
-			# absolute tolerance, going higher than can 1.0e-3 cause issues with water 
-			# vapour
-			mod_sim.atol = int_tol[0]
-			# relative tolerance, going higher than 1.0e-4 can cause issues with water 
-			# vapour
-			mod_sim.rtol = int_tol[1]
-			# check if total integration time exceeds the next required recording time
-			# step, if it does, then limit the integration sub-time step to that of the
-			# recording interval (s)
-			if sumt+t>save_step*save_count:
-				mod_sim.maxh = (save_step*save_count)-sumt
-			mod_sim.discr = 'BDF' # the integration approach, default is 'Adams'
+			# re-initialise the solver with the concentrations at the start of this 
+			# interval (s, molecules/cc (air))
+			mod_sim.re_init(0.0, y0)
+			# warm start from the last step size of the previous interval (s)
+			mod_sim.inith = min(h_last, t)
 
-			t_array, res = mod_sim.simulate(t)		
+			t_array, res = mod_sim.simulate(t)
+			h_last = mod_sim.get_last_step() # last step size of solver (s)
 			y = res[-1, :] # new concentrations (molecule/cc (air))
+			# time integrated over (s), less than requested if integration stopped by 
+			# particles reaching the volume limits of their size bin
+			t = t_array[-1]
 
 			# low value filler for concentrations (molecules/cc (air)) to prevent 
 			# numerical errors
@@ -691,14 +718,11 @@ def ode_gen(y, num_speci, num_eqn, rindx, pindx, rstoi, pstoi, H2Oi,
 			# and wall at several times covered by integration
 			while ((save_step*save_count-sumt)<1.0e-10):
 				
-				# convert list to numpy array
-				t_array = np.array(t_array)
-				# select solution at closest time to recording interval
-				indx = np.where(np.abs(((sumt-t)+t_array)-save_step*save_count)==
-								np.min(np.abs(((sumt-t)+t_array)-save_step*save_count)))[0][0]
-				ythen = res[indx, :] # get concentrations (molecules/cm3) at this time
-				# time at this time
-				sumt_rec = (sumt-t)+t_array[indx]
+				# time of recording (s)
+				sumt_rec = save_step*save_count
+				# concentrations (molecules/cc (air)) at this time, interpolated between 
+				# the adaptive time steps of the ode solver
+				ythen = dense_out(t_array, res, sumt_rec-(sumt-t), dydt)
 				
 				# record values
 				[t_out, y_mat, Nresult_dry, Nresult_wet, x2, 
@@ -717,14 +741,11 @@ def ode_gen(y, num_speci, num_eqn, rindx, pindx, rstoi, pstoi, H2Oi,
 			# condition if the total simulation time is not divisible by save_step
 			if (save_step*save_count-sumt)>0.0 and np.abs(sumt-end_sim_time)<1.0e-10 and save_count != math.ceil(end_sim_time/save_step)+1:
 			
-				# convert list to numpy array
-				t_array = np.array(t_array)
-				# select solution at closest time to recording interval
-				indx = np.where(np.abs(((sumt-t)+t_array)-save_step*save_count)==
-								np.min(np.abs(((sumt-t)+t_array)-save_step*save_count)))[0][0]
-				ythen = res[indx, :] # get concentrations (molecules/cm3) at this time
-				# time at this time
-				sumt_rec = (sumt-t)+t_array[indx]
+				# time of recording (s)
+				sumt_rec = sumt
+				# concentrations (molecules/cc (air)) at this time, interpolated between 
+				# the adaptive time steps of the ode solver
+				ythen = dense_out(t_array, res, t, dydt)
 				
 				# record values
 				[t_out, y_mat, Nresult_dry, Nresult_wet, x2, 
@@ -10,7 +10,7 @@ def pp_intro(y, num_speci, Pybel_objects, TEMP, H2Oi,
 			mfp, accom_coeff, y_mw, surfT, 
 			DStar_org, RH, num_sb, lowersize, uppersize, pconc, 
 			nuc_comp, testf, std, mean_rad, therm_sp,
-			Cw, y_dens, Psat, core_diss, kgwt, space_mode, corei, spec_namelist, 
+			Cw, y_dens, Psat, core_diss, kgwt, space_mode, corei, spec_reg, 
 			act_coeff):
 	
 			
@@ -40,7 +40,8 @@ def pp_intro(y, num_speci, Pybel_objects, TEMP, H2Oi,
 	# space_mode - string specifying whether to space size bins logarithmically or 
 	# linearly
 	# corei - index of component comprising seed particles
-	# spec_namelist - names of components noted in chemical scheme file
+	# spec_reg - registry of components, with indices of components by their names
+	#			(as noted in chemical scheme file) in indx
 	# act_coeff - activity coefficient of components
 	# ------------------------------------------
 	
@@ -57,7 +58,7 @@ def pp_intro(y, num_speci, Pybel_objects, TEMP, H2Oi,
 	# index of nucleating component
 	if len(nuc_comp)>0:
 		print('whoop', nuc_comp, nuc_comp[0])
-		nuc_compi = spec_namelist.index(nuc_comp[0])
+		nuc_compi = spec_reg['indx'][nuc_comp[0]]
 		nuc_comp = np.empty(1, dtype=int)
 		nuc_comp[0] = nuc_compi
 	
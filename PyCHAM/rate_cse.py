@@ -0,0 +1,158 @@
+'''module for common subexpression elimination over rate coefficient expressions'''
+# called by eqn_parser when writing the module for calculating rate coefficients, this
+# module finds subexpressions (e.g. falloff terms and numpy.exp(B/TEMP) terms) repeated
+# across the generic rate coefficients and the reaction rate coefficient expressions
+# that are evaluated one at a time, so that each is evaluated once and held in a local
+# variable (named with the given prefix and a count) that is defined just before its
+# first use
+
+import ast
+import copy
+
+# operator symbols
+bin_op = {'Add': '+', 'Sub': '-', 'Mult': '*', 'Div': '/', 'Pow': '**', 'Mod': '%',
+			'FloorDiv': '//'}
+un_op = {'USub': '-', 'UAdd': '+'}
+
+def rate_cse(exprs, pre):
+
+	# inputs: ----------------------------------------------------------------------------
+	# exprs - python readable expressions, in the order they are evaluated
+	# pre - prefix for names of local variables holding common subexpressions
+	# ------------------------------------------------------------------------------------
+
+	trees = [] # expression trees
+	expi = [] # indices of expressions that can be rewritten
+	for i in range(len(exprs)):
+		try:
+			tree = ast.parse(exprs[i].strip(), mode='eval').body
+			expr_str(tree) # check expression can be written back
+		except (SyntaxError, ValueError):
+			continue # leave expression unchanged
+		trees.append(tree)
+		expi.append(i)
+
+	op_num0 = sum([op_count(tree) for tree in trees]) # operations before elimination
+	cse_tree = [] # common subexpressions
+
+	while True:
+
+		# count occurrences of candidate subexpressions in expressions and in the common
+		# subexpressions found so far
+		occ = {}
+		for tree in trees+cse_tree:
+			for node in ast.walk(tree):
+				if op_count(node) == 0:
+					continue
+				# negative numbers are not worth holding
+				if (isinstance(node, ast.UnaryOp) and 
+					type(node.operand).__name__ in ['Num', 'Constant']):
+					continue
+				key = ast.dump(node)
+				if key in occ:
+					occ[key][0] += 1
+				else:
+					occ[key] = [1, node]
+
+		# subexpression saving most operations
+		best = ['', 0]
+		for key in occ:
+			saving = (occ[key][0]-1)*op_count(occ[key][1])
+			if saving > best[1]:
+				best = [key, saving]
+		if best[1] == 0: # no repeated subexpressions remain
+			break
+
+		node_new = copy.deepcopy(occ[best[0]][1])
+		name = str(pre + str(len(cse_tree)))
+		trees = [cse_sub(tree, best[0], name) for tree in trees]
+		cse_tree = [cse_sub(tree, best[0], name) for tree in cse_tree]
+		cse_tree.append(node_new)
+
+	op_num1 = sum([op_count(tree) for tree in trees+cse_tree]) # operations after
+
+	# rewritten expressions and definitions of common subexpressions to place before
+	# each, with definitions ordered so that any subexpression they use comes first
+	exprs_new = list(exprs)
+	cse_pre = [[] for i in range(len(exprs))]
+	done = [] # common subexpressions already defined
+	def cse_def(tree, pre_list):
+		for node in ast.walk(tree):
+			if isinstance(node, ast.Name) and node.id.startswith(pre):
+				csei = int(node.id[len(pre)::])
+				if csei < len(cse_tree) and csei not in done:
+					done.append(csei)
+					cse_def(cse_tree[csei], pre_list)
+					pre_list.append(str(pre + str(csei) + ' = ' + 
+							expr_top(cse_tree[csei])))
+	for k in range(len(trees)):
+		cse_def(trees[k], cse_pre[expi[k]])
+		# only rewrite expressions that use common subexpressions
+		if any([isinstance(node, ast.Name) and node.id.startswith(pre) for node in 
+			ast.walk(trees[k])]):
+			exprs_new[expi[k]] = expr_top(trees[k])
+
+	# outputs: ---------------------------------------------------------------------------
+	# exprs_new - expressions using local variables for common subexpressions
+	# cse_pre - definitions of local variables to write before each expression
+	# op_num0 - number of operations before elimination
+	# op_num1 - number of operations after elimination
+	# ------------------------------------------------------------------------------------
+
+	return(exprs_new, cse_pre, op_num0, op_num1)
+
+# function to count the arithmetic operations and function calls in an expression
+def op_count(tree):
+
+	return(sum([isinstance(node, (ast.BinOp, ast.UnaryOp, ast.Call)) for node in
+			ast.walk(tree)]))
+
+# function to replace a subexpression by the name of the local variable holding it
+def cse_sub(tree, key, name):
+
+	if ast.dump(tree) == key:
+		return(ast.Name(id=name, ctx=ast.Load()))
+	for field, value in ast.iter_fields(tree):
+		if isinstance(value, ast.AST):
+			setattr(tree, field, cse_sub(value, key, name))
+		elif isinstance(value, list):
+			setattr(tree, field, [cse_sub(val, key, name) if isinstance(val, ast.AST)
+				else val for val in value])
+	return(tree)
+
+# function to write an expression tree as python code without brackets around the 
+# whole expression
+def expr_top(tree):
+
+	if isinstance(tree, (ast.BinOp, ast.UnaryOp)):
+		return(expr_str(tree)[1:-1])
+	return(expr_str(tree))
+
+# function to write an expression tree as python code, with brackets around every
+# operation so that the order of evaluation is unchanged
+def expr_str(node):
+
+	node_type = type(node).__name__
+	if node_type == 'Name':
+		return(node.id)
+	if node_type == 'Num': # number in python versions before 3.8
+		return(repr(node.n))
+	if node_type == 'Constant' and isinstance(node.value, (int, float)):
+		return(repr(node.value))
+	if node_type == 'Attribute':
+		return(str(expr_str(node.value) + '.' + node.attr))
+	if node_type == 'BinOp' and type(node.op).__name__ in bin_op:
+		return(str('(' + expr_str(node.left) + bin_op[type(node.op).__name__] +
+				expr_str(node.right) + ')'))
+	if node_type == 'UnaryOp' and type(node.op).__name__ in un_op:
+		return(str('(' + un_op[type(node.op).__name__] + expr_str(node.operand) + ')'))
+	if node_type == 'Call' and len(node.keywords) == 0:
+		return(str(expr_str(node.func) + '(' + ', '.join([expr_str(arg) for arg in
+				node.args]) + ')'))
+	if node_type == 'Subscript':
+		sl = node.slice
+		if type(sl).__name__ == 'Index': # python versions before 3.9
+			sl = sl.value
+		return(str(expr_str(node.value) + '[' + expr_str(sl) + ']'))
+
+	raise ValueError('expression form not supported')
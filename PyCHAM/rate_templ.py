@@ -0,0 +1,172 @@
+'''module to group reaction rate coefficient expressions by their form'''
+# called by eqn_parser when writing the module for calculating rate coefficients, this
+# module recognises expressions that are a product of a constant, an Arrhenius term
+# (numpy.exp(B/TEMP)) and named quantities (generic rate coefficients, RO2, H2O, M, N2,
+# O2 and photolysis rates (J[n])), so that each group can be evaluated as one numpy
+# operation over arrays of parameters, whilst any other expression is left for scalar
+# evaluation; it also separates reactions by whether their rate coefficients depend on
+# H2O, RO2 or photolysis rates, so that rate_valu_calc can update each part only when 
+# its inputs change, and finds the photolysis rates used, so that only these are 
+# calculated
+
+import numpy as np
+import re
+
+# names of quantities, other than generic rate coefficients, that rate coefficients can
+# be scaled by (must be available inside the generated module)
+var_name = ['RO2', 'H2O', 'M', 'N2', 'O2']
+
+# Arrhenius term with constant activation temperature
+arr_regex = re.compile(r'^numpy\.exp\(([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)/TEMP\)$')
+# photolysis rate
+J_regex = re.compile(r'^J\[(\d+)\]$')
+# photolysis rates within an expression
+J_all_regex = re.compile(r'(?<![A-Za-z0-9_])J\[(\d+)\]')
+# names within an expression
+name_regex = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+# parts that rate coefficients are separated into: those depending only on temperature
+# and the concentrations of M, N2 and O2 (therm), those also depending on photolysis 
+# rates (photo) and those also depending on the concentrations of H2O or RO2 (ro2), 
+# which change the most often
+part_name = ['therm', 'photo', 'ro2']
+
+def rate_templ(reac_coef, rrc_name, J_use):
+
+	# inputs: ----------------------------------------------------------------------------
+	# reac_coef - reaction rate coefficient expressions (python readable strings)
+	# rrc_name - names of generic reaction rate coefficients
+	# J_use - indices of photolysis rates (channels) used by the mechanism
+	# ------------------------------------------------------------------------------------
+
+	# index of each named quantity in the vector of named values (V) held by the
+	# generated module: 0 is for unity, then generic rate coefficients, then the
+	# quantities in var_name, then the photolysis rates used by the mechanism (in the 
+	# order of J_use)
+	V_indx = {}
+	for i in range(len(rrc_name)):
+		if rrc_name[i] not in V_indx:
+			V_indx[rrc_name[i]] = i+1
+	for i in range(len(var_name)):
+		if var_name[i] not in V_indx:
+			V_indx[var_name[i]] = len(rrc_name)+1+i
+	J0 = len(rrc_name)+1+len(var_name) # index of first photolysis rate
+
+	rate_A = np.zeros((len(reac_coef))) # constant factor
+	rate_B = np.zeros((len(reac_coef))) # activation temperature (K)
+	rate_V = [] # indices of named factors per reaction
+	fall_i = [] # reactions not matching these forms
+
+	for i in range(len(reac_coef)): # reaction loop
+
+		# factors of expression, note that ** means raising to a power
+		factors = (reac_coef[i].replace(' ', '').replace('**', '^')).split('*')
+
+		A = 1.0
+		B = 0.0
+		Vi = []
+		for fac in factors:
+			try: # constant
+				A = A*float(fac)
+				continue
+			except ValueError:
+				pass
+			if arr_regex.match(fac) != None: # Arrhenius term
+				B += float(arr_regex.match(fac).group(1))
+			elif J_regex.match(fac) != None: # photolysis rate
+				Vi.append(J0+J_use.index(int(J_regex.match(fac).group(1))))
+			elif fac in V_indx: # generic rate coefficient or other named quantity
+				Vi.append(V_indx[fac])
+			else: # factor not recognised
+				A = np.nan
+				break
+
+		if np.isnan(A):
+			fall_i.append(i)
+			continue
+		rate_A[i] = A
+		rate_B[i] = B
+		rate_V.append([i, Vi])
+
+	# group reactions with only a constant (cnst), with a constant and Arrhenius
+	# term (arr) and those with named factors (scl)
+	cnst_i = [i for [i, Vi] in rate_V if len(Vi) == 0 and rate_B[i] == 0.0]
+	arr_i = [i for [i, Vi] in rate_V if len(Vi) == 0 and rate_B[i] != 0.0]
+	scl = [[i, Vi] for [i, Vi] in rate_V if len(Vi) > 0]
+
+	# matrix of named factor indices for the scaled group, padded with the index for
+	# unity
+	nfac = max([len(Vi) for [i, Vi] in scl]+[0])
+	scl_v = np.zeros((len(scl), nfac)).astype(int)
+	for k in range(len(scl)):
+		scl_v[k, 0:len(scl[k][1])] = scl[k][1]
+	scl_i = [i for [i, Vi] in scl]
+
+	# outputs: ---------------------------------------------------------------------------
+	# rate_grp - dictionary of groups, each with reaction indices (i), constant
+	#	factors (A), activation temperatures (B) and, for the scaled group, indices of
+	#	named factors (v)
+	# fall_i - indices of reactions to evaluate by their original expressions
+	# J0 - index of the first photolysis rate in the vector of named values
+	# ------------------------------------------------------------------------------------
+
+	rate_grp = {'cnst': {'i': np.array(cnst_i).astype(int), 'A': rate_A[cnst_i]},
+				'arr': {'i': np.array(arr_i).astype(int), 'A': rate_A[arr_i],
+				'B': rate_B[arr_i]},
+				'scl': {'i': np.array(scl_i).astype(int), 'A': rate_A[scl_i],
+				'B': rate_B[scl_i], 'v': scl_v}}
+
+	return(rate_grp, fall_i, J0)
+
+def J_chan(exprs):
+
+	# inputs: ----------------------------------------------------------------------------
+	# exprs - expressions for reaction and generic rate coefficients (python readable 
+	#	strings)
+	# ------------------------------------------------------------------------------------
+
+	J_use = []
+	for expr in exprs:
+		J_use += [int(n) for n in J_all_regex.findall(expr)]
+
+	# outputs: ---------------------------------------------------------------------------
+	# J_use - indices of photolysis rates (channels) used, in ascending order
+	# ------------------------------------------------------------------------------------
+
+	return(sorted(set(J_use)))
+
+def rate_part(reac_coef, rrc, rrc_name):
+
+	# inputs: ----------------------------------------------------------------------------
+	# reac_coef - reaction rate coefficient expressions (python readable strings)
+	# rrc - expressions for generic reaction rate coefficients (name = expression)
+	# rrc_name - names of generic reaction rate coefficients
+	# ------------------------------------------------------------------------------------
+
+	# generic rate coefficients depending on H2O, RO2 or photolysis rates, either 
+	# directly or through an earlier generic rate coefficient
+	rrc_dep = np.zeros((len(rrc))).astype(int)
+	dep_name = ['H2O', 'RO2', 'J']
+	for i in range(len(rrc)):
+		rhs = rrc[i][rrc[i].index('=')+1::]
+		if len(set(name_regex.findall(rhs)).intersection(dep_name))>0:
+			rrc_dep[i] = 1
+			dep_name.append(rrc_name[i])
+
+	# part of each reaction, with generic rate coefficients depending on H2O, RO2 or 
+	# photolysis rates evaluated alongside H2O and RO2 in the last part
+	rate_p = np.zeros((len(reac_coef))).astype(int)
+	for i in range(len(reac_coef)):
+		names = set(name_regex.findall(reac_coef[i]))
+		if len(names.intersection([dn for dn in dep_name if dn != 'J']))>0:
+			rate_p[i] = 2
+		elif 'J' in names:
+			rate_p[i] = 1
+
+	# outputs: ---------------------------------------------------------------------------
+	# rate_p - index of part (in part_name) of each reaction
+	# rrc_dep - flag for generic rate coefficients depending on H2O, RO2 or photolysis
+	#			rates
+	# ------------------------------------------------------------------------------------
+
+	return(rate_p, rrc_dep)
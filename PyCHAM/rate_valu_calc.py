@@ -1,13 +1,19 @@
 '''module to link ode_gen with Rate_coeffs for calculation of gas-phase reaction coefficients'''
 # called and returned to ode_gen, this module sets up the final details for calculating
-# reaction rate coefficient, which is done via the called module Rate_coeffs 
+# reaction rate coefficient, which is done via the Rate_coeffs module compiled by eqn_parser;
+# rate coefficients are held in a cache in three parts (depending only on temperature and
+# M, N2 and O2, also on photolysis rates and also on H2O or RO2) with each part updated 
+# only when its inputs have changed by more than the relative tolerance rate_tol since
+# it was last calculated
 
 
 import numpy as np
+import PhotolysisRates
 
 
 def rate_valu_calc(RO2_indices, H2O, TEMP, lightm, y, time, lat, lon, act_flux_path, 
-					DayOfYear, PInit, photo_par_file, Jlen):
+					DayOfYear, PInit, photo_par_file, Jlen, rate_mod, rate_mod_aq, 
+					rate_cache, rate_tol, photo_tab_step):
 
 	# ---------------------------------------------
 	# inputs:
@@ -24,6 +30,14 @@ def rate_valu_calc(RO2_indices, H2O, TEMP, lightm, y, time, lat, lon, act_flux_p
 	# photo_par_file - name of file with with estimates for photolysis absorption
 	# 					cross-sections and quantum yields
 	# Jlen - number of photolysis reactions
+	# rate_mod - module for gas-phase rate coefficients generated by eqn_parser
+	# rate_mod_aq - module for aqueous-phase rate coefficients generated by eqn_parser
+	# rate_cache - dictionary holding the inputs and results of the last calculation
+	#				of each part of the rate coefficients, empty before the first call
+	# rate_tol - relative change in inputs to a part of the rate coefficients above which
+	#			that part is recalculated
+	# photo_tab_step - time interval (s) of lookup table of natural light photolysis 
+	#					rates against time of day, 0 for no table
 	# ---------------------------------------------
 	
 	# calculate total RO2 concentration
@@ -41,17 +55,103 @@ def rate_valu_calc(RO2_indices, H2O, TEMP, lightm, y, time, lat, lon, act_flux_p
 	N2_val = M_val*0.7809
 	O2_val = M_val*0.2095
 	
-	# note, using __import__ rather than import allows opening in run time, thereby using
-	# updated module
-	Rate_coeffs = __import__('Rate_coeffs') # calculate the rate coef. for each equation
-	# calculate the new rate coefficient array for gas phase (/s) 
-	reac_coef = Rate_coeffs.evaluate_rates(RO2, H2O, TEMP, lightm, time, lat, lon, 
-											act_flux_path, DayOfYear, M_val, N2_val, 
-											O2_val, photo_par_file, Jlen)
-	Rate_coeffs_aq = __import__('Rate_coeffs_aq')
-	# calculate the new rate coefficient array for aqueous phase (/s)
-	reac_coef_aq = Rate_coeffs_aq.evaluate_rates(RO2, H2O, TEMP, lightm, time, lat, lon, 
-											act_flux_path, DayOfYear, M_val, N2_val, 
-											O2_val, photo_par_file, Jlen)
-	
-	return(reac_coef, reac_coef_aq)
+	# photolysis rates used by the gas- and aqueous-phase reactions, so that only these 
+	# are calculated
+	if 'J_use' not in rate_cache:
+		rate_cache['J_use'] = np.union1d(rate_mod.J_use, rate_mod_aq.J_use).astype(int)
+	J_use = rate_cache['J_use']
+	
+	# inputs to each part of the rate coefficients
+	therm_in = np.array((TEMP, M_val))
+	if lightm == 0 or len(J_use) == 0: # no photolysis
+		J_in = np.zeros((1))
+	else:
+		if act_flux_path == 'no': # natural light depends on solar zenith angle
+			(secx, cosx) = PhotolysisRates.zenith(time, lat, lon, DayOfYear)
+			J_in = np.array((1.0, TEMP, cosx))
+		elif act_flux_path[-4::] == '.npy': # time series of chamber light spectra
+			# photolysis rates interpolated in time are cheap to get, so use them as the 
+			# inputs
+			J_now = PhotolysisRates.PhotolysisCalculation(time, lat, lon, TEMP, 
+								act_flux_path, DayOfYear, photo_par_file, Jlen, 
+								photo_tab_step, J_use)
+			J_in = np.append(np.ones((1)), J_now[J_use])
+		else: # chamber lights
+			J_in = np.array((1.0, TEMP))
+	H2O_in = np.array((H2O, ))
+	RO2_in = np.array((RO2, ))
+	
+	# check which parts need recalculating, with a change in one part requiring 
+	# recalculation of the parts that follow it, and a change in H2O also requiring
+	# recalculation of rate coefficients per unit RO2
+	redo_therm = rate_chng(therm_in, rate_cache.get('therm_in'), rate_tol)
+	redo_J = rate_chng(J_in, rate_cache.get('J_in'), rate_tol)
+	redo_photo = redo_therm or redo_J
+	redo_H2O = redo_photo or rate_chng(H2O_in, rate_cache.get('H2O_in'), rate_tol)
+	redo_ro2 = redo_H2O or rate_chng(RO2_in, rate_cache.get('RO2_in'), rate_tol)
+	
+	if redo_J: # estimate photolysis rates
+		if lightm == 0 or len(J_use) == 0:
+			rate_cache['J'] = np.zeros((Jlen))
+		elif act_flux_path[-4::] == '.npy':
+			rate_cache['J'] = J_now
+		else:
+			rate_cache['J'] = PhotolysisRates.PhotolysisCalculation(time, lat, lon, TEMP, 
+								act_flux_path, DayOfYear, photo_par_file, Jlen, 
+								photo_tab_step, J_use)
+		rate_cache['J_in'] = J_in
+	if redo_therm:
+		rate_cache['therm_in'] = therm_in
+	if redo_H2O:
+		rate_cache['H2O_in'] = H2O_in
+	if redo_ro2:
+		rate_cache['RO2_in'] = RO2_in
+	
+	# calculate the new rate coefficient arrays for gas phase and aqueous phase (/s)
+	for [phase, rate_mod_now] in [['gas', rate_mod], ['aq', rate_mod_aq]]:
+		if redo_therm:
+			rate_cache[phase + '_therm'] = rate_mod_now.evaluate_therm(TEMP, H2O, M_val, 
+											N2_val, O2_val)
+		if redo_photo:
+			[rate_values, V] = rate_cache[phase + '_therm']
+			rate_cache[phase + '_photo'] = rate_mod_now.evaluate_photo(rate_values.copy(), 
+											V, rate_cache['J'], TEMP, H2O, M_val, N2_val, 
+											O2_val)
+		if redo_ro2:
+			[rate_values, V] = rate_cache[phase + '_photo']
+			rate_cache[phase] = (rate_mod_now.evaluate_ro2(rate_values.copy(), V.copy(), 
+											RO2, TEMP, H2O, M_val, N2_val, O2_val))[0]
+		# gas-phase rate coefficients per unit RO2 concentration of reactions with rate
+		# coefficients proportional to RO2, for use inside the ode right-hand side
+		if redo_H2O and phase == 'gas':
+			[rate_values, V] = rate_cache[phase + '_photo']
+			rate_cache[phase + '_ro2k'] = (rate_mod_now.evaluate_ro2(rate_values.copy(), 
+											V.copy(), 1.0, TEMP, H2O, M_val, N2_val, 
+											O2_val))[0][rate_mod_now.ro2_lin_i]
+	
+	reac_coef = rate_cache['gas']
+	reac_coef_aq = rate_cache['aq']
+	ro2_k = rate_cache['gas_ro2k']
+	
+	# outputs: ---------------------------------------------------------------------------
+	# reac_coef - gas-phase reaction rate coefficients (/s)
+	# reac_coef_aq - aqueous-phase reaction rate coefficients (/s)
+	# ro2_k - gas-phase rate coefficients per unit RO2 concentration 
+	#		(/s/(molecules/cc (air))) of the reactions indexed by rate_mod.ro2_lin_i
+	# ------------------------------------------------------------------------------------
+	
+	return(reac_coef, reac_coef_aq, ro2_k)
+
+# function to check whether inputs to a part of the rate coefficients have changed
+def rate_chng(val_now, val_last, rate_tol):
+
+	# inputs: ----------------------------------------------------------------------------
+	# val_now - current values of inputs
+	# val_last - values of inputs when the part was last calculated (None if never)
+	# rate_tol - relative tolerance on change
+	# ------------------------------------------------------------------------------------
+	
+	if val_last is None or len(val_now) != len(val_last):
+		return(True)
+	
+	return(bool(np.any(np.abs(val_now-val_last) > rate_tol*np.abs(val_last))))
@@ -0,0 +1,55 @@
+'''module to convert reaction index and stoichiometry arrays into sparse matrices'''
+# called once by ode_gen before integration, this module compiles the rindx, pindx,
+# rstoi and pstoi outputs of eqn_parser into compressed sparse row (CSR) matrices, so
+# that reaction rates and their contribution to the rate of change of components can
+# be found with sparse products inside dydt_calc
+
+import numpy as np
+from scipy import sparse
+
+def stoich_mat(rindx, rstoi, pindx, pstoi, nreac, nprod, num_speci):
+
+	# inputs: ----------------------------------------------------------------------------
+	# rindx - indices of reactants per equation (equations in rows)
+	# rstoi - stoichiometries of reactants per equation
+	# pindx - indices of products per equation (equations in rows)
+	# pstoi - stoichiometries of products per equation
+	# nreac - number of reactants per equation
+	# nprod - number of products per equation
+	# num_speci - number of components
+	# ------------------------------------------------------------------------------------
+
+	num_eqn = rindx.shape[0]
+
+	# mask for the filled elements of the index arrays (those beyond nreac/nprod are
+	# fillers)
+	rmask = np.arange(rindx.shape[1]).reshape(1, -1) < nreac.reshape(-1, 1)
+	pmask = np.arange(pindx.shape[1]).reshape(1, -1) < nprod.reshape(-1, 1)
+
+	# equation index of each reactant and product
+	reqn = np.repeat(np.arange(num_eqn).reshape(-1, 1), rindx.shape[1], axis=1)[rmask]
+	peqn = np.repeat(np.arange(num_eqn).reshape(-1, 1), pindx.shape[1], axis=1)[pmask]
+
+	# reactant order matrix, equations in rows and components in columns, with the
+	# reaction order of each reactant as values
+	rord = sparse.csr_matrix((rstoi[rmask], (reqn, rindx[rmask])),
+		shape=(num_eqn, num_speci))
+
+	# net stoichiometry matrix, components in rows and equations in columns, with
+	# production minus loss as values (duplicate entries are summed, so components
+	# appearing on both sides of an equation are handled)
+	nstoi = sparse.csr_matrix((np.append(-rstoi[rmask], pstoi[pmask]),
+		(np.append(rindx[rmask], pindx[pmask]), np.append(reqn, peqn))),
+		shape=(num_speci, num_eqn))
+	nstoi.eliminate_zeros() # remove any components with zero net change
+
+	# outputs: ---------------------------------------------------------------------------
+	# rord_ptr, rord_ind, rord_val - CSR row pointers, column indices and values of the
+	#	reactant order matrix
+	# nstoi_ptr, nstoi_ind, nstoi_val - CSR row pointers, column indices and values of
+	#	the net stoichiometry matrix
+	# ------------------------------------------------------------------------------------
+
+	return(rord.indptr.astype(int), rord.indices.astype(int), rord.data.astype(float),
+		nstoi.indptr.astype(int), nstoi.indices.astype(int),
+		nstoi.data.astype(float))
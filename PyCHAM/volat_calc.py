@@ -14,10 +14,32 @@ import shutil
 import scipy.constants as si
 import errno
 import stat
+import multiprocessing
+import atexit
+
+# minimum number of components for which estimation is shared across a pool of 
+# processes, below this the cost of sending components to processes outweighs the saving
+par_min = 200
+
+# pool of processes for estimating component properties, started (from a fresh 
+# interpreter rather than forked from the user interface) the first time it is wanted and 
+# reused by later calls, and the number of processes it holds
+prop_pool = {}
+
+# function to stop the processes of the pool, called when UManSysProp is cloned again 
+# (as the processes keep the modules they imported) and on exit
+def prop_pool_close():
+
+	if 'pool' in prop_pool:
+		prop_pool['pool'].terminate()
+		prop_pool['pool'].join()
+	prop_pool.clear()
+
+atexit.register(prop_pool_close)
 
 def volat_calc(spec_list, Pybel_objects, TEMP, H2Oi, num_speci, Psat_water, vol_Comp, 
-				volP, testf, corei, pconc, umansysprop_update, core_dens, spec_namelist,
-				ode_gen_flag, nuci, nuc_comp):
+				volP, testf, corei, pconc, umansysprop_update, core_dens, spec_reg,
+				ode_gen_flag, nuci, nuc_comp, prop_proc=0):
 
 	# inputs: ------------------------------------------------------------
 	# spec_list - array of SMILE strings for components 
@@ -32,10 +54,13 @@ def volat_calc(spec_list, Pybel_objects, TEMP, H2Oi, num_speci, Psat_water, vol_
 	# pconc - initial number concentration of particles (#/cc (air))
 	# umansysprop_update - marker for cloning UManSysProp so that latest version used
 	# core_dens - density of core material (g/cc (liquid/solid density))
-	# spec_namelist - list of components' names in chemical equation file
+	# spec_reg - registry of components, with indices of components by their names
+	#			(as stated in the chemical equation file) in indx
 	# ode_gen_flag - whether or not called from front or ode_gen
 	# nuci - index of nucleating component
 	# nuc_comp - name of nucleating component
+	# prop_proc - number of processes to share estimation of component properties 
+	#			across, with estimation in series if 1 or less
 	# ------------------------------------------------------------
 	
 	
@@ -46,6 +71,7 @@ def volat_calc(spec_list, Pybel_objects, TEMP, H2Oi, num_speci, Psat_water, vol_
 	cwd = os.getcwd() # address of current working directory
 	if umansysprop_update == 1:
 		print('Cloning latest version of UManSysProp in volat_calc module')
+		prop_pool_close() # processes would keep using the previous version
 		# download latest version of umansysprop
 		
 		# check if there is an existing umansysprop folder
@@ -68,57 +94,78 @@ def volat_calc(spec_list, Pybel_objects, TEMP, H2Oi, num_speci, Psat_water, vol_
 	# point to umansysprop folder
 	sys.path.insert(1, (cwd + '/umansysprop')) # address for updated version
 	
-	from umansysprop import boiling_points
-	from umansysprop import vapour_pressures
-	from umansysprop import liquid_densities
-
 	NA = si.Avogadro # Avogadro's number (molecules/mol)
 	y_dens = np.zeros((num_speci, 1)) # components' liquid density (kg/m3)
 	Psat = np.zeros((num_speci, 1)) # species' vapour pressure
 
-	
-	if ode_gen_flag == 0: # estimate densities if called from front.py
+	# components whose density (estimated if called from front.py) and vapour pressure
+	# are estimated, with the corresponding flags
+	est_i = []
+	dens_flag = []
+	Psat_flag = []
+	for i in range (num_speci):
 		
-		for i in range (num_speci):
-			
-			# density estimation ---------------------------------------------------------
+		# density ------------------------------------------------------------------------
+		dflag = 0
+		if ode_gen_flag == 0:
 			if i == H2Oi:
 				y_dens[i] = 1.0*1.0E3 # (kg/m3 (particle))
-				continue
 			# core properties
-			if i == corei:
+			elif i == corei:
 				y_dens[i] = core_dens*1.0E3 # core density (kg/m3 (particle))
-				continue
 			# nucleating component density, if component is core (kg/m3 (particle))
-			if i == nuci and nuc_comp[0] == 'core': 
+			elif i == nuci and nuc_comp[0] == 'core': 
 				y_dens[i] = 1.0*1.0E3
-				continue
-			if spec_list[i] == '[HH]': # omit H2 as unliked by liquid density code
+			elif spec_list[i] == '[HH]': # omit H2 as unliked by liquid density code
 				# liquid density code does not like H2, so manually input kg/m3
 				y_dens[i] = 1.0e3
 			else:
-				# density (convert from g/cc to kg/m3)
-				y_dens[i] = liquid_densities.girolami(Pybel_objects[i])*1.0E3
-			# ----------------------------------------------------------------------------
-	
-	# estimate vapour pressures (log10(atm))
-	for i in range (num_speci):
-		
+				dflag = 1
 		
+		# vapour pressure ----------------------------------------------------------------
+		pflag = 0
 		if i == corei and sum(sum(pconc))>0.0:
-			continue # core component not included in Pybel_objects
-		if i == nuci and nuc_comp[0] == 'core':
-			continue # core component not included in Pybel_objects
-		
+			pflag = 0 # core component not included in Pybel_objects
+		elif i == nuci and nuc_comp[0] == 'core':
+			pflag = 0 # core component not included in Pybel_objects
 		# water vapour pressure already given by Psat_water (log10(atm))
-		if i == H2Oi:
-			Psat[i] = Psat_water
-			continue # water not included in Pybel_objects
+		elif i == H2Oi:
+			Psat[i] = Psat_water # water not included in Pybel_objects
+		else:
+			pflag = 1
 		
-		# vapour pressure (log10 atm) (# eq. 6 of Nannoolal et al. (2008), with dB of 
-		# that equation given by eq. 7 of same reference)
-		Psat[i] = ((vapour_pressures.nannoolal(Pybel_objects[i], TEMP, 
-						boiling_points.nannoolal(Pybel_objects[i]))))
+		if dflag == 1 or pflag == 1:
+			est_i.append(i)
+			dens_flag.append(dflag)
+			Psat_flag.append(pflag)
+	
+	est_res = []
+	# share estimation across processes for large numbers of components from front.py,
+	# where requested by the user (SMILES strings are sent to the processes as Pybel 
+	# objects cannot be sent between processes)
+	if ode_gen_flag == 0 and prop_proc > 1 and len(est_i) >= par_min:
+		try:
+			if prop_pool.get('nproc', 0) != prop_proc: # no pool or of a different size
+				prop_pool_close()
+				prop_pool['pool'] = multiprocessing.get_context('spawn').Pool(prop_proc)
+				prop_pool['nproc'] = prop_proc
+			# results in component order
+			est_res = prop_pool['pool'].map(prop_est_smi, 
+					[(spec_list[est_i[k]], TEMP, dens_flag[k], Psat_flag[k]) for k in 
+					range(len(est_i))], 
+					chunksize=int(np.ceil(len(est_i)/(4.0*prop_proc))))
+		except (OSError, RuntimeError, ImportError) as err:
+			print(str('Note: inside volat_calc, estimating component properties in series as pool of processes not available (' + str(err) + ')'))
+			est_res = []
+	if len(est_res) != len(est_i): # in series
+		est_res = [prop_est(Pybel_objects[est_i[k]], TEMP, dens_flag[k], Psat_flag[k]) 
+				for k in range(len(est_i))]
+	
+	for k in range(len(est_i)):
+		if dens_flag[k] == 1:
+			y_dens[est_i[k]] = est_res[k][0]
+		if Psat_flag[k] == 1:
+			Psat[est_i[k]] = est_res[k][1]
 	
 	ish = Psat==0.0
 	
@@ -130,7 +177,7 @@ def volat_calc(spec_list, Pybel_objects, TEMP, H2Oi, num_speci, Psat_water, vol_
 	if len(vol_Comp)>0 and ode_gen_flag==0:
 		for i in range (len(vol_Comp)):
 			# index of component in list of components
-			vol_indx = spec_namelist.index(vol_Comp[i])
+			vol_indx = spec_reg['indx'][vol_Comp[i]]
 			Psat[vol_indx, 0] = volP[i]
 	# ensure if nucleating component is core that it is involatile
 	if nuc_comp == 'core':
@@ -143,4 +190,53 @@ def volat_calc(spec_list, Pybel_objects, TEMP, H2Oi, num_speci, Psat_water, vol_
     # gas law, R has units cc.Pa/K.mol
 	Psat = Psat*(NA/(8.3144598e6*TEMP))
 	
-	return Psat, y_dens, Psat_Pa
\ No newline at end of file
+	return Psat, y_dens, Psat_Pa
+
+# function to estimate the liquid density and vapour pressure of a component
+def prop_est(Pybel_object, TEMP, dflag, pflag):
+
+	# inputs: ------------------------------------------------------------
+	# Pybel_object - Pybel object representing the component
+	# TEMP - temperature (K)
+	# dflag - whether (1) or not (0) to estimate density
+	# pflag - whether (1) or not (0) to estimate vapour pressure
+	# ------------------------------------------------------------
+	
+	from umansysprop import boiling_points
+	from umansysprop import vapour_pressures
+	from umansysprop import liquid_densities
+	
+	dens = 0.0
+	Psat = 0.0
+	
+	if dflag == 1:
+		# density (convert from g/cc to kg/m3)
+		dens = liquid_densities.girolami(Pybel_object)*1.0E3
+	
+	if pflag == 1:
+		# vapour pressure (log10 atm) (# eq. 6 of Nannoolal et al. (2008), with dB of 
+		# that equation given by eq. 7 of same reference)
+		Psat = vapour_pressures.nannoolal(Pybel_object, TEMP, 
+						boiling_points.nannoolal(Pybel_object))
+	
+	# outputs: ------------------------------------------------------------
+	# dens - liquid density (kg/m3), 0 if not estimated
+	# Psat - vapour pressure (log10(atm)), 0 if not estimated
+	# ------------------------------------------------------------
+	
+	return(dens, Psat)
+
+# function called by processes of the pool to estimate properties of a component from 
+# its SMILES string
+def prop_est_smi(est_arg):
+
+	# inputs: ------------------------------------------------------------
+	# est_arg - SMILES string of component, temperature (K) and flags for estimating
+	#			density and vapour pressure (see prop_est)
+	# ------------------------------------------------------------
+	
+	import pybel
+	
+	[SMILE, TEMP, dflag, pflag] = est_arg
+	
+	return(prop_est(pybel.readstring('smi', SMILE), TEMP, dflag, pflag))
\ No newline at end of file